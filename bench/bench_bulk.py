@@ -0,0 +1,70 @@
+"""Cost of registering and forgetting callbacks in bulk
+
+Measures the time taken to register a session's listeners (spread over a
+few keys that are being posted to) and then forget them, one at a time,
+with register_many/forget_many and within a batch.
+
+Usage: python -m bench.bench_bulk
+"""
+import time
+
+from pynm import NotificationManager
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def one_at_a_time(nm,registrations):
+    cb_ids = [nm.register(key,cb,**options) for key,cb,options in registrations]
+    for key in {key for key,_,_ in registrations}:
+        nm.notify(key)
+    for cb_id in cb_ids:
+        nm.forget(cb_id=cb_id)
+
+def many(nm,registrations):
+    cb_ids = nm.register_many(registrations)
+    for key in {key for key,_,_ in registrations}:
+        nm.notify(key)
+    nm.forget_many(cb_ids)
+
+def batched(nm,registrations):
+    with nm.batch():
+        cb_ids = [
+            nm.register(key,cb,**options) for key,cb,options in registrations
+        ]
+    for key in {key for key,_,_ in registrations}:
+        nm.notify(key)
+    with nm.batch():
+        for cb_id in cb_ids:
+            nm.forget(cb_id=cb_id)
+
+def session_cost(session,n_listeners,n_keys,repeat=20):
+    """Returns the best observed time (in milliseconds) of a session"""
+    nm = NotificationManager()
+    # listeners of other sessions
+    for i in range(10000):
+        nm.register(f"<<Bench{i%100}>>",null_cb,priority=i%4)
+    registrations = [
+        (f"<<Bench{i%n_keys}>>",null_cb,{"priority": i%4})
+        for i in range(n_listeners)
+    ]
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        session(nm,registrations)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best,elapsed)
+    return 1e3 * best
+
+def main():
+    print(f"{'listeners':>10} {'keys':>5} {'one at a time ms':>17} "
+          + f"{'many ms':>8} {'batch ms':>9}")
+    for n_listeners,n_keys in ((100,10),(500,10),(500,100)):
+        costs = [
+            session_cost(session,n_listeners,n_keys)
+            for session in (one_at_a_time,many,batched)
+        ]
+        print(f"{n_listeners:>10} {n_keys:>5} {costs[0]:>17.2f} "
+              + f"{costs[1]:>8.2f} {costs[2]:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Invocation overhead of Callback
+
+Measures the time taken to invoke a Callback for each combination of
+bound arguments (none, positional, keyword, both) with and without
+arguments specified at invocation.
+
+Usage: python -m bench.bench_callback
+"""
+import timeit
+
+from pynm import Callback
+
+def null_cb(*args,**kwargs):
+    pass
+
+SHAPES = {
+    "plain": ((),{}),
+    "args": ((1,2),{}),
+    "kwargs": ((),{"x":1,"y":2}),
+    "both": ((1,2),{"x":1,"y":2}),
+}
+
+def call_latency(cb,args,kwargs,number=100000,repeat=5):
+    """Returns the best observed latency (in nanoseconds) of a single call"""
+    timer = timeit.Timer(lambda: cb(*args,key="<<Bench>>",**kwargs))
+    best = min(timer.repeat(repeat=repeat,number=number))
+    return 1e9 * best / number
+
+def main():
+    print(f"{'bound':>8} {'ns/call':>10} {'ns/call+args':>14}")
+    for name,(args,kwargs) in SHAPES.items():
+        cb = Callback(null_cb,*args,**kwargs)
+        bare = call_latency(cb,(),{})
+        extra = call_latency(cb,(3,),{"z":3})
+        print(f"{name:>8} {bare:>10.0f} {extra:>14.0f}")
+
+if __name__ == "__main__":
+    main()
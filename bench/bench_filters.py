@@ -0,0 +1,52 @@
+"""Post latency of NotificationManager.notify with filtered listeners
+
+Measures the time taken to post a notification for one tenant when one
+listener per tenant is registered, with each listener either filtering
+for itself (returning early unless the tenant matches), registered with
+a `when` predicate, or registered with an indexed `where` filter.
+
+Usage: python -m bench.bench_filters
+"""
+import timeit
+
+from pynm import NotificationManager
+
+def listener(tenant):
+    def cb(key,*args,tenant_id=None,**kwargs):
+        if tenant_id != tenant:
+            return
+    return cb
+
+def build_manager(n_tenants,mode):
+    nm = NotificationManager()
+    for tenant in range(n_tenants):
+        if mode == "early return":
+            nm.register("<<Bench>>",listener(tenant))
+        elif mode == "when":
+            nm.register(
+                "<<Bench>>",listener(tenant),
+                when=lambda key,tenant=tenant,**kw: kw.get("tenant_id") == tenant,
+            )
+        else:
+            nm.register("<<Bench>>",listener(tenant),where={"tenant_id":tenant})
+    return nm
+
+def post_latency(nm,number=1000,repeat=5):
+    """Returns the best observed latency (in microseconds) of a single post"""
+    timer = timeit.Timer(lambda: nm.notify("<<Bench>>",tenant_id=7))
+    best = min(timer.repeat(repeat=repeat,number=number))
+    return 1e6 * best / number
+
+def main():
+    modes = ("early return","when","where")
+    header = " ".join(f"{m:>13}" for m in modes)
+    print(f"{'tenants':>8} {header}  (usec/post)")
+    for n_tenants in (10,100,1000,5000):
+        usec = [
+            post_latency(build_manager(n_tenants,mode),number=200)
+            for mode in modes
+        ]
+        print(f"{n_tenants:>8} " + " ".join(f"{u:>13.2f}" for u in usec))
+
+if __name__ == "__main__":
+    main()
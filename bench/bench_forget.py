@@ -0,0 +1,45 @@
+"""Cost of NotificationManager.forget against registry size
+
+Measures the time taken to forget a single callback by cb_id and by
+callback function (both without specifying a key) as the number of other
+registered callbacks grows.
+
+Usage: python -m bench.bench_forget
+"""
+import time
+
+from pynm import NotificationManager
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def target_cb(key,*args,**kwargs):
+    pass
+
+def build_manager(n_registrations):
+    nm = NotificationManager()
+    for i in range(n_registrations):
+        nm.register(f"<<Bench{i%1000}>>",null_cb,priority=i%4)
+    return nm
+
+def forget_latency(nm,forget,number=1000):
+    """Returns the mean latency (in microseconds) of registering and then
+    forgetting a single callback"""
+    elapsed = 0
+    for i in range(number):
+        cb_id = nm.register(f"<<Bench{i%1000}>>",target_cb,priority=i%4)
+        start = time.perf_counter()
+        forget(nm,cb_id)
+        elapsed += time.perf_counter() - start
+    return 1e6 * elapsed / number
+
+def main():
+    print(f"{'registry':>10} {'usec/cb_id':>11} {'usec/callback':>14}")
+    for n_registrations in (1000,10000,100000):
+        nm = build_manager(n_registrations)
+        by_id = forget_latency(nm,lambda nm,cb_id: nm.forget(cb_id=cb_id))
+        by_cb = forget_latency(nm,lambda nm,cb_id: nm.forget(callback=target_cb))
+        print(f"{n_registrations:>10} {by_id:>11.2f} {by_cb:>14.2f}")
+
+if __name__ == "__main__":
+    main()
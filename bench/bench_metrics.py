@@ -0,0 +1,26 @@
+"""Overhead of NotificationManager dispatch metrics
+
+Measures the time taken to post a single notification with metrics never
+enabled, enabled, and enabled then disabled again, as a function of the
+number of listeners registered for the notification key.
+
+Usage: python -m bench.bench_metrics
+"""
+from bench.bench_notify import build_manager
+from bench.bench_notify import post_latency
+
+def main():
+    print(f"{'listeners':>10} {'never':>10} {'enabled':>10} {'disabled':>10}")
+    for n_listeners in (1,8,32,128):
+        nm = build_manager(1,n_listeners)
+        never = post_latency(nm)
+        nm.enable_metrics()
+        enabled = post_latency(nm)
+        nm.disable_metrics()
+        disabled = post_latency(nm)
+        print(
+            f"{n_listeners:>10} {never:>10.2f} {enabled:>10.2f} {disabled:>10.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Post latency of NotificationManager.notify
+
+Measures the time taken to post a single notification as a function of
+the number of priority tiers and the number of listeners registered for
+the notification key.
+
+Usage: python -m bench.bench_notify
+"""
+import timeit
+
+from pynm import NotificationManager
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def build_manager(n_priorities,n_listeners):
+    nm = NotificationManager()
+    for i in range(n_listeners):
+        nm.register("<<Bench>>",null_cb,priority=i%n_priorities)
+    return nm
+
+def post_latency(nm,number=10000,repeat=5):
+    """Returns the best observed latency (in microseconds) of a single post"""
+    timer = timeit.Timer(lambda: nm.notify("<<Bench>>"))
+    best = min(timer.repeat(repeat=repeat,number=number))
+    return 1e6 * best / number
+
+def main():
+    print(f"{'priorities':>10} {'listeners':>10} {'usec/post':>10}")
+    for n_priorities in (1,4,16):
+        for n_listeners in (1,8,32,128):
+            if n_priorities > n_listeners:
+                continue
+            nm = build_manager(n_priorities,n_listeners)
+            usec = post_latency(nm)
+            print(f"{n_priorities:>10} {n_listeners:>10} {usec:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Post latency of NotificationManager.notify with wildcard key patterns
+
+Measures the time taken to post a notification for a key which matches
+a few of many registered patterns, against the time taken to match the
+key against the patterns from scratch.
+
+Usage: python -m bench.bench_patterns
+"""
+import timeit
+
+from pynm import NotificationManager
+from pynm.patterns import PatternTrie
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def build_manager(n_patterns):
+    nm = NotificationManager()
+    for i in range(n_patterns):
+        nm.register(f"region{i}.*.created",null_cb)
+    nm.register("region0.**",null_cb)
+    nm.register("region0.eu.created",null_cb)
+    return nm
+
+def latency(func,number=10000,repeat=5):
+    """Returns the best observed latency (in microseconds) of a single call"""
+    best = min(timeit.Timer(func).repeat(repeat=repeat,number=number))
+    return 1e6 * best / number
+
+def main():
+    print(f"{'patterns':>10} {'usec/post':>10} {'usec/match':>11}")
+    for n_patterns in (1,100,10000):
+        nm = build_manager(n_patterns)
+        trie = PatternTrie()
+        for key in nm.keys:
+            trie.add(key)
+        post = latency(lambda: nm.notify("region0.eu.created"))
+        match = latency(lambda: trie.match("region0.eu.created"))
+        print(f"{n_patterns:>10} {post:>10.2f} {match:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Cost of restoring registrations with NotificationManager.load
+
+Measures the time taken to register callbacks one at a time against the
+time taken to load the same registrations from a file written by dump.
+
+Usage: python -m bench.bench_persist
+"""
+import os
+import tempfile
+import time
+
+from pynm import NotificationManager
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def register_all(nm,n_registrations):
+    for i in range(n_registrations):
+        nm.register(f"<<Bench{i%1000}>>",null_cb,i,priority=i%4,tenant=i%50)
+
+def main():
+    print(
+        f"{'registrations':>14} {'register ms':>12} {'load ms':>10}"
+        f" {'file KB':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir,"registry.pickle")
+        for n_registrations in (1000,20000):
+            nm = NotificationManager()
+            start = time.perf_counter()
+            register_all(nm,n_registrations)
+            registered = time.perf_counter() - start
+            nm.dump(path)
+
+            start = time.perf_counter()
+            NotificationManager().load(path)
+            loaded = time.perf_counter() - start
+            size = os.path.getsize(path) / 1024
+            print(f"{n_registrations:>14} {1e3*registered:>12.1f} "
+                  + f"{1e3*loaded:>10.1f} {size:>8.0f}")
+
+if __name__ == "__main__":
+    main()
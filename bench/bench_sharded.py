@@ -0,0 +1,72 @@
+"""Throughput of NotificationManager and ShardedNotificationManager under
+contention
+
+Measures the number of operations per second achieved by threads which
+each register a callback for a per-request key, post a notification for
+it and forget it again, while other threads post notifications for a
+shared key.
+
+Usage: python -m bench.bench_sharded
+"""
+import threading
+import time
+
+from pynm import NotificationManager
+from pynm import ShardedNotificationManager
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def throughput(nm,n_workers,n_posters=4,duration=1.0):
+    for i in range(16):
+        nm.register("<<Shared>>",null_cb,priority=i%4)
+
+    stop = threading.Event()
+    requests = [0] * n_workers
+    posts = [0] * n_posters
+
+    def worker(i):
+        n = 0
+        while not stop.is_set():
+            key = f"<<Request{i}.{n}>>"
+            cb_id = nm.register(key,null_cb)
+            nm.notify(key)
+            nm.forget(cb_id=cb_id)
+            n += 1
+        requests[i] = n
+
+    def poster(i):
+        n = 0
+        while not stop.is_set():
+            nm.notify("<<Shared>>")
+            n += 1
+        posts[i] = n
+
+    threads = [
+        threading.Thread(target=worker,args=(i,)) for i in range(n_workers)
+    ]
+    threads += [
+        threading.Thread(target=poster,args=(i,)) for i in range(n_posters)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(requests) / duration, sum(posts) / duration
+
+def main():
+    print(
+        f"{'manager':>10} {'workers':>8} {'requests/sec':>13} {'posts/sec':>10}"
+    )
+    for n_workers in (1,8,32):
+        for label,nm in (
+            ("single",NotificationManager()),
+            ("sharded",ShardedNotificationManager(shards=16)),
+        ):
+            requests,posts = throughput(nm,n_workers)
+            print(f"{label:>10} {n_workers:>8} {requests:>13.0f} {posts:>10.0f}")
+
+if __name__ == "__main__":
+    main()
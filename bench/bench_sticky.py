@@ -0,0 +1,38 @@
+"""Memory retained by sticky notifications
+
+Measures the memory (traced by tracemalloc) retained per notification key
+by sticky notifications against the history depth of the keys, after far
+more notifications have been posted than are retained, and compares it
+with the estimate reported by history_stats.
+
+Usage: python -m bench.bench_sticky
+"""
+import tracemalloc
+
+from pynm import NotificationManager
+
+def retained_memory(depth,n_keys=1000,posts=10):
+    """Returns the memory (in bytes) retained per key, traced and estimated"""
+    nm = NotificationManager()
+    for i in range(n_keys):
+        nm.set_history(f"<<Bench{i}>>",depth)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for n in range(posts * depth):
+            for i in range(n_keys):
+                nm.notify(f"<<Bench{i}>>",n,sticky=True,tenant=i)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    estimated = sum(s["bytes"] for s in nm.history_stats().values())
+    return (after - before) / n_keys, estimated / n_keys
+
+def main():
+    print(f"{'depth':>6} {'traced B/key':>13} {'estimated B/key':>16}")
+    for depth in (1,4,16,64):
+        traced,estimated = retained_memory(depth)
+        print(f"{depth:>6} {traced:>13.0f} {estimated:>16.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Post throughput of NotificationManager.notify while other threads register
+and forget callbacks
+
+Measures the number of posts per second achieved by one or more posting
+threads, first with no concurrent writers and then with a writer thread
+continually registering and forgetting callbacks for the same key.
+
+Usage: python -m bench.bench_threads
+"""
+import threading
+import time
+
+from pynm import NotificationManager
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def throughput(n_posters,with_writer,duration=1.0):
+    nm = NotificationManager()
+    for i in range(16):
+        nm.register("<<Bench>>",null_cb,priority=i%4)
+
+    stop = threading.Event()
+    counts = [0] * n_posters
+
+    def poster(i):
+        n = 0
+        while not stop.is_set():
+            nm.notify("<<Bench>>")
+            n += 1
+        counts[i] = n
+
+    def writer():
+        while not stop.is_set():
+            cb_id = nm.register("<<Bench>>",null_cb,priority=2)
+            nm.forget(cb_id=cb_id)
+
+    threads = [
+        threading.Thread(target=poster,args=(i,)) for i in range(n_posters)
+    ]
+    if with_writer:
+        threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration
+
+def main():
+    print(f"{'posters':>8} {'writer':>8} {'posts/sec':>12}")
+    for n_posters in (1,4):
+        for with_writer in (False,True):
+            rate = throughput(n_posters,with_writer)
+            print(f"{n_posters:>8} {str(with_writer):>8} {rate:>12.0f}")
+
+if __name__ == "__main__":
+    main()
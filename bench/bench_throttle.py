@@ -0,0 +1,33 @@
+"""Cost of posting to a throttled listener
+
+Measures the time taken to post a single notification to a key with one
+expensive listener (e.g. a metrics flusher) registered with no limit, and
+with max_rate such that nearly every post is throttled, along with the
+cost of a post to a cheap listener for reference.
+
+Usage: python -m bench.bench_throttle
+"""
+from pynm import NotificationManager
+
+from bench.bench_notify import post_latency
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def expensive_cb(key,*args,**kwargs):
+    sum(range(2000))
+
+def main():
+    print(f"{'listener':>22} {'usec/post':>10}")
+    for name,callback,options in (
+        ("cheap",null_cb,{}),
+        ("expensive",expensive_cb,{}),
+        ("expensive, throttled",expensive_cb,{"max_rate":10}),
+        ("expensive, trailing",expensive_cb,{"max_rate":10,"trailing":True}),
+    ):
+        nm = NotificationManager()
+        nm.register("<<Bench>>",callback,**options)
+        print(f"{name:>22} {post_latency(nm):>10.2f}")
+
+if __name__ == "__main__":
+    main()
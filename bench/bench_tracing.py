@@ -0,0 +1,28 @@
+"""Overhead of NotificationManager dispatch tracing
+
+Measures the time taken to post a single notification with tracing never
+enabled, enabled, and enabled then disabled again, as a function of the
+number of listeners registered for the notification key.  The overhead
+per callback is the difference divided by the number of listeners.
+
+Usage: python -m bench.bench_tracing
+"""
+from bench.bench_notify import build_manager
+from bench.bench_notify import post_latency
+
+def main():
+    print(f"{'listeners':>10} {'never':>10} {'enabled':>10} {'disabled':>10} "
+          + f"{'per callback':>13}")
+    for n_listeners in (1,8,32,128):
+        nm = build_manager(1,n_listeners)
+        never = post_latency(nm)
+        nm.enable_tracing()
+        enabled = post_latency(nm)
+        nm.disable_tracing()
+        disabled = post_latency(nm)
+        per_callback = (enabled - never) / n_listeners
+        print(f"{n_listeners:>10} {never:>10.2f} {enabled:>10.2f} "
+              + f"{disabled:>10.2f} {per_callback:>13.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Benchmark suite with results compared against a stored baseline
+
+Runs the register, notify, forget and memory benchmarks, writes the results
+as JSON and compares them with a baseline recorded by an earlier run.  Every
+result is a cost (lower is better); a result more than the threshold above
+its baseline is reported as a regression.
+
+Usage: python -m bench [--quick] [--output FILE] [--baseline FILE]
+                       [--threshold FRACTION] [--save-baseline]
+
+Exits with status 1 if any result regressed.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+from pynm import NotificationManager
+
+from bench import bench_forget
+from bench import bench_notify
+from bench.bench_callback import SHAPES
+
+BASELINE = os.path.join(os.path.dirname(__file__),"baseline.json")
+OUTPUT = "bench_results.json"
+THRESHOLD = 0.25
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def register_cost(n_registrations):
+    """Returns the mean time (in microseconds) to register a callback"""
+    nm = NotificationManager()
+    start = time.perf_counter()
+    for i in range(n_registrations):
+        nm.register(f"<<Bench{i%1000}>>",null_cb,priority=i%4)
+    return 1e6 * (time.perf_counter() - start) / n_registrations
+
+def notify_cost(nm,args=(),kwargs=None,number=10000,repeat=5):
+    """Returns the best observed latency (in microseconds) of a single post"""
+    if kwargs is None:
+        kwargs = dict()
+    timer = timeit.Timer(lambda: nm.notify("<<Bench>>",*args,**kwargs))
+    best = min(timer.repeat(repeat=repeat,number=number))
+    return 1e6 * best / number
+
+def memory_cost(n_registrations):
+    """Returns the memory (in bytes) allocated per registered callback"""
+    nm = NotificationManager()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(n_registrations):
+            nm.register(f"<<Bench{i%1000}>>",null_cb,priority=i%4)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / n_registrations
+
+def run(quick=False):
+    """Runs every benchmark
+    Returns:
+        results (dict): {name: {"value": cost, "unit": unit}}
+    """
+    number = 1000 if quick else 10000
+    sizes = (1000,10000) if quick else (1000,10000,100000)
+    results = dict()
+
+    def record(name,value,unit):
+        results[name] = {"value": value, "unit": unit}
+        print(f"{name:<28} {value:>12.3f} {unit}",file=sys.stderr)
+
+    record("register",register_cost(number),"usec")
+
+    for n_listeners in (1,8,32,128):
+        nm = bench_notify.build_manager(1,n_listeners)
+        cost = notify_cost(nm,number=number)
+        record(f"notify.listeners.{n_listeners}",cost,"usec")
+
+    for n_priorities in (1,4,16):
+        nm = bench_notify.build_manager(n_priorities,32)
+        cost = notify_cost(nm,number=number)
+        record(f"notify.tiers.{n_priorities}",cost,"usec")
+
+    nm = bench_notify.build_manager(1,8)
+    for shape,(args,kwargs) in SHAPES.items():
+        cost = notify_cost(nm,args,kwargs,number=number)
+        record(f"notify.args.{shape}",cost,"usec")
+
+    for n_registrations in sizes:
+        nm = bench_forget.build_manager(n_registrations)
+        cost = bench_forget.forget_latency(
+            nm,lambda nm,cb_id: nm.forget(cb_id=cb_id),number=number//10
+        )
+        record(f"forget.cb_id.{n_registrations}",cost,"usec")
+        cost = bench_forget.forget_latency(
+            nm,lambda nm,cb_id: nm.forget(callback=bench_forget.target_cb),
+            number=number//10,
+        )
+        record(f"forget.callback.{n_registrations}",cost,"usec")
+
+    record("memory.registration",memory_cost(number),"bytes")
+    return results
+
+def compare(results,baseline,threshold=THRESHOLD):
+    """Compares results with a baseline
+    Returns:
+        regressions (list): (name, baseline, result) of each result more
+            than threshold (a fraction) above its baseline
+    """
+    regressions = list()
+    for name,result in results.items():
+        base = baseline.get(name)
+        if base is None or base["value"] <= 0:
+            continue
+        if result["value"] > (1 + threshold) * base["value"]:
+            regressions.append((name,base["value"],result["value"]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m bench",
+        description="Runs the pynm benchmark suite",
+    )
+    parser.add_argument("--quick",action="store_true",
+                        help="fewer iterations and smaller registries")
+    parser.add_argument("--output",default=OUTPUT,
+                        help=f"results file (default: {OUTPUT})")
+    parser.add_argument(
+        "--baseline",default=BASELINE,
+        help="baseline results file (default: bench/baseline.json)",
+    )
+    parser.add_argument(
+        "--threshold",type=float,default=THRESHOLD,
+        help=f"allowed fractional increase (default: {THRESHOLD})",
+    )
+    parser.add_argument("--save-baseline",action="store_true",
+                        help="store the results as the new baseline")
+    options = parser.parse_args(argv)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": options.quick,
+        "results": run(options.quick),
+    }
+    with open(options.output,"w") as file:
+        json.dump(report,file,indent=2)
+
+    if options.save_baseline:
+        with open(options.baseline,"w") as file:
+            json.dump(report,file,indent=2)
+        print(f"baseline saved to {options.baseline}")
+        return 0
+
+    try:
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        print(f"no baseline at {options.baseline} (use --save-baseline)")
+        return 0
+
+    regressions = compare(report["results"],baseline["results"],options.threshold)
+    for name,base,result in regressions:
+        print(f"REGRESSION {name}: {base:.3f} -> {result:.3f} "
+              + f"(+{100*(result/base-1):.0f}%)")
+    if not regressions:
+        print(f"no regressions beyond {100*options.threshold:.0f}% of baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,24 @@
 from .__version__ import __version__ as version
 
 from .manager import NotificationManager
+from .manager import Notification
+from .sharded import ShardedNotificationManager
 from .callback import Callback
+from .callback import WeakCallback
 
 from .exceptions import CallbackFailed
 from .exceptions import CallbackFuncError
 from .exceptions import NotificationKeyError
 from .exceptions import RegistrationError
+from .exceptions import QueueOverflow
+from .exceptions import TooManyFailures
 
+from .errors import ErrorPolicy
+from .errors import LogErrors
+from .errors import RateLimitedLog
+from .errors import CollectErrors
+from .errors import RaiseAfter
+from .errors import CircuitBreaker
+
+from .bridge import Bridge
+from .tracing import Tracer
@@ -0,0 +1,287 @@
+from .exceptions import RegistrationError
+
+from collections import deque
+
+import logging
+import os
+import pickle
+import socket
+import struct
+import threading
+
+# Priority of the callbacks forwarding notifications to the bridge's peers,
+# so that they are forwarded before any local callback is invoked
+FORWARD_PRIORITY = float("inf")
+
+# Maximum number of queued messages written to the peers at once
+BATCH_SIZE = 256
+
+# Each message is framed by its length (4 bytes, big endian)
+_HEADER = struct.Struct("!I")
+
+class Bridge:
+    """Forwards notifications between NotificationManagers in different
+    processes on the same host over Unix domain sockets
+
+    One bridge listens on a socket path and the others connect to it.  The
+    bridge registers a callback for each of the forwarded keys (or wildcard
+    key patterns) which sends the notification to every connected peer.  A
+    notification received from a peer is posted to the local manager (on
+    the bridge's receiving thread) with `notify`, and so is delivered to
+    the local callbacks in order of priority.  It is also relayed to the
+    bridge's other peers, so that a listening bridge serves as the hub
+    connecting all of them.  Notifications received from a peer are never
+    forwarded back to it.
+
+    Notifications are pickled when posted (so that a failure to pickle the
+    arguments is reported by the manager like any other callback failure)
+    and written to the peers in batches by a sender thread.
+
+    Only connect bridges between trusted processes: received notifications
+    are unpickled.
+    """
+    def __init__(self,manager,keys,name=None):
+        """Bridge constructor
+        Args:
+            manager (NotificationManager): local notification manager
+            keys (iterable): notification keys or patterns to forward
+            name (str): prefix of the bridge's thread names (optional)
+
+        Raises:
+            RegistrationError if the manager has an executor
+        """
+        if manager.executor is not None:
+            raise RegistrationError("cannot bridge a manager with an executor")
+
+        self._manager = manager
+        self._name = name or "pynm-bridge"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._outbox = deque()
+        self._sending = False
+        self._closed = False
+        self._peers = list()
+        self._listener = None
+        self._path = None
+        self._threads = list()
+
+        self._sent = 0
+        self._received = 0
+        self._batches = 0
+
+        self._cb_ids = [
+            manager.register(key,self._forward,priority=FORWARD_PRIORITY)
+            for key in keys
+        ]
+        self._start(self._send,"sender")
+
+    @property
+    def peers(self):
+        """Returns the number of connected peers"""
+        return len(self._peers)
+
+    @property
+    def sent(self):
+        """Returns the number of notifications written to peers"""
+        return self._sent
+
+    @property
+    def received(self):
+        """Returns the number of notifications received from peers"""
+        return self._received
+
+    @property
+    def batches(self):
+        """Returns the number of batches in which notifications were written"""
+        return self._batches
+
+    def listen(self,path):
+        """Accepts connections from other bridges on a Unix domain socket
+        Args:
+            path (str): socket path (replaced if it already exists)
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        listener = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen()
+        listener.settimeout(0.1)
+        self._listener = listener
+        self._path = path
+        self._start(self._accept,"listener")
+
+    def connect(self,path):
+        """Connects to a bridge listening on a Unix domain socket
+        Args:
+            path (str): socket path
+        """
+        peer = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+        peer.connect(path)
+        self._add_peer(peer)
+
+    def flush(self,timeout=None):
+        """Waits until every forwarded notification has been written
+        Returns:
+            flushed (bool): False if the timeout expired first
+        """
+        with self._lock:
+            return self._idle.wait_for(
+                lambda: not self._outbox and not self._sending,timeout
+            )
+
+    def close(self,timeout=None):
+        """Stops forwarding notifications and disconnects from the peers
+
+        Notifications already forwarded are written before disconnecting.
+        """
+        for cb_id in self._cb_ids:
+            self._manager.forget(cb_id=cb_id)
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            self._ready.notify_all()
+            peers = list(self._peers)
+            self._peers.clear()
+        for peer in peers:
+            try:
+                peer.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            peer.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        if self._listener is not None:
+            self._listener.close()
+            try:
+                os.unlink(self._path)
+            except FileNotFoundError:
+                pass
+
+    def _start(self,target,role,*args):
+        """Internal method: starts one of the bridge's threads"""
+        thread = threading.Thread(
+            target=target,args=args,name=f"{self._name}-{role}",daemon=True
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def _add_peer(self,peer):
+        """Internal method to support `listen` and `connect`"""
+        with self._lock:
+            self._peers.append(peer)
+        self._start(self._receive,"receiver",peer)
+
+    def _drop_peer(self,peer):
+        """Internal method: forgets a disconnected peer"""
+        with self._lock:
+            try:
+                self._peers.remove(peer)
+            except ValueError:
+                return
+        peer.close()
+
+    def _forward(self,key,*args,**kwargs):
+        """Internal method: callback forwarding a local notification"""
+        if getattr(self._local,"key",None) is key:
+            # received from a peer: relayed by the receiving thread instead
+            return
+        message = pickle.dumps((key,args,kwargs),pickle.HIGHEST_PROTOCOL)
+        self._enqueue(_HEADER.pack(len(message)) + message,None)
+
+    def _enqueue(self,frame,source):
+        """Internal method: queues a framed message for the sender thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._outbox.append((frame,source))
+            self._ready.notify()
+
+    def _send(self):
+        """Internal method: body of the sender thread"""
+        while True:
+            with self._lock:
+                while not self._outbox:
+                    if self._closed:
+                        return
+                    self._ready.wait()
+                n = min(len(self._outbox),BATCH_SIZE)
+                batch = [self._outbox.popleft() for _ in range(n)]
+                peers = list(self._peers)
+                self._sending = True
+
+            for peer in peers:
+                data = b"".join(f for f,source in batch if source is not peer)
+                if not data:
+                    continue
+                try:
+                    peer.sendall(data)
+                except OSError:
+                    self._drop_peer(peer)
+
+            with self._lock:
+                self._sent += len(batch)
+                self._batches += 1
+                self._sending = False
+                if not self._outbox:
+                    self._idle.notify_all()
+
+    def _accept(self):
+        """Internal method: body of the listener thread"""
+        while not self._closed:
+            try:
+                peer,_ = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            peer.settimeout(None)
+            self._add_peer(peer)
+
+    def _receive(self,peer):
+        """Internal method: body of the thread receiving from a peer"""
+        buffer = bytearray()
+        while True:
+            try:
+                data = peer.recv(1 << 16)
+            except OSError:
+                data = b""
+            if not data:
+                self._drop_peer(peer)
+                return
+            buffer += data
+
+            offset = 0
+            while len(buffer) - offset >= _HEADER.size:
+                (size,) = _HEADER.unpack_from(buffer,offset)
+                end = offset + _HEADER.size + size
+                if end > len(buffer):
+                    break
+                frame = bytes(buffer[offset:end])
+                offset = end
+                self._deliver(peer,frame)
+            del buffer[:offset]
+
+    def _deliver(self,peer,frame):
+        """Internal method: relays a received message to the other peers and
+        posts it to the local manager"""
+        with self._lock:
+            relay = len(self._peers) > 1
+            self._received += 1
+        if relay:
+            self._enqueue(frame,peer)
+        try:
+            key,args,kwargs = pickle.loads(frame[_HEADER.size:])
+        except Exception as e:
+            logging.warning(
+                "Failed to decode notification received by bridge\n"
+                + "  reason: %s",e,
+            )
+            return
+        self._local.key = key
+        try:
+            self._manager.notify(key,*args,**kwargs)
+        finally:
+            self._local.key = None
@@ -1,8 +1,87 @@
 from .exceptions import CallbackFuncError
 from .exceptions import CallbackFailed
 
+import importlib
+import inspect
+import weakref
+
+def _invoke_plain(cb,args,key,kwargs):
+    """Invoker for callbacks without bound arguments"""
+    if key is None:
+        return cb.func(*args,**kwargs)
+    return cb.func(key,*args,**kwargs)
+
+def _invoke_args(cb,args,key,kwargs):
+    """Invoker for callbacks with bound positional arguments only"""
+    if key is None:
+        return cb.func(*cb.args,*args,**kwargs)
+    return cb.func(key,*cb.args,*args,**kwargs)
+
+def _invoke_kwargs(cb,args,key,kwargs):
+    """Invoker for callbacks with bound keyword arguments only"""
+    cb_kwargs = {**cb.kwargs,**kwargs} if kwargs else cb.kwargs
+    if key is None:
+        return cb.func(*args,**cb_kwargs)
+    return cb.func(key,*args,**cb_kwargs)
+
+def _invoke_both(cb,args,key,kwargs):
+    """Invoker for callbacks with bound positional and keyword arguments"""
+    cb_kwargs = {**cb.kwargs,**kwargs} if kwargs else cb.kwargs
+    if key is None:
+        return cb.func(*cb.args,*args,**cb_kwargs)
+    return cb.func(key,*cb.args,*args,**cb_kwargs)
+
+
+def _invoker(args,kwargs):
+    """Returns the invoker for a callback with the specified bound arguments"""
+    if args and kwargs:
+        return _invoke_both
+    if args:
+        return _invoke_args
+    if kwargs:
+        return _invoke_kwargs
+    return _invoke_plain
+
+def resolve(target):
+    """Imports the function specified by an import path
+    Args:
+        target (str): "module:qualname", e.g. "pkg.handlers:Orders.created"
+
+    Raises:
+        ImportError or AttributeError if the function cannot be found
+        CallbackFuncError if it is not callable
+    """
+    module,_,qualname = target.partition(":")
+    func = importlib.import_module(module)
+    for name in qualname.split("."):
+        func = getattr(func,name)
+    if not callable(func):
+        raise CallbackFuncError(func)
+    return func
+
+def import_path(func):
+    """Returns the import path ("module:qualname") of a function
+
+    Raises:
+        ValueError if the function cannot be found again from its import
+        path (e.g. lambdas, nested functions and most bound methods)
+    """
+    if isinstance(func,LazyCallback):
+        return func.target
+    try:
+        target = f"{func.__module__}:{func.__qualname__}"
+        found = resolve(target)
+    except Exception:
+        raise ValueError(f"{func} cannot be imported by name")
+    if found is not func and found != func:
+        raise ValueError(f"{func} cannot be imported by name")
+    return target
+
+
 class Callback:
     """Simple class for for defining and invoking a callback function/method"""
+    __slots__ = ("func","args","kwargs","_invoke")
+
     def __init__(self,func,*args,**kwargs):
         """Callback constructor
         Args:
@@ -17,12 +96,17 @@ class Callback:
         The keyword arguments specified here will be overridden by any
         keyword argument of the same name that are specified when the callback
         is invoked.
+
+        The manner in which the bound arguments are combined with those
+        specified when the callback is invoked is chosen here, once, so
+        that callbacks without bound arguments pay nothing for them.
         """
         if not callable(func):
             raise CallbackFuncError(func)
         self.func = func
         self.args = args
         self.kwargs = kwargs
+        self._invoke = _invoker(args,kwargs)
 
     def __call__(self,*args,key=None,**kwargs):
         """Invokes the callback function
@@ -41,17 +125,135 @@ class Callback:
         The keyword arguments specified here will be overridden by any
         keyword argument of the same name that are specified when the callback
         is invoked.
+
+        Returns the value returned by the callback function.
         """
         try:
-            cb_args = list()
-            if key is not None:
-                cb_args.append(key)
-            cb_args.extend(self.args)
-            cb_args.extend(args)
-            cb_kwargs = self.kwargs.copy()
-            cb_kwargs.update(kwargs)
-            self.func(*cb_args,**cb_kwargs)
+            return self._invoke(self,args,key,kwargs)
         except Exception as e:
             raise CallbackFailed(self,e)
 
 
+
+class WeakCallback(Callback):
+    """Callback which holds only a weak reference to its function/method
+
+    Bound methods are referenced with a weakref.WeakMethod, so that neither
+    the method nor the instance to which it is bound is kept alive by the
+    callback.  Other callables are referenced with a weakref.ref.
+
+    Once the function has been garbage collected, invoking the callback
+    does nothing.
+    """
+    __slots__ = ("_ref",)
+
+    def __init__(self,func,*args,on_collect=None,**kwargs):
+        """WeakCallback constructor
+        Args:
+            func (callable): The function (or method) to be invoked
+            args (list): Positional arguments passed to the callback function
+            on_collect (callable): invoked (with no arguments) when the
+                function is garbage collected (optional)
+            kwargs (dict): Keyword arguments passed to the callback function
+
+        Raises:
+            CallbackFuncError if func is not callable
+            TypeError if func cannot be weakly referenced
+        """
+        if not callable(func):
+            raise CallbackFuncError(func)
+        if on_collect is None:
+            self._ref = _weak_ref(func)
+        else:
+            self._ref = _weak_ref(func,lambda ref: on_collect())
+        super().__init__(func,*args,**kwargs)
+
+    @property
+    def func(self):
+        """The function (or method) to be invoked, None if collected"""
+        return self._ref()
+
+    @func.setter
+    def func(self,func):
+        if func != self._ref():
+            raise AttributeError("The function of a WeakCallback is immutable")
+
+    @property
+    def alive(self):
+        """True until the function has been garbage collected"""
+        return self._ref() is not None
+
+    def __call__(self,*args,key=None,**kwargs):
+        if self._ref() is None:
+            return None
+        return super().__call__(*args,key=key,**kwargs)
+
+class LazyCallback(Callback):
+    """Callback whose function is imported when it is first invoked
+
+    The function is specified by its import path ("module:qualname").  It is
+    imported (along with its module) on first use, and cached.  If it cannot
+    be imported, invoking the callback fails like any other callback, with
+    CallbackFailed.
+    """
+    __slots__ = ("target","_func")
+
+    def __init__(self,target,*args,**kwargs):
+        """LazyCallback constructor
+        Args:
+            target (str): import path of the function, "module:qualname"
+            args (list): Positional arguments passed to the callback function
+            kwargs (dict): Keyword arguments passed to the callback function
+
+        Raises:
+            CallbackFuncError if target is not an import path
+        """
+        if not isinstance(target,str):
+            raise CallbackFuncError(target)
+        module,sep,qualname = target.partition(":")
+        if not (module and sep and qualname):
+            raise CallbackFuncError(target)
+        self.target = target
+        self._func = None
+        self.args = args
+        self.kwargs = kwargs
+        self._invoke = _invoker(args,kwargs)
+
+    @property
+    def func(self):
+        """The function to be invoked (imported on first access)"""
+        func = self._func
+        if func is None:
+            func = self._func = resolve(self.target)
+        return func
+
+    @property
+    def resolved(self):
+        """True once the function has been imported"""
+        return self._func is not None
+
+    def __reduce__(self):
+        # pickled by import path (e.g. when offloaded to a process), without
+        # importing the function
+        return (_restore_lazy,(self.target,self.args,self.kwargs))
+
+def _restore_lazy(target,args,kwargs):
+    """Internal function: unpickles a LazyCallback"""
+    return LazyCallback(target,*args,**kwargs)
+
+def callable_id(func):
+    """Returns a stable identity for a function or (bound) method
+
+    Looking up a bound method creates a new method object each time, so
+    that its id identifies nothing once it is freed.  Bound methods are
+    identified instead by the ids of their instance and function.
+    """
+    if inspect.ismethod(func):
+        return (id(func.__self__),id(func.__func__))
+    return id(func)
+
+def _weak_ref(func,callback=None):
+    """Returns a weak reference to a function or (bound) method"""
+    if inspect.ismethod(func):
+        return weakref.WeakMethod(func,callback)
+    return weakref.ref(func,callback)
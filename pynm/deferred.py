@@ -0,0 +1,148 @@
+import threading
+
+def last_wins(args,kwargs,new_args,new_kwargs):
+    """Coalescing policy: the arguments of the latest post are delivered"""
+    return new_args,new_kwargs
+
+def first_wins(args,kwargs,new_args,new_kwargs):
+    """Coalescing policy: the arguments of the earliest post are delivered"""
+    return args,kwargs
+
+def merge_kwargs(args,kwargs,new_args,new_kwargs):
+    """Coalescing policy: the positional arguments of the latest post are
+    delivered along with the keyword arguments of all the posts (the latest
+    taking precedence)"""
+    return new_args,{**kwargs,**new_kwargs}
+
+POLICIES = {
+    "last": last_wins,
+    "first": first_wins,
+    "merge": merge_kwargs,
+}
+
+def identity(key,args,kwargs,by):
+    """Returns the identity by which pending posts are coalesced
+
+    Posts are coalesced by key, or (if by is "args") by key and arguments.
+    Posts with unhashable arguments are never coalesced by arguments.
+    """
+    if by == "key":
+        return (key,)
+    if by != "args":
+        raise ValueError(f"posts are coalesced by 'key' or 'args', not {by}")
+    try:
+        ident = (key,args,frozenset(kwargs.items()))
+        hash(ident)
+    except TypeError:
+        ident = (key,object())
+    return ident
+
+
+class _Pending:
+    __slots__ = ("key","args","kwargs","posts","timer")
+
+    def __init__(self,key,args,kwargs):
+        self.key = key
+        self.args = args
+        self.kwargs = kwargs
+        self.posts = 1
+        self.timer = None
+
+
+class DeferredPosts:
+    """Notifications posted by NotificationManager.notify_deferred which have
+    not yet been delivered
+
+    Each pending post collapses all of the posts with the same identity (see
+    `identity`) made before it is delivered, using a coalescing policy to
+    choose the arguments delivered.  A policy is either the name of one of
+    the POLICIES or any function with the same signature.
+
+    A pending post with a window is debounced: it is delivered once no post
+    with its identity has been made for window seconds.
+    """
+    def __init__(self,notify):
+        """DeferredPosts constructor
+        Args:
+            notify (callable): invoked as notify(key,*args,**kwargs) to
+                deliver each pending post
+        """
+        self._notify = notify
+        self._lock = threading.Lock()
+        self._pending = dict()
+        self._coalesced = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def coalesced(self):
+        """Returns the number of posts which were collapsed into others"""
+        return self._coalesced
+
+    def post(self,key,args,kwargs,coalesce="last",by="key",window=None):
+        """Adds a post, or coalesces it into a pending post with the same identity
+        Args:
+            key (str): notification key
+            args (tuple): positional arguments
+            kwargs (dict): keyword arguments
+            coalesce (str or callable): coalescing policy
+            by (str): "key" or "args"
+            window (float): seconds without a further post after which the
+                pending post is delivered (None to wait for `flush`)
+        """
+        policy = POLICIES.get(coalesce,coalesce)
+        if not callable(policy):
+            raise ValueError(f"unknown coalescing policy: {coalesce}")
+        ident = identity(key,args,kwargs,by)
+
+        with self._lock:
+            entry = self._pending.get(ident)
+            if entry is not None:
+                entry.args,entry.kwargs = policy(
+                    entry.args,entry.kwargs,args,kwargs
+                )
+                entry.posts += 1
+                self._coalesced += 1
+            else:
+                entry = self._pending[ident] = _Pending(key,args,kwargs)
+            if window is not None:
+                # (re)starts the window
+                if entry.timer is not None:
+                    entry.timer.cancel()
+                entry.timer = threading.Timer(window,self._expire,(ident,entry))
+                entry.timer.daemon = True
+                entry.timer.start()
+
+    def flush(self,key=None):
+        """Delivers the pending posts (for the specified key, if not None)
+        Returns:
+            count (int): number of pending posts delivered
+        """
+        with self._lock:
+            if key is None:
+                entries = list(self._pending.values())
+                self._pending.clear()
+            else:
+                idents = [i for i,e in self._pending.items() if e.key == key]
+                entries = [self._pending.pop(i) for i in idents]
+
+        for entry in entries:
+            if entry.timer is not None:
+                entry.timer.cancel()
+            self._notify(entry.key,*entry.args,**entry.kwargs)
+        return len(entries)
+
+    def _expire(self,ident,entry):
+        """Internal method to support `post`
+
+        Delivers a pending post at the end of its window (on the timer's
+        thread) unless it has already been flushed or its window restarted.
+        """
+        with self._lock:
+            if self._pending.get(ident) is not entry:
+                return
+            if entry.timer is not threading.current_thread():
+                return
+            del self._pending[ident]
+        self._notify(entry.key,*entry.args,**entry.kwargs)
@@ -0,0 +1,210 @@
+from .exceptions import QueueOverflow
+
+from collections import deque
+
+import logging
+import threading
+import time
+
+OVERFLOW_POLICIES = ("block","drop_oldest","drop_newest","raise")
+
+class Dispatcher:
+    """Bounded queue of posted notifications drained by dispatcher threads
+
+    Posting a notification only enqueues it.  The dispatcher threads dequeue
+    the notifications and deliver them (in the order they were posted) by
+    calling notify.  With more than one thread, notifications may be
+    delivered concurrently and so may complete out of order.
+
+    When the queue is full, the overflow policy determines what happens
+    to a new post:
+        - "block": wait for room in the queue
+        - "drop_oldest": discard the oldest queued notification
+        - "drop_newest": discard the new notification
+        - "raise": raise QueueOverflow
+    """
+    def __init__(self,notify,maxsize=1024,threads=1,overflow="block",name=None):
+        """Dispatcher constructor
+        Args:
+            notify (callable): invoked as notify(key,*args,**kwargs) to
+                deliver each notification
+            maxsize (int): maximum number of queued notifications
+            threads (int): number of dispatcher threads
+            overflow (str): overflow policy (see above)
+            name (str): prefix of the dispatcher thread names (optional)
+
+        Raises:
+            ValueError if maxsize, threads or overflow is not valid
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive, not {maxsize}")
+        if threads < 1:
+            raise ValueError(f"threads must be positive, not {threads}")
+
+        self._notify = notify
+        self._maxsize = maxsize
+        self._overflow = overflow
+
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+        self._unfinished = 0
+        self._stopping = False
+
+        self._posted = 0
+        self._dispatched = 0
+        self._dropped = 0
+        self._max_lag = 0.0
+
+        name = name or "pynm-dispatcher"
+        self._threads = [
+            threading.Thread(target=self._run,name=f"{name}-{i}",daemon=True)
+            for i in range(threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def depth(self):
+        """Returns the number of notifications waiting in the queue"""
+        return len(self._items)
+
+    @property
+    def lag(self):
+        """Returns how long (in seconds) the oldest queued notification has
+        been waiting (0 if the queue is empty)"""
+        try:
+            posted = self._items[0][0]
+        except IndexError:
+            return 0.0
+        return time.monotonic() - posted
+
+    @property
+    def max_lag(self):
+        """Returns the longest time (in seconds) any notification waited in
+        the queue before being dispatched"""
+        return self._max_lag
+
+    @property
+    def posted(self):
+        """Returns the number of notifications accepted into the queue"""
+        return self._posted
+
+    @property
+    def dispatched(self):
+        """Returns the number of notifications taken from the queue and
+        delivered"""
+        return self._dispatched
+
+    @property
+    def dropped(self):
+        """Returns the number of notifications discarded due to overflow"""
+        return self._dropped
+
+    @property
+    def running(self):
+        return not self._stopping
+
+    def post(self,key,args,kwargs):
+        """Enqueues a notification
+        Returns:
+            accepted (bool): False if the notification was discarded
+
+        Raises:
+            QueueOverflow if the queue is full and the overflow policy is "raise"
+            RuntimeError if the dispatcher has been stopped
+        """
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError("cannot post to a stopped dispatcher")
+            while len(self._items) >= self._maxsize:
+                if self._overflow == "block":
+                    self._not_full.wait()
+                    if self._stopping:
+                        raise RuntimeError("cannot post to a stopped dispatcher")
+                elif self._overflow == "drop_oldest":
+                    self._items.popleft()
+                    self._dropped += 1
+                    self._finished()
+                elif self._overflow == "drop_newest":
+                    self._dropped += 1
+                    return False
+                else:
+                    raise QueueOverflow(key)
+
+            self._items.append((time.monotonic(),key,args,kwargs))
+            self._unfinished += 1
+            self._posted += 1
+            self._not_empty.notify()
+        return True
+
+    def drain(self,timeout=None):
+        """Waits until every queued notification has been delivered
+        Args:
+            timeout (float): maximum number of seconds to wait (optional)
+
+        Returns:
+            drained (bool): False if the timeout expired first
+        """
+        with self._lock:
+            return self._all_done.wait_for(lambda: not self._unfinished,timeout)
+
+    def stop(self,timeout=None):
+        """Drains the queue and then stops the dispatcher threads
+        Args:
+            timeout (float): maximum number of seconds to wait (optional)
+
+        Returns:
+            drained (bool): False if notifications remained undelivered
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        drained = self.drain(timeout)
+        with self._lock:
+            self._stopping = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        for thread in self._threads:
+            if thread is threading.current_thread():
+                continue
+            remaining = None
+            if deadline is not None:
+                remaining = max(0,deadline-time.monotonic())
+            thread.join(remaining)
+        return drained
+
+    def _finished(self):
+        """Internal method (lock held): one queued notification is complete"""
+        self._unfinished -= 1
+        if not self._unfinished:
+            self._all_done.notify_all()
+
+    def _run(self):
+        """Internal method: body of each dispatcher thread"""
+        while True:
+            with self._lock:
+                while not self._items:
+                    if self._stopping:
+                        return
+                    self._not_empty.wait()
+                posted,key,args,kwargs = self._items.popleft()
+                self._not_full.notify()
+                lag = time.monotonic() - posted
+                if lag > self._max_lag:
+                    self._max_lag = lag
+
+            try:
+                self._notify(key,*args,**kwargs)
+            except Exception as e:
+                logging.warning(
+                    "Exception raised while dispatching queued notification\n"
+                    + f"  key: {key}\n"
+                    + f"  reason: {e}"
+                )
+
+            with self._lock:
+                self._dispatched += 1
+                self._finished()
@@ -0,0 +1,251 @@
+from .exceptions import TooManyFailures
+
+from collections import deque
+from collections import namedtuple
+
+import logging
+import threading
+import time
+
+# The message is only formatted if the record is actually emitted
+FAILURE_MESSAGE = (
+    "Exception raised while invoking notification callback\n"
+    + "  key: %s\n"
+    + "  priority: %s\n"
+    + "  callback: %s\n"
+    + "  function: %s\n"
+    + "  reason: %s"
+)
+
+Failure = namedtuple("Failure",("key","priority","cb_id","error"))
+Failure.__doc__ = """Failure of a callback invoked for a notification,
+error being the resulting CallbackFailed"""
+
+def log_failure(key,priority,cb_id,error):
+    """Logs the failure of a callback"""
+    logging.warning(
+        FAILURE_MESSAGE,key,priority,cb_id,error.callback,error.reason
+    )
+
+
+class ErrorPolicy:
+    """Determines what a NotificationManager does when a callback fails
+
+    Subclasses implement `handle`, which is invoked on the thread on which
+    the callback failed (or on which the failure of an offloaded callback
+    was detected).  Any exception it raises propagates from there, e.g.
+    out of `notify`.
+    """
+    def handle(self,manager,key,priority,cb_id,error):
+        """Handles the failure of a callback
+        Args:
+            manager (NotificationManager): manager which invoked the callback
+            key (str): notification key that was posted
+            priority (float): priority of the callback
+            cb_id (int): registration id of the callback
+            error (CallbackFailed): the failure
+        """
+        raise NotImplementedError
+
+
+class LogErrors(ErrorPolicy):
+    """Error policy: every failure is logged (the default)"""
+    def handle(self,manager,key,priority,cb_id,error):
+        log_failure(key,priority,cb_id,error)
+
+
+class RateLimitedLog(ErrorPolicy):
+    """Error policy: failures are logged, but no more than limit times per
+    interval for each (key, cb_id)
+
+    The failures suppressed during an interval are logged as a single
+    summary record when the interval expires (on a timer thread), or when
+    `flush` is called.
+    """
+    def __init__(self,limit=1,interval=60.0):
+        """RateLimitedLog constructor
+        Args:
+            limit (int): failures logged per interval for each callback
+            interval (float): seconds
+        """
+        self._limit = limit
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._windows = dict()
+        self._counts = dict()
+
+    def handle(self,manager,key,priority,cb_id,error):
+        ident = (key,cb_id)
+        now = time.monotonic()
+        with self._lock:
+            self._counts[ident] = self._counts.get(ident,0) + 1
+            window = self._windows.get(ident)
+            if window is None or now - window[0] >= self._interval:
+                if window is not None:
+                    self._close(ident,window)
+                window = self._windows[ident] = [now,0,0,None]
+            if window[1] >= self._limit:
+                if window[3] is None:
+                    delay = max(0.0,window[0] + self._interval - now)
+                    window[3] = threading.Timer(
+                        delay,self._expire,(ident,window)
+                    )
+                    window[3].daemon = True
+                    window[3].start()
+                window[2] += 1
+                return
+            window[1] += 1
+        log_failure(key,priority,cb_id,error)
+
+    @property
+    def counts(self):
+        """Returns the total number of failures (logged or not) of each
+        (key, cb_id)"""
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self):
+        """Logs the summaries of the failures suppressed so far"""
+        with self._lock:
+            for ident,window in self._windows.items():
+                self._close(ident,window)
+
+    def _expire(self,ident,window):
+        """Internal method: logs the summary of an interval once it has
+        expired (unless already logged)"""
+        with self._lock:
+            window[3] = None
+            if self._windows.get(ident) is window:
+                self._close(ident,window)
+
+    def _close(self,ident,window):
+        """Internal method: logs the summary of the failures suppressed
+        during an interval and cancels its timer.  Must be called with the
+        lock held."""
+        timer,window[3] = window[3],None
+        if timer is not None:
+            timer.cancel()
+        if window[2]:
+            self._summarize(ident,window)
+            window[2] = 0
+
+    def _summarize(self,ident,window):
+        """Internal method to support `_close`"""
+        logging.warning(
+            "%s further failures of notification callback suppressed\n"
+            + "  key: %s\n"
+            + "  callback: %s\n"
+            + "  total failures: %s",
+            window[2],ident[0],ident[1],self._counts[ident],
+        )
+
+
+class CollectErrors(ErrorPolicy):
+    """Error policy: failures are collected (and not logged) for the
+    application to retrieve with `take`
+
+    At most limit failures are kept (the oldest being discarded), if
+    limit is not None.  The number discarded is reported by `dropped`.
+    """
+    def __init__(self,limit=None):
+        self._lock = threading.Lock()
+        self._failures = deque(maxlen=limit)
+        self._dropped = 0
+
+    def __len__(self):
+        return len(self._failures)
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    def handle(self,manager,key,priority,cb_id,error):
+        with self._lock:
+            if len(self._failures) == self._failures.maxlen:
+                self._dropped += 1
+            self._failures.append(Failure(key,priority,cb_id,error))
+
+    def take(self):
+        """Returns the list of Failures collected so far, and clears it"""
+        with self._lock:
+            failures = list(self._failures)
+            self._failures.clear()
+        return failures
+
+
+class RaiseAfter(ErrorPolicy):
+    """Error policy: raises TooManyFailures once n callback failures have
+    been handled
+
+    Failures are first passed to another policy (LogErrors by default).
+    The count is cumulative (across every key and callback) until `reset`.
+    """
+    def __init__(self,n=1,policy=None):
+        self._n = n
+        self._policy = LogErrors() if policy is None else policy
+        self._lock = threading.Lock()
+        self._count = 0
+
+    @property
+    def count(self):
+        return self._count
+
+    def reset(self):
+        """Restarts the count of failures"""
+        with self._lock:
+            self._count = 0
+
+    def handle(self,manager,key,priority,cb_id,error):
+        self._policy.handle(manager,key,priority,cb_id,error)
+        with self._lock:
+            self._count += 1
+            count = self._count
+        if count >= self._n:
+            raise TooManyFailures(count,error) from error
+
+
+class CircuitBreaker(ErrorPolicy):
+    """Error policy: a callback which fails threshold times (within window
+    seconds, if not None) is forgotten
+
+    Failures are first passed to another policy (LogErrors by default).
+    The ids of the callbacks forgotten are reported by `tripped`.
+    """
+    def __init__(self,threshold=5,window=None,policy=None):
+        self._threshold = threshold
+        self._window = window
+        self._policy = LogErrors() if policy is None else policy
+        self._lock = threading.Lock()
+        self._failures = dict()
+        self._tripped = list()
+
+    @property
+    def tripped(self):
+        """Returns the ids of the callbacks disabled so far"""
+        with self._lock:
+            return list(self._tripped)
+
+    def handle(self,manager,key,priority,cb_id,error):
+        self._policy.handle(manager,key,priority,cb_id,error)
+        now = time.monotonic()
+        with self._lock:
+            try:
+                times = self._failures[cb_id]
+            except KeyError:
+                times = self._failures[cb_id] = deque(maxlen=self._threshold)
+            times.append(now)
+            if len(times) < self._threshold:
+                return
+            if self._window is not None and now - times[0] > self._window:
+                return
+            del self._failures[cb_id]
+            self._tripped.append(cb_id)
+
+        manager.forget(cb_id=cb_id)
+        logging.warning(
+            "Notification callback disabled after %s failures\n"
+            + "  key: %s\n"
+            + "  callback: %s\n"
+            + "  function: %s",
+            self._threshold,key,cb_id,error.callback,
+        )
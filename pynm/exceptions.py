@@ -21,3 +21,15 @@ class CallbackFailed(Exception):
         self.callback = callback
         self.reason = reason
 
+class QueueOverflow(Exception):
+    def __init__(self,key):
+        self.key = key
+    def __repr__(self):
+        return f"Dispatch queue is full, cannot post: {self.key}"
+
+class TooManyFailures(Exception):
+    def __init__(self,count,error):
+        self.count = count
+        self.error = error
+    def __repr__(self):
+        return f"Too many callback failures ({self.count}): {self.error.reason}"
@@ -0,0 +1,70 @@
+from operator import itemgetter
+
+def where_index(where):
+    """Returns the (names, values) by which a `where` filter is indexed
+
+    The names of the filtered keyword arguments are sorted, so that every
+    filter on the same keyword arguments shares the same table of values.
+
+    Raises:
+        TypeError if any of the values is not hashable
+    """
+    names = tuple(sorted(where))
+    values = tuple(where[name] for name in names)
+    hash(values)
+    return names,values
+
+
+def where_matches(where,kwargs):
+    """Returns True if the keyword arguments satisfy an indexed `where`
+    filter, i.e. a (names, values) returned by where_index"""
+    names,values = where
+    try:
+        return tuple(kwargs[name] for name in names) == values
+    except KeyError:
+        return False
+
+
+class FilteredPlan(tuple):
+    """Dispatch plan of a notification key for which callbacks have been
+    registered with `where` filters
+
+    The tuple holds the (priority, cb_id, callback, options) entries of the
+    unfiltered callbacks.  The filtered entries are held in an index of the
+    form {names: {values: [entries]}}, where names are the filtered keyword
+    arguments and values the values they must be posted with.  Selecting
+    the entries to invoke for a notification takes one lookup per distinct
+    set of names, regardless of the number of filtered callbacks.
+    """
+    def __new__(cls,entries,index):
+        plan = super().__new__(cls,entries)
+        plan.index = index
+        return plan
+
+    def select(self,kwargs):
+        """Returns the plan (as a tuple, in order of decreasing priority)
+        of the unfiltered entries and the filtered entries whose filters
+        match the posted keyword arguments"""
+        matched = None
+        for names,table in self.index.items():
+            try:
+                values = tuple(kwargs[name] for name in names)
+                entries = table.get(values)
+            except (KeyError,TypeError):
+                # filtered argument missing or unhashable: nothing matches
+                continue
+            if entries is None:
+                continue
+            if matched is None:
+                matched = list(entries)
+            else:
+                matched.extend(entries)
+
+        if matched is None:
+            return tuple(self)
+        plan = list(self)
+        plan.extend(matched)
+        # sort is stable and both parts are already ordered, so this is
+        # a merge of a few sorted runs
+        plan.sort(key=itemgetter(0),reverse=True)
+        return tuple(plan)
@@ -1,15 +1,107 @@
 from .exceptions import NotificationKeyError
 from .exceptions import RegistrationError
 from .exceptions import CallbackFailed
+from .exceptions import CallbackFuncError
 from .callback import Callback
+from .callback import WeakCallback
+from .callback import LazyCallback
+from .callback import import_path
+from .callback import callable_id
+from . import offload as _offload
+from .deferred import DeferredPosts
+from .dispatcher import Dispatcher
+from .errors import LogErrors
+from .metrics import Metrics
+from .tracing import CAPACITY
+from .tracing import Tracer
+from .throttle import TokenBucket
+from .filters import FilteredPlan
+from .filters import where_index
+from .filters import where_matches
+from .patterns import PatternTrie
+from .patterns import is_pattern
+from .patterns import matches
 
-import logging
+from concurrent.futures import CancelledError
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures import wait
+from contextlib import contextmanager
+from functools import partial
+from itertools import count
+from itertools import groupby
+from operator import itemgetter
+
+from collections import deque
+from collections import namedtuple
+
+from time import perf_counter_ns
+
+import asyncio
+import importlib.metadata
+import inspect
+import pickle
+import sys
+import threading
+import weakref
+
+# Maximum number of memoized dispatch plans for keys that have no callbacks
+# registered under their own name (i.e. those reached only through patterns)
+PLAN_CACHE_LIMIT = 10000
+
+# Keyword arguments of register which may be given to register_many
+REGISTER_OPTIONS = frozenset((
+    "priority","batch","offload","weak","where","when","once","max_calls",
+    "replay","max_rate","burst","trailing",
+))
+
+# Identifies the files written by NotificationManager.dump
+DUMP_FORMAT = "pynm-registry-1"
 
 def id_generator():
-    x = 0
-    while True:
-        x += 1
-        yield x
+    # itertools.count may safely be advanced from multiple threads
+    return count(1)
+
+def as_batch(payloads):
+    """Returns payloads in a form that may be iterated more than once
+
+    Lists, tuples, NumPy arrays and other sized, indexable sequences are
+    returned unchanged.  Any other iterable is collected into a list.
+    """
+    if hasattr(payloads,"__len__") and hasattr(payloads,"__getitem__"):
+        return payloads
+    return list(payloads)
+
+Notification = namedtuple("Notification",("key","args","kwargs"))
+Notification.__doc__ = """Notification awaited with `expect` or `wait_for`"""
+
+class _Local(threading.local):
+    """State of a NotificationManager specific to each thread"""
+    # operations buffered until the end of the thread's batch (if any)
+    pending = None
+
+
+class _Options:
+    """Registration options which change how a callback is invoked
+
+    Registrations made with default options have no _Options instance,
+    allowing notify to invoke them without examining any options.
+    """
+    __slots__ = (
+        "batch","offload","where","when","max_calls","calls","throttle",
+    )
+
+    def __init__(self,batch=False,offload=None,where=None,when=None,
+                 max_calls=None,throttle=None):
+        self.batch = batch
+        self.offload = offload
+        self.where = where
+        self.when = when
+        self.max_calls = max_calls
+        # advanced once per invocation, which is atomic across threads
+        self.calls = count(1) if max_calls is not None else None
+        # TokenBucket of a callback registered with max_rate
+        self.throttle = throttle
 
 class NotificationManager:
     """Manages invocation of callback functions in response to a notification
@@ -42,13 +134,57 @@ class NotificationManager:
 
     There is a shared notificaition manager that can be created on demand.
     Alternatively, notification manager instances can be created as desired.
+
+    A notification manager may be given an executor (e.g. a ThreadPoolExecutor)
+    onto which the callbacks of each priority tier are fanned out.
+
+    Callbacks may also be registered for a wildcard key pattern (e.g. "orders.*"
+    or "orders.**") to receive the notifications of every matching key.
+
+    A notification manager may be shared between threads.  Registering and
+    forgetting callbacks is serialized by a writer lock.  Notifications are
+    posted without locking, from an immutable snapshot (the dispatch plan)
+    of the callbacks registered for the key.  Writers replace the snapshot
+    rather than modifying it, so a notification in progress is unaffected.
     """
     _shared = None
     _ids = id_generator()
 
-    def __init__(self,name=None):
+    def __init__(self,name=None,executor=None,error_policy=None):
+        """NotificationManager constructor
+        Args:
+            name (str): identifies the manager, serves no functional purpose
+            executor (Executor): runs callbacks of equal priority concurrently
+                (optional)
+            error_policy (ErrorPolicy): handles callback failures (optional,
+                LogErrors by default)
+        """
         self._name = name
+        self._executor = executor
+        self._error_policy = LogErrors() if error_policy is None else error_policy
+        self._process_pool = None
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._local = _Local()
+        self._dead = deque()
+        self._collected = 0
         self._queues = dict()
+        self._plans = dict()
+        self._options = dict()
+        self._patterns = PatternTrie()
+        self._index = dict()
+        self._func_ids = dict()
+        self._deferred = DeferredPosts(self.notify)
+        self._dispatcher = None
+        self._dispatcher_lock = threading.Lock()
+        self._metrics = None
+        self._tracer = None
+        # times callbacks if metrics or tracing are enabled, None otherwise
+        self._clock = None
+        # sticky notifications retained for replay: {key: deque}
+        self._history = dict()
+        self._depths = dict()
+        self._posts = count()
 
     @classmethod
     @property
@@ -62,59 +198,383 @@ class NotificationManager:
     def name(self):
         return self._name
 
+    @property
+    def executor(self):
+        return self._executor
+
+    @property
+    def error_policy(self):
+        return self._error_policy
+
+    def set_error_policy(self,policy):
+        """Replaces the policy which handles callback failures
+        Args:
+            policy (ErrorPolicy): new policy (None for LogErrors)
+
+        Returns:
+            previous (ErrorPolicy): the policy replaced
+
+        The error policies provided are:
+            - LogErrors: log every failure (the default)
+            - RateLimitedLog: log a limited number of failures of each
+              callback per interval, and summarize the rest
+            - CollectErrors: keep the failures for the application to `take`
+            - RaiseAfter: raise TooManyFailures after a number of failures
+            - CircuitBreaker: forget a callback which fails repeatedly
+        """
+        previous = self._error_policy
+        self._error_policy = LogErrors() if policy is None else policy
+        return previous
+
+    @property
+    def dispatcher(self):
+        """Returns the Dispatcher delivering posted notifications (or None)
+
+        The dispatcher reports the depth of its queue, the lag of the
+        oldest queued notification and counts of posted, dispatched
+        and dropped notifications.
+        """
+        return self._dispatcher
+
+    @property
+    def pending(self):
+        """Returns the number of deferred notifications not yet delivered"""
+        return len(self._deferred)
+
+    @property
+    def metrics_enabled(self):
+        return self._metrics is not None
+
+    @property
+    def tracer(self):
+        """Returns the Tracer recording the dispatch trace (None if tracing
+        is not enabled)"""
+        return self._tracer
+
+    @property
+    def collected(self):
+        """Returns the number of weak callbacks forgotten automatically
+        because their function was garbage collected"""
+        return self._collected
+
     @property
     def keys(self):
-        """Returns a set of all the currently registered notification keys"""
-        return set(self._queues.keys())
+        """Returns a set of all the currently registered notification keys
+        (including wildcard key patterns)"""
+        with self._lock:
+            return set(self._queues.keys())
 
-    def register(self, key, callback, *args, priority=0, **kwargs):
+    def register(self, key, callback, *args, priority=0, batch=False,
+                 offload=None, weak=False, where=None, when=None, once=False,
+                 max_calls=None, replay=False, max_rate=None, burst=1,
+                 trailing=False, **kwargs):
         """Registers a new notification callback
         Args:
-            key (str): notification key
-            callback (Callback or callable): see below
+            key (str): notification key or wildcard key pattern
+            callback (Callback, callable or str): see below
             priority (float): used to determine order of callback invocation
+            batch (bool): callback receives posted payloads as a batch
+            offload (str): "process" to invoke the callback in a worker process
+            weak (bool): hold only a weak reference to the callback function
+            where (dict): keyword argument values the notification must be
+                posted with for the callback to be invoked (optional)
+            when (callable): predicate the notification must satisfy for
+                the callback to be invoked (optional)
+            once (bool): forget the callback once it has been invoked
+            max_calls (int): forget the callback once it has been invoked
+                this many times (optional)
+            replay (bool): invoke the callback immediately for each of the
+                retained sticky notifications of the key
+            max_rate (float): maximum rate (invocations per second) at which
+                the callback is invoked (optional)
+            burst (float): number of invocations allowed in a burst above
+                max_rate
+            trailing (bool): deliver the latest notification throttled by
+                max_rate once the rate allows, rather than skipping it
             args (list): positional arguments passed to callback (optional)
             kwargs (dict): keyword arguments passed to callback (optional)
 
-            The callback may be specified either as a Callback instance
-            or as any callable function or method (bound or unbound).
+            The callback may be specified either as a Callback instance,
+            as any callable function or method (bound or unbound), or as
+            the import path of a function ("module:qualname").
 
         Returns:
             registration_id (int): unique id for each registered callback
 
-        Raises: AssertionError if callback
+        Raises: RegistrationError if callback
             - is not callable
             - is an instance of Callable and args or kwargs are specified
+            - is to be offloaded to a process but cannot be pickled
+            - is to be weakly referenced but cannot be (or is offloaded)
+            - has a where filter with unhashable values, or a when predicate
+              which is not callable
+            - has a max_calls which is not a positive integer (or is not 1
+              when once is True)
+            - has a max_rate which is not a positive number, or a burst
+              less than 1
 
         Any positional arguments specified here will be passed to the callback
         function immediately after the notification key.  They will appear 
         before any positional arguments specifed when the notification is
         invoked.
 
+        A callback specified by import path is registered as a LazyCallback:
+        its module is not imported until the callback is first invoked.  If
+        it cannot be imported, the failure is reported like that of any
+        other callback (and the import is attempted again by the next
+        notification).
+
+        Within a `batch`, the callback is only registered when the batch
+        ends (its registration id is nonetheless returned immediately).
+
         Any keyword arguments specified here will be passed to the callback
         function, but may be overridden by any keyword arguments with the same 
         keyword specified when the notification is invoked.
+
+        Notification keys are split into segments at each period.  If any of
+        the segments is "*" or "**", the key is a wildcard pattern and the
+        callback is invoked for every notification key that matches it.
+        A "*" segment matches exactly one segment.  A "**" segment matches
+        zero or more segments.  The callback is passed the notification key
+        that was posted, not the pattern.  Callbacks registered for patterns
+        and for the notification key itself are invoked together in order
+        of decreasing priority.
+
+        If batch is True, the callback is invoked once per `notify_many` with
+        the entire batch of payloads (in place of the positional arguments
+        specified when the notification is posted) rather than once per
+        payload.  When posted with `notify`, it receives the positional
+        arguments as a list, i.e. a batch of one.
+
+        If offload is "process", the callback is invoked in a process pool
+        managed by the notification manager, with the key and arguments
+        pickled.  Large bytes and NumPy array arguments are passed through
+        shared memory.  The notification methods return the futures of
+        offloaded callbacks rather than waiting for them.
+
+        If weak is True, the callback holds only a weak reference to the
+        function (or to the instance of a bound method), so that registering
+        it does not keep it alive.  Once the function has been garbage
+        collected, the callback is forgotten automatically.
+
+        If where is specified, the callback is only invoked for notifications
+        posted with each of its keyword arguments equal to the specified
+        value, e.g. where={"tenant_id": 42}.  Only the keyword arguments
+        specified when the notification is posted are compared.  Filtered
+        callbacks are indexed by their values, so callbacks which do not
+        match a notification cost nothing to skip.
+
+        If when is specified, the callback is only invoked for notifications
+        for which when(key,*args,**kwargs) returns True, args and kwargs
+        being those specified when the notification is posted.  Unlike where
+        filters, predicates are evaluated for every notification.  If the
+        predicate raises an exception, it is reported as a callback failure.
+
+        If once is True, or max_calls is specified, the callback is forgotten
+        as it is invoked for the last time.  A notification in progress (on
+        this or any other thread) does not invoke it again.  Notifications
+        skipped due to where or when do not count as invocations.
+
+        If max_rate is specified, the callback is throttled by a token
+        bucket holding up to burst tokens, refilled at max_rate tokens per
+        second, one token being taken by each invocation.  A notification
+        posted when the bucket is empty is skipped (before the callback is
+        invoked) or, if trailing is True, deferred: the callback is invoked
+        for the latest deferred notification on a timer thread as soon as a
+        token is available.  Notifications skipped due to where or when do
+        not take a token, and throttled notifications do not count towards
+        max_calls.  The notifications delivered and throttled are counted
+        (see `throttle_stats`).
+
+        If replay is True, the callback is invoked (before this method
+        returns) for each of the sticky notifications retained for the key,
+        or for every key matching the pattern, in the order in which they
+        were posted (see `notify`).  Filters and call limits apply to the
+        replayed notifications as to any other.  A sticky notification
+        posted while the callback is being registered is delivered at least
+        once, and may be delivered both by the replay and by `notify`.
         """
         if isinstance(callback,Callback):
             if args:
                 raise RegistrationError("Cannot specify both Callback and args")
             if kwargs:
                 raise RegistrationError("Cannot specify both Callback and kwargs")
+        elif isinstance(callback,str):
+            try:
+                callback = LazyCallback(callback,*args,**kwargs)
+            except CallbackFuncError:
+                raise RegistrationError(
+                    "callback must be an import path (module:qualname), "
+                    f"not {callback}"
+                )
         else:
             if not callable(callback):
                 raise RegistrationError("callback must be callable")
             callback = Callback(callback,*args,**kwargs)
 
+        priority,opts = self._validate(
+            callback,priority,batch,offload,weak,where,when,once,max_calls,
+            max_rate,burst,trailing,
+        )
+
+        cb_id = next(self._ids)
+        if weak:
+            try:
+                callback = WeakCallback(
+                    callback.func,
+                    *callback.args,
+                    on_collect=self._collector(cb_id),
+                    **callback.kwargs,
+                )
+            except TypeError as e:
+                raise RegistrationError(
+                    f"callback cannot be weakly referenced: {e}"
+                )
+
+        if replay:
+            registration = (key,priority,cb_id,callback,opts)
+            self._stage([("register",registration),("replay",registration)])
+            return cb_id
+
+        pending = self._local.pending
+        if pending is not None:
+            pending.append(("register",(key,priority,cb_id,callback,opts)))
+            return cb_id
+
+        with self._lock:
+            if self._dead:
+                self._forget_dead()
+            self._insert(key,priority,cb_id,callback,opts)
+            self._invalidate(key)
+
+        return cb_id
+
+    def register_many(self,registrations):
+        """Registers several notification callbacks at once
+        Args:
+            registrations (iterable): (key, callback) or (key, callback,
+                options) tuples, options being a dict of any of the keyword
+                arguments of `register` (e.g. {"priority": 5})
+
+        Returns:
+            cb_ids (list): registration ids of the callbacks, in order
+
+        Raises:
+            RegistrationError if any of the registrations is not valid (in
+            which case none of them are registered)
+
+        Every registration is validated before any is registered.  They
+        are then registered under a single acquisition of the lock, so that
+        a notification posted concurrently invokes either all or none of
+        them, and the dispatch plan of each key is rebuilt only once.
+        Arguments to be passed to a callback are specified by registering
+        a Callback instance.
+        """
+        cb_ids = list()
+        with self.batch():
+            for registration in registrations:
+                key,callback,*options = registration
+                options = options[0] if options else {}
+                unknown = set(options).difference(REGISTER_OPTIONS)
+                if unknown:
+                    raise RegistrationError(
+                        f"unknown registration options: {sorted(unknown)}"
+                    )
+                cb_ids.append(self.register(key,callback,**options))
+        return cb_ids
+
+    def _validate(self,callback,priority,batch,offload,weak,where,when,once,
+                  max_calls,max_rate=None,burst=1,trailing=False):
+        """Internal method to support `register`
+
+        Validates the registration options of a callback.  Returns its
+        priority (as a float) and its _Options (None if all are defaults).
+        """
+        if weak and isinstance(callback,LazyCallback):
+            raise RegistrationError("lazy callbacks cannot be weakly referenced")
+
         try:
             priority = float(priority)
         except ValueError:
             raise RegistrationError(f"priority must be a float, not {priority}")
 
+        if offload is not None:
+            if weak:
+                raise RegistrationError("weak callbacks cannot be offloaded")
+            if offload not in _offload.OFFLOAD_MODES:
+                raise RegistrationError(f"unsupported offload mode: {offload}")
+            try:
+                _offload.check_picklable(callback)
+            except Exception as e:
+                raise RegistrationError(f"callback cannot be offloaded: {e}")
+
+        if where:
+            try:
+                where = where_index(where)
+            except TypeError as e:
+                raise RegistrationError(f"where values must be hashable: {e}")
+        else:
+            where = None
+        if when is not None and not callable(when):
+            raise RegistrationError("when must be callable")
+
+        if once:
+            if max_calls not in (None,1):
+                raise RegistrationError("Cannot specify both once and max_calls")
+            max_calls = 1
+        if max_calls is not None:
+            if not isinstance(max_calls,int) or max_calls < 1:
+                raise RegistrationError(
+                    f"max_calls must be a positive integer, not {max_calls}"
+                )
+
+        if max_rate is not None:
+            try:
+                max_rate = float(max_rate)
+                burst = float(burst)
+            except (TypeError,ValueError):
+                raise RegistrationError(
+                    f"max_rate and burst must be numbers, not {max_rate}, {burst}"
+                )
+            if not max_rate > 0:
+                raise RegistrationError(
+                    f"max_rate must be positive, not {max_rate}"
+                )
+            if not burst >= 1:
+                raise RegistrationError(f"burst must be at least 1, not {burst}")
+            throttle = TokenBucket(max_rate,burst,trailing)
+        elif trailing:
+            raise RegistrationError("Cannot specify trailing without max_rate")
+        else:
+            throttle = None
+
+        if batch or offload or where or when or max_calls or throttle:
+            opts = _Options(
+                batch=batch,
+                offload=offload,
+                where=where,
+                when=when,
+                max_calls=max_calls,
+                throttle=throttle,
+            )
+        else:
+            opts = None
+        return priority,opts
+
+    def _insert(self,key,priority,cb_id,callback,opts):
+        """Internal method to support `register`
+
+        Adds a single registration to _queues and to the indexes of
+        registrations.  The dispatch plans of its key must be invalidated
+        by the caller.  Must be called with the lock held.
+        """
         try:
             queue = self._queues[key]
         except KeyError:
             queue = dict()
             self._queues[key] = queue
+            if is_pattern(key):
+                self._patterns.add(key)
 
         try:
             pri_queue = queue[priority]
@@ -122,22 +582,302 @@ class NotificationManager:
             pri_queue = dict()
             queue[priority] = pri_queue
 
-        cb_id = next(self._ids)
         pri_queue[cb_id] = callback
+        if isinstance(callback,LazyCallback):
+            # indexed by import path, so as not to import the function
+            func_id = callback.target
+        else:
+            func_id = callable_id(callback.func)
+        self._index[cb_id] = (key,priority,func_id)
+        try:
+            self._func_ids[func_id].add(cb_id)
+        except KeyError:
+            self._func_ids[func_id] = {cb_id}
+        if opts is not None:
+            self._options[cb_id] = opts
+            if opts.throttle is not None:
+                opts.throttle.deliver = partial(
+                    self._deliver_trailing,priority,cb_id,callback,opts
+                )
 
-        return cb_id
+    def dump(self,path):
+        """Saves the registered callbacks to a file, to be restored by `load`
+        Args:
+            path (str): file path
 
+        Returns:
+            skipped (list): (cb_id, key, reason) of each registration which
+                could not be saved
+
+        Each registration is saved as its key, priority, the import path
+        ("module:qualname") of its function, its bound arguments and its
+        options.  Only functions which can be imported by name (e.g. module
+        level functions, classes and their static and class methods) can be
+        saved, along with arguments and where filter values which can be
+        pickled.  Weak registrations are not saved.  A max_calls limit is
+        saved as registered, regardless of how many calls have been made.
+        """
+        with self._lock:
+            registrations = sorted(
+                (cb_id,key,priority,cb,self._options.get(cb_id))
+                for key,queue in self._queues.items()
+                for priority,pri_queue in queue.items()
+                for cb_id,cb in pri_queue.items()
+            )
+
+        entries = list()
+        skipped = list()
+        # sharing each import path between entries lets pickle store it once
+        paths = dict()
+        for cb_id,key,priority,cb,opts in registrations:
+            try:
+                entry = self._entry(key,priority,cb,opts,paths)
+            except Exception as e:
+                skipped.append((cb_id,key,str(e)))
+            else:
+                entries.append(entry)
 
-    def notify(self,key,*args,**kwargs):
+        with open(path,"wb") as file:
+            pickle.dump(
+                {"format": DUMP_FORMAT, "registrations": entries},
+                file,
+                pickle.HIGHEST_PROTOCOL,
+            )
+        return skipped
+
+    def _entry(self,key,priority,cb,opts,paths):
+        """Internal method to support `dump`
+
+        Returns the saved form of a single registration, raising an
+        exception if it cannot be saved.  Import paths are memoized in paths
+        by function id.
+        """
+        if isinstance(cb,WeakCallback):
+            raise ValueError("weak callbacks are not saved")
+        options = dict()
+        if opts is not None:
+            if opts.batch:
+                options["batch"] = True
+            if opts.offload is not None:
+                options["offload"] = opts.offload
+            if opts.where is not None:
+                options["where"] = dict(zip(*opts.where))
+            if opts.when is not None:
+                options["when"] = import_path(opts.when)
+            if opts.max_calls is not None:
+                options["max_calls"] = opts.max_calls
+            if opts.throttle is not None:
+                options["max_rate"] = opts.throttle.rate
+                options["burst"] = opts.throttle.burst
+                options["trailing"] = opts.throttle.trailing
+        func = cb if isinstance(cb,LazyCallback) else cb.func
+        try:
+            target = paths[id(func)]
+        except KeyError:
+            target = paths[id(func)] = import_path(func)
+        entry = (key,priority,target,cb.args,cb.kwargs,options)
+        pickle.dumps(entry,pickle.HIGHEST_PROTOCOL)
+        return entry
+
+    def load(self,path):
+        """Registers the callbacks saved to a file by `dump`
+        Args:
+            path (str): file path
+
+        Returns:
+            cb_ids (list): registration ids of the callbacks registered
+
+        Raises:
+            ValueError if the file was not written by `dump`
+            RegistrationError if any of the registrations is not valid (in
+            which case none of them are registered)
+
+        The callbacks are registered in bulk, in the order in which they were
+        registered when saved.  Their functions (and when predicates) are
+        LazyCallbacks: they are not imported until the callback is first
+        invoked.  If a function cannot be imported then, the failure is
+        reported like that of any other callback.
+
+        Only load files from trusted sources: they are unpickled.
+        """
+        with open(path,"rb") as file:
+            saved = pickle.load(file)
+        if not isinstance(saved,dict) or saved.get("format") != DUMP_FORMAT:
+            raise ValueError(f"{path} is not a saved notification registry")
+
+        registrations = list()
+        for key,priority,target,args,kwargs,options in saved["registrations"]:
+            if not options:
+                # saved registrations were valid when registered
+                callback = LazyCallback(target,*args,**kwargs)
+                registrations.append((key,float(priority),callback,None))
+                continue
+            options = dict(options)
+            if "when" in options:
+                options["when"] = LazyCallback(options["when"])
+            callback = LazyCallback(target,*args,**kwargs)
+            priority,opts = self._validate(
+                callback,
+                priority,
+                options.get("batch",False),
+                options.get("offload"),
+                False,
+                options.get("where"),
+                options.get("when"),
+                False,
+                options.get("max_calls"),
+                options.get("max_rate"),
+                options.get("burst",1),
+                options.get("trailing",False),
+            )
+            registrations.append((key,priority,callback,opts))
+        return self._insert_all(registrations)
+
+    def register_entry_points(self,group,key=None,priority=0):
+        """Registers the plugins advertised as entry points of installed
+        distributions
+        Args:
+            group (str): entry point group
+            key (str): notification key or pattern (optional, see below)
+            priority (float): priority of the callbacks
+
+        Returns:
+            cb_ids (list): registration ids of the callbacks registered
+
+        Each entry point in the group (e.g. declared in a plugin's
+        pyproject.toml as `[project.entry-points."myapp.listeners"]`) is
+        registered as a LazyCallback, for the specified key or, if key is
+        None, for the key given by the entry point's name.  Neither the
+        plugins nor their modules are imported until first invoked.
+        """
+        priority,_ = self._validate(
+            None,priority,False,None,False,None,None,False,None
+        )
+        registrations = [
+            (
+                ep.name if key is None else key,
+                priority,
+                LazyCallback(f"{ep.module}:{ep.attr}"),
+                None,
+            )
+            for ep in importlib.metadata.entry_points(group=group)
+        ]
+        return self._insert_all(registrations)
+
+    def _insert_all(self,registrations):
+        """Internal method to support `load` and `register_entry_points`
+
+        Adds the (key, priority, callback, options) registrations under a
+        single acquisition of the lock, invalidating the dispatch plans of
+        each key once.  Returns their registration ids.
+        """
+        ops = [
+            ("register",(key,priority,next(self._ids),callback,opts))
+            for key,priority,callback,opts in registrations
+        ]
+        self._stage(ops)
+        return [registration[2] for _,registration in ops]
+
+    @contextmanager
+    def batch(self):
+        """Context manager applying the registrations and forgets made
+        within it (on this thread) atomically when it exits
+
+        The `register`, `register_many`, `forget` and `forget_many` calls
+        made within the batch are validated as they are made, but take
+        effect only when the batch exits, all together under a single
+        acquisition of the lock: a notification posted concurrently (or
+        within the batch) invokes the callbacks registered before the batch
+        or after it, never part way through it.  The dispatch plan of each
+        affected key is rebuilt only once.
+
+        If the batch exits with an exception, none of its changes are
+        applied.  A batch entered within another batch joins it (and if it
+        exits with an exception, only its own changes are discarded).
+
+        Example:
+            with nm.batch():
+                for listener in listeners:
+                    nm.register(listener.key,listener.callback)
+                nm.forget(cb_id=old_id)
+        """
+        pending = self._local.pending
+        if pending is not None:
+            mark = len(pending)
+            try:
+                yield self
+            except BaseException:
+                del pending[mark:]
+                raise
+            return
+        pending = self._local.pending = list()
+        try:
+            yield self
+        finally:
+            self._local.pending = None
+        self._commit(pending)
+
+    def _stage(self,ops):
+        """Internal method to support `forget` and `batch`
+
+        Applies the ("register", registration) and ("forget", criteria)
+        operations, or buffers them until the end of this thread's batch.
+        """
+        pending = self._local.pending
+        if pending is None:
+            self._commit(ops)
+        else:
+            pending.extend(ops)
+
+    def _commit(self,ops):
+        """Internal method to support `_stage`
+
+        Applies the operations in order under a single acquisition of the
+        lock, invalidating the dispatch plans of each affected key once.
+        Weak callbacks collected before the commit are not registered (and
+        are counted as collected).  Registrations to be replayed are
+        replayed once the lock is released.
+        """
+        keys = set()
+        replays = list()
+        dead = set()
+        with self._lock:
+            if self._dead:
+                self._forget_dead()
+            for op,item in ops:
+                if op == "register":
+                    callback = item[3]
+                    if isinstance(callback,WeakCallback) and not callback.alive:
+                        dead.add(item[2])
+                        self._collected += 1
+                        continue
+                    self._insert(*item)
+                    keys.add(item[0])
+                elif op == "forget":
+                    keys.update(self._remove(i) for i in self._select(*item))
+                elif item[2] not in dead:
+                    replays.append((item,self._retained(item[0])))
+            for key in keys:
+                self._invalidate(key)
+
+        for registration,retained in replays:
+            self._replay(*registration,retained)
+
+
+    def notify(self,key,*args,sticky=False,**kwargs):
         """Invokes the callbacks associated with the specified key
         Args:
             key(str): notification key
             args (list): positional arguments passed to callback (optional)
+            sticky (bool): retain the notification for callbacks registered
+                later with replay=True
             kwargs (dict): keyword arguments passed to callback (optional)
 
         Raises: nothing
             If any of the invoked callbacks raise an exception, the
-            exception will be logged, but otherwise ignored.
+            exception will be handled by the error policy (by default,
+            logged but otherwise ignored).  An exception raised by the
+            error policy (e.g. TooManyFailures) propagates.
 
         Any positional arguments specified here will be passed to the callback
         function immediately after the notification key and any positional
@@ -149,29 +889,1052 @@ class NotificationManager:
 
         If there are no callbacks registered for the specified notification
         key, this method simply returns without doing anything else.
+
+        The callbacks invoked are those registered when the notification
+        is posted.  Any callbacks registered or forgotten by one of those
+        callbacks will take effect with the next notification.
+
+        If sticky is True, the notification is retained (before it is
+        delivered) so that callbacks registered later with replay=True
+        receive it, e.g. for "<<Ready>>" or "<<ConfigLoaded>>" notifications
+        posted before every component has started.  Only the last sticky
+        notification of each key is retained, unless a longer history is
+        set with `set_history`.
+
+        If the manager has an executor, the callbacks of each priority tier
+        are submitted to it (with the last of them invoked on the calling
+        thread) and the tier is complete before the next one is started.
+
+        Returns:
+            futures (list): futures of the callbacks offloaded to a process
+                (empty if there are none)
+        """
+        if sticky:
+            self._retain(key,args,kwargs)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plan(key)
+        if plan.__class__ is FilteredPlan:
+            plan = plan.select(kwargs)
+
+        if self._clock is not None:
+            return self._notify_measured(key,plan,args,kwargs)
+        if self._executor is not None:
+            return self._notify_executor(key,plan,args,kwargs)
+
+        futures = None
+        for priority,cb_id,cb,opts in plan:
+            try:
+                if opts is None:
+                    cb(*args,key=key,**kwargs)
+                elif opts.offload is None:
+                    self._call(key,priority,cb_id,cb,opts,args,kwargs)
+                else:
+                    future = self._call(key,priority,cb_id,cb,opts,args,kwargs)
+                    if future is None:
+                        pass
+                    elif futures is None:
+                        futures = [future]
+                    else:
+                        futures.append(future)
+            except CallbackFailed as e:
+                self._report(key,priority,cb_id,e)
+        return futures or []
+
+    def set_history(self,key,depth):
+        """Sets the number of sticky notifications retained for a key
+        Args:
+            key (str): notification key
+            depth (int): maximum number of sticky notifications retained
+                (1 by default)
+
+        The retained notifications form a ring buffer: once depth
+        notifications are retained, each sticky notification posted
+        discards the oldest.  The memory retained for each key is thus
+        bounded by depth (see `history_stats`).
+        """
+        if not isinstance(depth,int) or depth < 1:
+            raise ValueError(f"depth must be a positive integer, not {depth}")
+        with self._lock:
+            self._depths[key] = depth
+            history = self._history.get(key)
+            if history is not None:
+                self._history[key] = deque(history,maxlen=depth)
+
+    def retained(self,key):
+        """Returns the sticky notifications retained for a key (as a list
+        of Notifications, oldest first)"""
+        history = self._history.get(key)
+        return [] if history is None else [n for _,n in list(history)]
+
+    def clear_history(self,key=None):
+        """Discards the sticky notifications retained for a key (or for
+        every key if None)"""
+        with self._lock:
+            if key is None:
+                self._history = dict()
+            else:
+                self._history.pop(key,None)
+
+    def history_stats(self):
+        """Returns the memory used by the retained sticky notifications
+        Returns:
+            stats (dict): {key: {retained, depth, bytes}}
+
+        The bytes are the (shallow) size of the ring buffer, of each
+        retained notification, of its positional and keyword arguments and
+        of the values passed: objects referenced by those values are not
+        included.
         """
+        stats = dict()
+        for key,history in list(self._history.items()):
+            entries = list(history)
+            retained = [n for _,n in entries]
+            size = sys.getsizeof(history)
+            for entry in entries:
+                size += sys.getsizeof(entry) + sys.getsizeof(entry[0])
+            for n in retained:
+                size += sys.getsizeof(n) + sys.getsizeof(n.args)
+                size += sys.getsizeof(n.kwargs)
+                size += sum(sys.getsizeof(arg) for arg in n.args)
+                size += sum(sys.getsizeof(v) for v in n.kwargs.values())
+            stats[key] = {
+                "retained": len(retained),
+                "depth": history.maxlen,
+                "bytes": size,
+            }
+        return stats
+
+    def _retain(self,key,args,kwargs):
+        """Internal method to support `notify(sticky=True)`"""
+        history = self._history.get(key)
+        if history is None:
+            history = self._history.setdefault(
+                key,deque(maxlen=self._depths.get(key,1))
+            )
+        history.append((next(self._posts),Notification(key,args,kwargs)))
+
+    def _retained(self,key):
+        """Internal method to support `register(replay=True)`
+
+        Returns the (sequence, Notification) sticky notifications retained
+        for the key, or for every key matching the pattern, in the order in
+        which they were posted.
+        """
+        if not is_pattern(key):
+            history = self._history.get(key)
+            return [] if history is None else list(history)
+        retained = [
+            entry
+            for k,history in list(self._history.items()) if matches(key,k)
+            for entry in list(history)
+        ]
+        retained.sort(key=itemgetter(0))
+        return retained
+
+    def _replay(self,key,priority,cb_id,cb,opts,retained):
+        """Internal method to support `register(replay=True)`
+
+        Invokes a newly registered callback for each of the retained sticky
+        notifications (as `notify` would have).
+        """
+        where = None if opts is None else opts.where
+        for _,(key,args,kwargs) in retained:
+            if where is not None and not where_matches(where,kwargs):
+                continue
+            try:
+                self._invoke(key,priority,cb_id,cb,opts,args,kwargs)
+            except CallbackFailed:
+                # already reported
+                pass
+
+    def _notify_measured(self,key,plan,args,kwargs):
+        """Internal method to support `notify`
+
+        Invokes the callbacks exactly as `notify` does, recording the
+        notification and the duration of each callback in the metrics and
+        the dispatch trace (whichever are enabled).
+        """
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.record_post(key,len(plan))
+        tracer = self._tracer
+        clock = self._clock or perf_counter_ns
+        begin = clock()
         try:
-            queue = self._queues[key]
-        except KeyError:
-            return
+            if self._executor is not None:
+                return self._notify_executor(key,plan,args,kwargs)
 
-        for priority in sorted(queue.keys(),reverse=True):
-            for cb_id,cb in queue[priority].items():
+            futures = list()
+            for priority,cb_id,cb,opts in plan:
+                start = clock()
                 try:
-                    cb(*args,key=key,**kwargs)
+                    if opts is None:
+                        cb(*args,key=key,**kwargs)
+                    elif opts.offload is None:
+                        self._call(key,priority,cb_id,cb,opts,args,kwargs)
+                    else:
+                        future = self._call(
+                            key,priority,cb_id,cb,opts,args,kwargs
+                        )
+                        if future is not None:
+                            futures.append(future)
                 except CallbackFailed as e:
-                    logging.warning(
-                        "Exception raised while invoking notification callback\n"
-                        + f"  key: {key}\n"
-                        + f"  priority: {priority}\n"
-                        + f"  callback: {cb_id}\n"
-                        + f"  function: {e.callback}\n"
-                        + f"  reason: {e.reason}"
+                    self._measure(key,priority,cb_id,cb,start,clock())
+                    self._report(key,priority,cb_id,e)
+                else:
+                    self._measure(key,priority,cb_id,cb,start,clock())
+            return futures
+        finally:
+            if tracer is not None:
+                tracer.record_notify(key,len(plan),begin,clock())
+
+    def _measure(self,key,priority,cb_id,cb,start,end):
+        """Internal method to support `notify`
+
+        Records the invocation of a callback in the metrics and the dispatch
+        trace (whichever are enabled).
+        """
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.record_call(key,cb_id,end-start)
+        tracer = self._tracer
+        if tracer is not None:
+            tracer.record_callback(key,priority,cb_id,cb,start,end)
+
+    def enable_metrics(self):
+        """Starts recording dispatch metrics (see `stats`)
+
+        Enabling metrics which are already enabled has no effect.
+        """
+        if self._metrics is None:
+            self._metrics = Metrics()
+            self._select_clock()
+
+    def disable_metrics(self):
+        """Stops recording dispatch metrics, discarding those recorded"""
+        self._metrics = None
+        self._select_clock()
+
+    def enable_tracing(self,capacity=CAPACITY):
+        """Starts recording the dispatch trace
+        Args:
+            capacity (int): maximum number of spans kept
+
+        Returns:
+            tracer (Tracer): the trace, to be exported with `export`
+
+        Each notification posted with `notify` (or delivered by a deferred
+        post or dispatcher thread) and each callback it invokes is recorded
+        as a span, with its key, registration id, priority and function.
+        Callbacks invoked by `notify_nowait` are recorded on the executor's
+        threads.  Only the most recent capacity spans are kept.
+
+        Tracing adds the cost of reading the clock and appending a span to
+        the ring buffer: well under a microsecond per callback and per
+        notification, whatever the callback does (see bench.bench_tracing).
+        When tracing is disabled (the default), it costs nothing.  Enabling
+        tracing which is already enabled has no effect.
+        """
+        if self._tracer is None:
+            self._tracer = Tracer(capacity)
+            self._select_clock()
+        return self._tracer
+
+    def disable_tracing(self):
+        """Stops recording the dispatch trace
+        Returns:
+            tracer (Tracer): the trace recorded so far (None if tracing was
+                not enabled)
+        """
+        tracer = self._tracer
+        self._tracer = None
+        self._select_clock()
+        return tracer
+
+    def _select_clock(self):
+        """Internal method to support `enable_metrics` and `enable_tracing`
+
+        Selects the clock by which callbacks are timed: that of the tracer
+        (so that spans share its time base) or of the metrics, or None if
+        neither is enabled (so that `notify` takes its fast path).
+        """
+        if self._tracer is not None:
+            self._clock = self._tracer.clock
+        elif self._metrics is not None:
+            self._clock = self._metrics.clock
+        else:
+            self._clock = None
+
+    def stats(self):
+        """Returns a snapshot of the dispatch metrics recorded so far
+        Returns:
+            stats (dict): {key: {posts, fanout, mean_fanout, callbacks}}
+                where callbacks is {cb_id: {calls, failures, latency}}
+                (empty if metrics are not enabled)
+
+        Metrics are only recorded once enabled with `enable_metrics`.  For
+        each notification key, they count the notifications posted and the
+        callbacks invoked for them (the fan-out).  For each callback invoked
+        for the key, they count its invocations and failures and record a
+        histogram of its latency.  Latency is summarized (in nanoseconds) by
+        its count, mean, maximum, approximate 50th, 90th and 99th
+        percentiles and the counts of its power of 2 buckets.
+
+        Latency is recorded for callbacks invoked by `notify` and
+        `notify_nowait`.  For callbacks offloaded to a process, it is the
+        time taken to submit them.
+        """
+        metrics = self._metrics
+        return {} if metrics is None else metrics.snapshot()
+
+    def reset_stats(self):
+        """Discards the dispatch metrics recorded so far (if enabled)"""
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.reset()
+
+    def notify_deferred(self,key,*args,coalesce="last",by="key",window=None,
+                        **kwargs):
+        """Posts a notification to be delivered later, collapsing repeated
+        posts into one
+        Args:
+            key(str): notification key
+            args (list): positional arguments passed to callback (optional)
+            coalesce (str or callable): policy for combining repeated posts
+            by (str): repeated posts have the same "key" or the same "args"
+            window (float): seconds without a repeated post until delivery
+                (None to wait for `flush`)
+            kwargs (dict): keyword arguments passed to callback (optional)
+
+        Raises:
+            ValueError if coalesce or by is not valid
+
+        The notification is delivered (as though posted by `notify`) when
+        the window ends, or when `flush` is called if there is no window.
+        Any repeated posts made in the meantime are collapsed into it, each
+        restarting the window, so that the callbacks are invoked once per
+        burst of posts (however long the burst).
+
+        Posts are repeated if they have the same key (if by is "key") or the
+        same key and arguments (if by is "args").  The arguments delivered
+        are chosen by the coalescing policy:
+            - "last": the arguments of the latest post
+            - "first": the arguments of the earliest post
+            - "merge": the positional arguments of the latest post along with
+              the keyword arguments of all of them (latest taking precedence)
+            - a function f(args,kwargs,new_args,new_kwargs) returning the
+              (args,kwargs) to keep
+
+        Notifications delivered at the end of a window are delivered on a
+        timer thread.
+        """
+        self._deferred.post(key,args,kwargs,coalesce,by,window)
+
+    def flush(self,key=None):
+        """Delivers all pending deferred notifications immediately
+        Args:
+            key(str): only deliver those for this notification key (optional)
+
+        Returns:
+            count (int): number of deferred notifications delivered
+        """
+        return self._deferred.flush(key)
+
+    def start_dispatcher(self,maxsize=1024,threads=1,overflow="block"):
+        """Starts the dispatcher threads which deliver posted notifications
+        Args:
+            maxsize (int): maximum number of queued notifications
+            threads (int): number of dispatcher threads
+            overflow (str): "block", "drop_oldest", "drop_newest" or "raise"
+
+        Returns:
+            dispatcher (Dispatcher)
+
+        Raises:
+            ValueError if maxsize, threads or overflow is not valid
+            RuntimeError if the dispatcher is already running
+
+        See `post` and Dispatcher for details.
+        """
+        with self._dispatcher_lock:
+            if self._dispatcher is not None and self._dispatcher.running:
+                raise RuntimeError("dispatcher is already running")
+            self._dispatcher = Dispatcher(
+                self.notify,
+                maxsize=maxsize,
+                threads=threads,
+                overflow=overflow,
+                name=self._thread_name(),
+            )
+            return self._dispatcher
+
+    def post(self,key,*args,**kwargs):
+        """Queues a notification to be delivered by the dispatcher threads
+        Args:
+            key(str): notification key
+            args (list): positional arguments passed to callback (optional)
+            kwargs (dict): keyword arguments passed to callback (optional)
+
+        Returns:
+            accepted (bool): False if the notification was dropped
+
+        Raises:
+            QueueOverflow if the queue is full and the overflow policy is "raise"
+            RuntimeError if the dispatcher has been stopped
+
+        The notification is delivered as though posted by `notify`, but on one
+        of the dispatcher threads, so the caller does not wait for any of the
+        callbacks.  If the dispatcher has never been started, it is started
+        with the default settings (see `start_dispatcher`).  Once stopped, it
+        is only restarted by `start_dispatcher`.
+        """
+        dispatcher = self._dispatcher
+        if dispatcher is None:
+            with self._dispatcher_lock:
+                if self._dispatcher is None:
+                    self._dispatcher = Dispatcher(
+                        self.notify,
+                        name=self._thread_name(),
                     )
+                dispatcher = self._dispatcher
+        return dispatcher.post(key,args,kwargs)
+
+    def _thread_name(self):
+        """Internal method: prefix of the names of the manager's threads"""
+        return f"pynm-{self._name}" if self._name else "pynm"
+
+    def drain(self,timeout=None):
+        """Waits until every posted notification has been delivered
+        Args:
+            timeout (float): maximum number of seconds to wait (optional)
+
+        Returns:
+            drained (bool): False if the timeout expired first
+        """
+        dispatcher = self._dispatcher
+        return dispatcher is None or dispatcher.drain(timeout)
+
+    def stop_dispatcher(self,timeout=None):
+        """Delivers every posted notification, then stops the dispatcher
+        Args:
+            timeout (float): maximum number of seconds to wait (optional)
+
+        Returns:
+            drained (bool): False if notifications remained undelivered
+        """
+        with self._dispatcher_lock:
+            dispatcher = self._dispatcher
+        return dispatcher is None or dispatcher.stop(timeout)
+
+    def _notify_executor(self,key,plan,args,kwargs):
+        """Internal method to support `notify`
+
+        Fans the callbacks of each priority tier out onto the executor and
+        waits for the tier to complete before starting the next one.  An
+        exception raised by the error policy on a pool thread is re-raised
+        once the tier has completed.
+        """
+        submit = self._executor.submit
+        offloaded = list()
+        for _,tier in groupby(plan,itemgetter(0)):
+            futures = list()
+            for entry in tier:
+                opts = entry[3]
+                if opts is not None and opts.offload is not None:
+                    try:
+                        future = self._invoke(key,*entry,args,kwargs)
+                    except CallbackFailed:
+                        continue
+                    if future is not None:
+                        offloaded.append(future)
+                else:
+                    futures.append(entry)
+            if not futures:
+                continue
+            *others,last = futures
+            futures = [
+                submit(self._invoke,key,*entry,args,kwargs)
+                for entry in others
+            ]
+            try:
+                self._invoke(key,*last,args,kwargs)
+            except CallbackFailed:
+                pass
+            finally:
+                wait(futures)
+            for future in futures:
+                e = future.exception()
+                if e is not None and not isinstance(e,CallbackFailed):
+                    raise e
+        return offloaded
+
+    def notify_nowait(self,key,*args,sticky=False,**kwargs):
+        """Invokes the callbacks associated with the specified key without
+        waiting for them to complete
+        Args:
+            key(str): notification key
+            args (list): positional arguments passed to callback (optional)
+            sticky (bool): retain the notification (see `notify`)
+            kwargs (dict): keyword arguments passed to callback (optional)
+
+        Returns:
+            futures (list): one Future per callback, in order of invocation
+
+        Arguments are passed to the callbacks exactly as with `notify`.
+
+        The callbacks of each priority tier are submitted to the manager's
+        executor once every callback of the preceding tier has completed.
+        The result of each future is the value returned by its callback.  If
+        the callback raises an exception, it is logged as with `notify` and
+        the future's exception is the resulting CallbackFailed.  Callbacks
+        offloaded to a process are run there, not on the executor.  Cancelling
+        a future before its tier starts prevents its callback from being
+        invoked.
+
+        If the manager has no executor, the callbacks are invoked before
+        this method returns.
+        """
+        if sticky:
+            self._retain(key,args,kwargs)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plan(key)
+        if plan.__class__ is FilteredPlan:
+            plan = plan.select(kwargs)
+        if self._metrics is not None:
+            self._metrics.record_post(key,len(plan))
+
+        tiers = [list(tier) for _,tier in groupby(plan,itemgetter(0))]
+        futures = [[Future() for _ in tier] for tier in tiers]
+        self._submit_tiers(key,tiers,futures,args,kwargs)
+        return [f for tier in futures for f in tier]
+
+    def _submit_tiers(self,key,tiers,futures,args,kwargs):
+        """Internal method to support `notify_nowait`
+
+        Submits the callbacks of the first tier to the executor. The
+        remaining tiers are submitted when the last of these completes.
+        """
+        if not tiers:
+            return
+
+        lock = threading.Lock()
+        remaining = [len(tiers[0])]
+
+        def tier_done():
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            self._submit_tiers(key,tiers[1:],futures[1:],args,kwargs)
+
+        def invoked(placeholder,future):
+            if future.cancelled():
+                placeholder.set_exception(CancelledError())
+            elif future.exception() is None:
+                placeholder.set_result(future.result())
+            else:
+                placeholder.set_exception(future.exception())
+            tier_done()
+
+        for entry,placeholder in zip(tiers[0],futures[0]):
+            if not placeholder.set_running_or_notify_cancel():
+                tier_done()
+            elif entry[3] is not None and entry[3].offload is not None:
+                try:
+                    future = self._invoke(key,*entry,args,kwargs)
+                except CallbackFailed as e:
+                    placeholder.set_exception(e)
+                    tier_done()
+                else:
+                    if future is None:
+                        # not invoked, as its when predicate was not satisfied
+                        placeholder.set_result(None)
+                        tier_done()
+                    else:
+                        future.add_done_callback(partial(invoked,placeholder))
+            elif self._executor is None:
+                try:
+                    placeholder.set_result(self._invoke(key,*entry,args,kwargs))
+                except CallbackFailed as e:
+                    placeholder.set_exception(e)
+                tier_done()
+            else:
+                future = self._executor.submit(
+                    self._invoke,key,*entry,args,kwargs
+                )
+                future.add_done_callback(partial(invoked,placeholder))
+
+    def _invoke(self,key,priority,cb_id,cb,opts,args,kwargs):
+        """Internal method to support `notify`
+
+        Invokes a single callback from a dispatch plan, reporting (and
+        re-raising) its failure.
+        """
+        clock = self._clock
+        if clock is not None:
+            start = clock()
+        try:
+            if opts is None:
+                return cb(*args,key=key,**kwargs)
+            return self._call(key,priority,cb_id,cb,opts,args,kwargs)
+        except CallbackFailed as e:
+            self._report(key,priority,cb_id,e)
+            raise
+        finally:
+            if clock is not None:
+                self._measure(key,priority,cb_id,cb,start,clock())
+
+    def _call(self,key,priority,cb_id,cb,opts,args,kwargs):
+        """Internal method to support `notify`
+
+        Invokes a callback which was registered with non-default options.
+        Returns the callback's return value, or its future if offloaded
+        (None if the callback's when predicate is not satisfied or it is
+        throttled).
+        """
+        when = opts.when
+        if when is not None and not self._accepts(cb,when,key,args,kwargs):
+            return None
+        if opts.batch:
+            args = (list(args),)
+        throttle = opts.throttle
+        if throttle is not None and not throttle.take(key,args,kwargs):
+            return None
+        return self._deliver(key,priority,cb_id,cb,opts,args,kwargs)
+
+    def _deliver(self,key,priority,cb_id,cb,opts,args,kwargs):
+        """Internal method to support `_call` and `notify_many`
+
+        Invokes a callback which was registered with non-default options,
+        once it has passed its when predicate and throttle, with the
+        arguments it is passed (i.e. already collected into a list if it
+        was registered with batch=True).
+        """
+        if opts.max_calls is not None and not self._claim(cb_id,opts):
+            return None
+        if opts.offload is None:
+            return cb(*args,key=key,**kwargs)
+        return self._offload(key,priority,cb_id,cb,args,kwargs)
+
+    def _deliver_trailing(self,priority,cb_id,cb,opts,key,args,kwargs):
+        """Internal method to support `register(trailing=True)`
+
+        Invokes a throttled callback (on its throttle's timer thread) for
+        the latest notification it deferred, unless it has been forgotten.
+        """
+        if cb_id not in self._index:
+            return
+        try:
+            self._deliver(key,priority,cb_id,cb,opts,args,kwargs)
+        except CallbackFailed as e:
+            self._report(key,priority,cb_id,e)
+
+    def throttle_stats(self):
+        """Returns the counts of the notifications delivered to and throttled
+        for each callback registered with max_rate
+        Returns:
+            stats (dict): {cb_id: {delivered, throttled}}
+
+        delivered counts the invocations of the callback (including those
+        for deferred notifications) and throttled the notifications skipped
+        or deferred.
+        """
+        return {
+            cb_id: {
+                "delivered": opts.throttle.delivered,
+                "throttled": opts.throttle.throttled,
+            }
+            for cb_id,opts in list(self._options.items())
+            if opts.throttle is not None
+        }
+
+    def _accepts(self,cb,when,key,args,kwargs):
+        """Internal method to support `register(when=...)`
+
+        Evaluates a callback's when predicate, raising CallbackFailed if the
+        predicate fails.
+        """
+        try:
+            return when(key,*args,**kwargs)
+        except CallbackFailed as e:
+            # a LazyCallback predicate (restored by `load`)
+            raise CallbackFailed(cb,e.reason)
+        except Exception as e:
+            raise CallbackFailed(cb,e)
+
+    def _claim(self,cb_id,opts):
+        """Internal method to support `register(max_calls=...)`
+
+        Claims one of a callback's remaining invocations, forgetting the
+        callback when claiming the last of them.  Returns False if none
+        remain (i.e. the callback is in a plan taken before it was
+        forgotten).
+        """
+        calls = next(opts.calls)
+        if calls > opts.max_calls:
+            return False
+        if calls == opts.max_calls:
+            self.forget(cb_id=cb_id)
+        return True
+
+    def _offload(self,key,priority,cb_id,cb,args,kwargs):
+        """Internal method to support `notify`
+
+        Submits a callback to the managed process pool. Its failure is
+        reported when the returned future completes.
+        """
+        with self._pool_lock:
+            if self._process_pool is None:
+                self._process_pool = _offload.process_pool()
+            pool = self._process_pool
+
+        args,kwargs,segments = _offload.share_payloads(args,kwargs)
+        try:
+            future = pool.submit(_offload.run,cb,key,args,kwargs)
+        except Exception as e:
+            _offload.release(segments)
+            raise CallbackFailed(cb,e)
+
+        def done(future):
+            _offload.release(segments)
+            if future.cancelled():
+                return
+            e = future.exception()
+            if e is None:
+                return
+            if not isinstance(e,CallbackFailed):
+                e = CallbackFailed(cb,e)
+            self._report(key,priority,cb_id,e)
+
+        future.add_done_callback(done)
+        return future
+
+    def shutdown(self,wait=True):
+        """Shuts down the process pool used for offloaded callbacks (if any)
+
+        The pool is created again if needed by a later notification.  An
+        executor passed to the constructor is not shut down.
+        """
+        with self._pool_lock:
+            pool = self._process_pool
+            self._process_pool = None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    async def notify_async(self,key,*args,sticky=False,**kwargs):
+        """Invokes the callbacks associated with the specified key, awaiting
+        any coroutine callbacks
+        Args:
+            key(str): notification key
+            args (list): positional arguments passed to callback (optional)
+            sticky (bool): retain the notification (see `notify`)
+            kwargs (dict): keyword arguments passed to callback (optional)
+
+        Raises: nothing
+            If any of the invoked callbacks raise an exception, the
+            exception will be logged, but otherwise ignored.
+
+        Arguments are passed to the callbacks exactly as with `notify`.
+
+        Callbacks are invoked in order of decreasing priority.  Regular
+        callbacks run inline as they are reached.  Awaitables returned by
+        coroutine callbacks are run concurrently with all others of the same
+        priority, and all of them complete before any callback with a
+        lower priority is invoked.  Callbacks offloaded to a process are
+        awaited in the same manner.
+        """
+        if sticky:
+            self._retain(key,args,kwargs)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plan(key)
+        if plan.__class__ is FilteredPlan:
+            plan = plan.select(kwargs)
+        if self._metrics is not None:
+            self._metrics.record_post(key,len(plan))
+
+        pending = list()
+        tier = None
+        for priority,cb_id,cb,opts in plan:
+            if priority != tier:
+                if pending:
+                    await self._gather(key,tier,pending)
+                    pending = list()
+                tier = priority
+            try:
+                if opts is None:
+                    result = cb(*args,key=key,**kwargs)
+                else:
+                    result = self._call(key,priority,cb_id,cb,opts,args,kwargs)
+            except CallbackFailed as e:
+                self._report(key,priority,cb_id,e)
+                continue
+            if isinstance(result,Future):
+                # failure of an offloaded callback is reported by _offload
+                pending.append((cb_id,None,asyncio.wrap_future(result)))
+            elif inspect.isawaitable(result):
+                pending.append((cb_id,cb,result))
+
+        if pending:
+            await self._gather(key,tier,pending)
+
+    async def _gather(self,key,priority,pending):
+        """Internal method to support `notify_async`
+
+        Awaits the (cb_id, callback, awaitable) entries of a priority tier
+        concurrently and reports any that fail.
+        """
+        results = await asyncio.gather(
+            *(aw for _,_,aw in pending),
+            return_exceptions=True,
+        )
+        for (cb_id,cb,_),result in zip(pending,results):
+            if cb is not None and isinstance(result,Exception):
+                self._report(key,priority,cb_id,CallbackFailed(cb,result))
+
+    def expect(self,key,where=None,when=None):
+        """Returns a Future of the next notification posted for the key
+        Args:
+            key (str): notification key or wildcard key pattern
+            where (dict): keyword argument values the notification must be
+                posted with (optional, see `register`)
+            when (callable): predicate the notification must satisfy
+                (optional, see `register`)
+
+        Returns:
+            future (Future): its result is the Notification (key, args,
+                kwargs) posted
+
+        The future's callback is registered (with once=True) before this
+        method returns, so a request may be sent after calling `expect`
+        without any risk of missing its response.  Cancelling the future
+        forgets the callback.
+        """
+        future = Future()
+
+        def resolve(key,*args,**kwargs):
+            if future.set_running_or_notify_cancel():
+                future.set_result(Notification(key,args,kwargs))
+
+        cb_id = self.register(key,resolve,where=where,when=when,once=True)
+        future.add_done_callback(
+            lambda f: self.forget(cb_id=cb_id) if f.cancelled() else None
+        )
+        return future
+
+    def wait_for(self,key,timeout=None,where=None,when=None):
+        """Waits for the next notification posted for the key
+        Args:
+            key (str): notification key or wildcard key pattern
+            timeout (float): maximum number of seconds to wait (optional)
+            where (dict): see `expect`
+            when (callable): see `expect`
+
+        Returns:
+            notification (Notification): the (key, args, kwargs) posted
+
+        Raises:
+            concurrent.futures.TimeoutError if no notification is posted
+            before the timeout (the builtin TimeoutError from Python 3.11)
+
+        The notification must be posted on another thread.  To wait for the
+        response to a request, use `expect` before sending the request.
+        """
+        future = self.expect(key,where=where,when=when)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise
+
+    async def wait_for_async(self,key,timeout=None,where=None,when=None):
+        """Awaits the next notification posted for the key
+        Args: see `wait_for`
+
+        Returns:
+            notification (Notification): the (key, args, kwargs) posted
+
+        Raises:
+            asyncio.TimeoutError if no notification is posted before the
+            timeout (the builtin TimeoutError from Python 3.11)
+
+        The notification may be posted from any thread, or from a task
+        running on the same event loop.
+        """
+        future = asyncio.wrap_future(self.expect(key,where=where,when=when))
+        return await asyncio.wait_for(future,timeout)
+
+    def notify_many(self,key,payloads,sticky=False,**kwargs):
+        """Invokes the callbacks associated with the specified key for each
+        payload in a batch
+        Args:
+            key(str): notification key
+            payloads (iterable): payloads passed to the callbacks
+            sticky (bool): retain the notification of each payload (see
+                `notify`)
+            kwargs (dict): keyword arguments passed to callback (optional)
+
+        Raises: nothing
+            If any of the invoked callbacks raise an exception, the
+            exception will be logged, but otherwise ignored.
+
+        Each payload is passed to the callback function as a single
+        positional argument, exactly as though posted by `notify(key,payload,
+        **kwargs)`.  Callbacks registered with batch=True are instead invoked
+        once, with the entire batch passed as that argument.  Lists, tuples
+        and NumPy arrays are passed through as is; other iterables are
+        collected into a list.
+
+        The dispatch order is resolved once for the entire batch. Each
+        callback receives the complete batch before any callback with a
+        lower priority receives any of it.
+
+        Returns:
+            futures (list): futures of the callbacks offloaded to a process
+                (empty if there are none)
+        """
+        if sticky:
+            payloads = as_batch(payloads)
+            for payload in payloads:
+                self._retain(key,(payload,),kwargs)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plan(key)
+        if plan.__class__ is FilteredPlan:
+            plan = plan.select(kwargs)
+        if self._metrics is not None:
+            payloads = as_batch(payloads)
+            self._metrics.record_post(key,len(plan),len(payloads))
+        if not plan:
+            return []
+
+        payloads = as_batch(payloads)
+        accepts = self._accepts
+        futures = list()
+        for priority,cb_id,cb,opts in plan:
+            if opts is None:
+                for payload in payloads:
+                    try:
+                        cb(payload,key=key,**kwargs)
+                    except CallbackFailed as e:
+                        self._report(key,priority,cb_id,e)
+                continue
+
+            batch = [(payloads,)] if opts.batch else [(p,) for p in payloads]
+            when = opts.when
+            for args in batch:
+                try:
+                    if when is not None and not accepts(cb,when,key,args,kwargs):
+                        continue
+                    bucket = opts.throttle
+                    if bucket is not None and not bucket.take(key,args,kwargs):
+                        continue
+                    if opts.max_calls is not None and not self._claim(cb_id,opts):
+                        break
+                    if opts.offload is None:
+                        cb(*args,key=key,**kwargs)
+                    else:
+                        futures.append(
+                            self._offload(key,priority,cb_id,cb,args,kwargs)
+                        )
+                except CallbackFailed as e:
+                    self._report(key,priority,cb_id,e)
+        return futures
+
+    def _report(self,key,priority,cb_id,e):
+        """Internal method to support `notify`
+
+        Passes the failure of an invoked callback to the error policy
+        """
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.record_failure(key,cb_id)
+        self._error_policy.handle(self,key,priority,cb_id,e)
+
+    def _plan(self,key):
+        """Internal method to support `notify`
+
+        Returns the dispatch plan for the specified key: a tuple of
+        (priority, cb_id, callback, options) entries flattened from the
+        queues of the key and of every pattern matching it, in order of
+        decreasing priority.  The plan is built on first use and cached until
+        the callbacks registered for the key or a matching pattern change.
+
+        If any of the callbacks were registered with a where filter, the plan
+        is a FilteredPlan, from which the entries matching each notification
+        must be selected.
+        """
+        if not self._patterns and key not in self._queues:
+            return ()
+
+        with self._lock:
+            if self._dead:
+                self._forget_dead()
+
+            try:
+                return self._plans[key]
+            except KeyError:
+                pass
+
+            sources = [key] if key in self._queues else []
+            sources.extend(p for p in self._patterns.match(key) if p != key)
+
+            options = self._options
+            plan = [
+                (priority,cb_id,cb,options.get(cb_id))
+                for source in sources
+                for priority,pri_queue in self._queues[source].items()
+                for cb_id,cb in pri_queue.items()
+            ]
+            plan.sort(key=itemgetter(0),reverse=True)
+
+            if any(e[3] is not None and e[3].where is not None for e in plan):
+                unfiltered = list()
+                index = dict()
+                for entry in plan:
+                    opts = entry[3]
+                    if opts is None or opts.where is None:
+                        unfiltered.append(entry)
+                        continue
+                    names,values = opts.where
+                    table = index.setdefault(names,dict())
+                    table.setdefault(values,list()).append(entry)
+                plan = FilteredPlan(unfiltered,index)
+            else:
+                plan = tuple(plan)
+
+            if len(self._plans) > len(self._queues) + PLAN_CACHE_LIMIT:
+                self._plans = dict()
+            self._plans[key] = plan
+            return plan
+
+    def _invalidate(self,key):
+        """Internal method to support `register` and `forget`
+
+        Discards the cached dispatch plans affected by a change to the
+        callbacks registered for the specified key or pattern.
+        """
+        if is_pattern(key):
+            self._plans = {
+                k:plan for k,plan in self._plans.items() if not matches(key,k)
+            }
+        else:
+            self._plans.pop(key,None)
 
     def reset(self):
         """Forgets ALL registered callbacks immediately"""
-        self._queues = dict()
+        with self._lock:
+            for opts in self._options.values():
+                if opts.throttle is not None:
+                    opts.throttle.cancel()
+            self._queues = dict()
+            self._plans = dict()
+            self._options = dict()
+            self._patterns = PatternTrie()
+            self._index = dict()
+            self._func_ids = dict()
 
 
     def forget(self, key=None, priority=None, cb_id=None, callback=None):
@@ -180,60 +1943,143 @@ class NotificationManager:
             key (str): notification key
             priority (float): used to determine order of callback invocation
             cb_id (int): callback id returned when it was registered
-            callback (Callback or callable): registered callback
+            callback (Callback or callable): registered callback (or the
+                import path of a LazyCallback)
 
         Raises: 
             AssertionError if both cb_id and callback are specified 
 
         If no criteria are specified, this has the same effect
         as calling `reset` but is not as efficient.
+
+        Forgetting by cb_id or callback touches only the matching callbacks,
+        regardless of how many other callbacks are registered.
+
+        Within a `batch`, the callbacks are only forgotten when the batch
+        ends.
         """
         assert cb_id is None or callback is None, (
             "Cannot specify both cb_id and callback"
         )
+        self._stage([("forget",(key,priority,cb_id,callback))])
 
-        keys = [key] if key is not None else list(self._queues.keys())
-        for key in keys:
-            self._forget_key(key,priority, cb_id, callback)
-
-    def _forget_key(self,key, priority=None, cb_id=None, callback=None):
-        """Internal method to support `forget`"""
-        try:
-            queue = self._queues[key]
-        except KeyError:
-            return
+    def forget_many(self,cb_ids):
+        """Forgets several callbacks at once
+        Args:
+            cb_ids (iterable): callback ids returned when they were registered
 
-        priorities = [priority] if priority is not None else list(queue.keys())
-        for priority in priorities:
-            self._forget_priority(key,priority,cb_id,callback)
+        The callbacks are forgotten under a single acquisition of the lock,
+        so that a notification posted concurrently invokes either all or
+        none of them, and the dispatch plan of each key is rebuilt only
+        once.  Ids of callbacks which are not registered are ignored.
+        """
+        with self.batch():
+            for cb_id in cb_ids:
+                self.forget(cb_id=cb_id)
 
-        if not self._queues[key]:
-            del self._queues[key]
+    def _select(self,key,priority,cb_id,callback):
+        """Internal method to support `forget`
 
-    def _forget_priority(self,key,priority,cb_id,callback):
-        """Internal method to support `forget`"""
+        Returns the ids of the registered callbacks matching the criteria.
+        Must be called with the lock held.
+        """
         if cb_id:
-            self._forget_cb_id(key,priority,cb_id)
+            cb_ids = [cb_id] if cb_id in self._index else []
+        elif isinstance(callback,str):
+            cb_ids = list(self._func_ids.get(callback,()))
         elif callback:
-            self._forget_callback(key,priority,callback)
+            cb_ids = list(self._func_ids.get(callable_id(callback),()))
         else:
-            self._queues[key][priority].clear()
+            cb_ids = self._find(key,priority)
 
-        if not self._queues[key][priority]:
-            del self._queues[key][priority]
+        if key is not None or priority is not None:
+            index = self._index
+            cb_ids = [
+                i for i in cb_ids
+                if (key is None or index[i][0] == key)
+                and (priority is None or index[i][1] == priority)
+            ]
+        return cb_ids
 
-    def _forget_callback(self,key,priority,callback):
-        """Internal method to support `forget`"""
-        self._queues[key][priority] = {
-            k:v
-            for k,v in self._queues[key][priority].items()
-            if id(v.func) != id(callback)
-        }
+    def _find(self,key,priority):
+        """Internal method to support `forget`
 
-    def _forget_cb_id(self,key,priority,cb_id):
-        """Internal method to support `forget`"""
-        try:
-            del self._queues[key][priority][cb_id]
-        except KeyError:
-            pass
+        Returns the ids of the callbacks registered for the specified key
+        and/or priority (either of which may be None)
+        """
+        keys = [key] if key is not None else list(self._queues.keys())
+        cb_ids = list()
+        for key in keys:
+            queue = self._queues.get(key,{})
+            if priority is None:
+                for pri_queue in queue.values():
+                    cb_ids.extend(pri_queue)
+            else:
+                cb_ids.extend(queue.get(priority,()))
+        return cb_ids
+
+    def _remove(self,cb_id):
+        """Internal method to support `forget`
 
+        Removes a single registration from _queues and from the indexes of
+        registrations.  Returns its key, the dispatch plans of which must be
+        invalidated by the caller.  Must be called with the lock held.
+        """
+        key,priority,func_id = self._index.pop(cb_id)
+
+        queue = self._queues[key]
+        pri_queue = queue[priority]
+        del pri_queue[cb_id]
+        if not pri_queue:
+            del queue[priority]
+            if not queue:
+                del self._queues[key]
+                if is_pattern(key):
+                    self._patterns.remove(key)
+
+        func_ids = self._func_ids[func_id]
+        func_ids.discard(cb_id)
+        if not func_ids:
+            del self._func_ids[func_id]
+
+        opts = self._options.pop(cb_id,None)
+        if opts is not None and opts.throttle is not None:
+            opts.throttle.cancel()
+        return key
+
+    def _collector(self,cb_id):
+        """Internal method to support `register`
+
+        Returns the function invoked when the function of a weak callback
+        is garbage collected.  The callback is forgotten immediately unless
+        the manager is busy, in which case it is forgotten by the next
+        registration or forget.  Until then, invoking it does nothing.
+        """
+        manager = weakref.ref(self)
+
+        def collect():
+            nm = manager()
+            if nm is None:
+                return
+            nm._dead.append(cb_id)
+            # The collection may have been triggered by this very thread
+            # while it holds the lock: never block waiting for it here
+            if nm._lock.acquire(blocking=False):
+                try:
+                    nm._forget_dead()
+                finally:
+                    nm._lock.release()
+
+        return collect
+
+    def _forget_dead(self):
+        """Internal method to support weak callbacks
+
+        Forgets the weak callbacks whose functions have been collected.
+        Must be called with the lock held.
+        """
+        while self._dead:
+            cb_id = self._dead.popleft()
+            if cb_id in self._index:
+                self._invalidate(self._remove(cb_id))
+                self._collected += 1
@@ -0,0 +1,141 @@
+from time import perf_counter_ns
+
+# Histogram bucket i counts durations d (in nanoseconds) with
+# 2**(i-1) <= d < 2**i, the last bucket counting everything longer
+BUCKETS = 48
+
+class Histogram:
+    """Latency histogram with logarithmic (power of 2) buckets
+
+    The memory used is fixed regardless of the number of samples recorded.
+    Percentiles are reported as the upper bound of the bucket containing
+    them, i.e. to within a factor of 2.
+    """
+    __slots__ = ("counts","count","total","max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self,ns):
+        """Adds a single duration (in nanoseconds)"""
+        self.counts[min(ns.bit_length(),BUCKETS-1)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self,p):
+        """Returns the upper bound (in nanoseconds) of the p-th percentile"""
+        if not self.count:
+            return 0
+        threshold = p * self.count / 100
+        seen = 0
+        for i,n in enumerate(self.counts):
+            seen += n
+            if seen >= threshold:
+                return min(1 << i,self.max)
+        return self.max
+
+    def snapshot(self):
+        """Returns the histogram's summary statistics as a dict"""
+        return {
+            "count": self.count,
+            "mean_ns": self.total / self.count if self.count else 0,
+            "max_ns": self.max,
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "buckets": {1 << i: n for i,n in enumerate(self.counts) if n},
+        }
+
+
+class _CallbackStats:
+    __slots__ = ("latency","failures")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.failures = 0
+
+
+class _KeyStats:
+    __slots__ = ("posts","fanout","callbacks")
+
+    def __init__(self):
+        self.posts = 0
+        self.fanout = 0
+        self.callbacks = dict()
+
+    def callback(self,cb_id):
+        try:
+            return self.callbacks[cb_id]
+        except KeyError:
+            stats = self.callbacks[cb_id] = _CallbackStats()
+            return stats
+
+
+class Metrics:
+    """Dispatch metrics recorded by an instrumented NotificationManager
+
+    For each notification key: the number of posts and the total fan-out
+    (number of callbacks invoked) and, for each callback (by cb_id) invoked
+    for the key, a latency histogram and the number of failures.
+
+    Updates are not locked; counts may be slightly low if notifications
+    are posted concurrently from multiple threads.
+    """
+    clock = staticmethod(perf_counter_ns)
+
+    def __init__(self):
+        self._keys = dict()
+
+    def _key(self,key):
+        try:
+            return self._keys[key]
+        except KeyError:
+            stats = self._keys[key] = _KeyStats()
+            return stats
+
+    def record_post(self,key,fanout,posts=1):
+        """Records posts of a notification, each invoking fanout callbacks"""
+        stats = self._key(key)
+        stats.posts += posts
+        stats.fanout += posts * fanout
+
+    def record_call(self,key,cb_id,ns):
+        """Records the duration (in nanoseconds) of a callback invocation"""
+        self._key(key).callback(cb_id).latency.record(ns)
+
+    def record_failure(self,key,cb_id):
+        """Records the failure of a callback invocation"""
+        self._key(key).callback(cb_id).failures += 1
+
+    def reset(self):
+        """Discards everything recorded so far"""
+        self._keys = dict()
+
+    def snapshot(self):
+        """Returns everything recorded so far as a dict of the form
+            {key: {posts, fanout, mean_fanout, callbacks}}
+        where callbacks is of the form
+            {cb_id: {calls, failures, latency}}
+        and latency is a Histogram snapshot.
+        """
+        return {
+            key: {
+                "posts": s.posts,
+                "fanout": s.fanout,
+                "mean_fanout": s.fanout / s.posts if s.posts else 0,
+                "callbacks": {
+                    cb_id: {
+                        "calls": c.latency.count,
+                        "failures": c.failures,
+                        "latency": c.latency.snapshot(),
+                    }
+                    for cb_id,c in list(s.callbacks.items())
+                },
+            }
+            for key,s in list(self._keys.items())
+        }
@@ -0,0 +1,131 @@
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+import pickle
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+OFFLOAD_MODES = ("process",)
+
+# Payloads of at least this many bytes are passed through shared memory
+SHARED_MEMORY_THRESHOLD = 1 << 16
+
+def process_pool():
+    """Returns a new ProcessPoolExecutor for running offloaded callbacks"""
+    # Workers must share the parent's resource tracker so that the shared
+    # memory segments they attach to are not reported as leaked on exit.
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor()
+
+def check_picklable(callback):
+    """Raises an exception if the callback cannot be sent to another process"""
+    pickle.dumps(callback)
+
+
+class SharedPayload:
+    """Handle to a bytes or NumPy array payload copied into shared memory
+
+    Only the handle is pickled when the callback is sent to the worker
+    process, where the payload is reconstructed from the shared memory.
+    """
+    __slots__ = ("name","size","shape","dtype")
+
+    def __init__(self,name,size,shape=None,dtype=None):
+        self.name = name
+        self.size = size
+        self.shape = shape
+        self.dtype = dtype
+
+    @classmethod
+    def share(cls,value):
+        """Copies value into a new shared memory segment
+        Returns:
+            (handle, segment) if value is large enough to be worth sharing
+            (None, None) otherwise
+        """
+        if isinstance(value,(bytes,bytearray)):
+            size = len(value)
+            if size < SHARED_MEMORY_THRESHOLD:
+                return None,None
+            shm = shared_memory.SharedMemory(create=True,size=size)
+            shm.buf[:size] = value
+            return cls(shm.name,size),shm
+
+        if numpy is not None and isinstance(value,numpy.ndarray):
+            size = value.nbytes
+            if size < SHARED_MEMORY_THRESHOLD or value.dtype.hasobject:
+                return None,None
+            shm = shared_memory.SharedMemory(create=True,size=size)
+            shared = numpy.ndarray(value.shape,value.dtype,buffer=shm.buf)
+            shared[...] = value
+            del shared
+            return cls(shm.name,size,value.shape,value.dtype.str),shm
+
+        return None,None
+
+    def restore(self):
+        """Attaches to the shared memory segment (in the worker process)
+        Returns:
+            (payload, segment)
+
+        NumPy arrays are views of the shared memory.  Bytes payloads are
+        copied out of it, as bytes objects cannot share memory.
+        """
+        shm = shared_memory.SharedMemory(name=self.name)
+        if self.shape is None:
+            return bytes(shm.buf[:self.size]),shm
+        return numpy.ndarray(self.shape,self.dtype,buffer=shm.buf),shm
+
+
+def share_payloads(args,kwargs):
+    """Replaces large bytes and NumPy array arguments with SharedPayload handles
+    Returns:
+        (args, kwargs, segments) where segments must be released once the
+        callback has completed
+    """
+    segments = list()
+
+    def share(value):
+        handle,shm = SharedPayload.share(value)
+        if handle is None:
+            return value
+        segments.append(shm)
+        return handle
+
+    args = tuple(share(v) for v in args)
+    kwargs = {k:share(v) for k,v in kwargs.items()}
+    return args,kwargs,segments
+
+def release(segments):
+    """Frees the shared memory segments created by `share_payloads`"""
+    for shm in segments:
+        shm.close()
+        shm.unlink()
+
+def run(callback,key,args,kwargs):
+    """Invokes an offloaded callback (in the worker process)"""
+    segments = list()
+
+    def restore(value):
+        if not isinstance(value,SharedPayload):
+            return value
+        payload,shm = value.restore()
+        segments.append(shm)
+        return payload
+
+    args = tuple(restore(v) for v in args)
+    kwargs = {k:restore(v) for k,v in kwargs.items()}
+    try:
+        return callback(*args,key=key,**kwargs)
+    finally:
+        del args,kwargs
+        for shm in segments:
+            try:
+                shm.close()
+            except BufferError:
+                # the callback retained a view of the payload
+                pass
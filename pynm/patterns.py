@@ -0,0 +1,130 @@
+SEPARATOR = "."
+ANY_SEGMENT = "*"
+ANY_SEGMENTS = "**"
+
+def is_pattern(key):
+    """Returns True if key is a wildcard notification key pattern
+
+    A pattern is a string key in which one or more of the segments (separated
+    by periods) is a wildcard:
+        - "*" matches exactly one segment
+        - "**" matches zero or more segments
+    """
+    if not isinstance(key,str) or ANY_SEGMENT not in key:
+        return False
+    return any(s in (ANY_SEGMENT,ANY_SEGMENTS) for s in key.split(SEPARATOR))
+
+def matches(pattern,key):
+    """Returns True if the notification key matches the pattern"""
+    if not isinstance(key,str):
+        return False
+    return _matches(pattern.split(SEPARATOR),key.split(SEPARATOR))
+
+def _matches(pattern,segments):
+    """Internal function to support `matches`"""
+    if not pattern:
+        return not segments
+    head,rest = pattern[0],pattern[1:]
+    if head == ANY_SEGMENTS:
+        return any(_matches(rest,segments[i:]) for i in range(len(segments)+1))
+    if not segments:
+        return False
+    if head != ANY_SEGMENT and head != segments[0]:
+        return False
+    return _matches(rest,segments[1:])
+
+
+class _Node:
+    __slots__ = ("children","pattern")
+
+    def __init__(self):
+        self.children = dict()
+        self.pattern = None
+
+
+class PatternTrie:
+    """Segment trie of wildcard notification key patterns
+
+    Finding the patterns which match a notification key visits only the
+    branches of the trie consistent with the key's segments, rather than
+    testing every pattern.
+    """
+    def __init__(self):
+        self._root = _Node()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self,pattern):
+        """Adds a pattern to the trie (if not already present)"""
+        node = self._root
+        for segment in pattern.split(SEPARATOR):
+            try:
+                node = node.children[segment]
+            except KeyError:
+                child = _Node()
+                node.children[segment] = child
+                node = child
+        if node.pattern is None:
+            node.pattern = pattern
+            self._count += 1
+
+    def remove(self,pattern):
+        """Removes a pattern from the trie (if present)"""
+        path = [self._root]
+        segments = pattern.split(SEPARATOR)
+        for segment in segments:
+            try:
+                path.append(path[-1].children[segment])
+            except KeyError:
+                return
+
+        node = path[-1]
+        if node.pattern is None:
+            return
+        node.pattern = None
+        self._count -= 1
+
+        # prune the branch no longer leading to any pattern
+        for parent,segment in zip(reversed(path[:-1]),reversed(segments)):
+            child = parent.children[segment]
+            if child.children or child.pattern is not None:
+                break
+            del parent.children[segment]
+
+    def match(self,key):
+        """Returns the list of patterns which match the notification key"""
+        if not isinstance(key,str) or not self._count:
+            return []
+        segments = key.split(SEPARATOR)
+        found = list()
+        visited = set()
+        self._match(self._root,segments,0,found,visited)
+        return found
+
+    def _match(self,node,segments,i,found,visited):
+        """Internal method to support `match`"""
+        if (id(node),i) in visited:
+            return
+        visited.add((id(node),i))
+
+        children = node.children
+        globstar = children.get(ANY_SEGMENTS)
+        if globstar is not None:
+            # "**" consumes zero or more of the remaining segments
+            for j in range(i,len(segments)+1):
+                self._match(globstar,segments,j,found,visited)
+
+        if i == len(segments):
+            if node.pattern is not None:
+                found.append(node.pattern)
+            return
+
+        child = children.get(segments[i])
+        if child is not None:
+            self._match(child,segments,i+1,found,visited)
+        if segments[i] != ANY_SEGMENT:
+            child = children.get(ANY_SEGMENT)
+            if child is not None:
+                self._match(child,segments,i+1,found,visited)
@@ -0,0 +1,239 @@
+from .exceptions import RegistrationError
+from .manager import NotificationManager
+from .patterns import is_pattern
+
+from itertools import count
+
+import importlib.metadata
+import threading
+
+class ShardedNotificationManager:
+    """Notification manager which partitions notification keys across
+    independent NotificationManager shards
+
+    Each shard has its own lock and registry, so threads registering,
+    forgetting and posting notifications for different keys rarely contend
+    with each other.  The register, notify, forget and keys API is the same
+    as that of NotificationManager.
+
+    Each notification key is assigned to a shard by its hash.  Callbacks
+    registered for wildcard key patterns are registered in every shard, so
+    that they are invoked (in order of priority along with the callbacks of
+    the key) whichever shard the key is assigned to.
+
+    Every registration id identifies its shard, so forgetting a callback by
+    cb_id (or by key) only involves its shard.  Forgetting by callback or
+    by priority alone involves every shard.
+    """
+    def __init__(self,shards=16,name=None,executor=None,error_policy=None):
+        """ShardedNotificationManager constructor
+        Args:
+            shards (int): number of shards
+            name (str): identifies the manager, serves no functional purpose
+            executor (Executor): shared by the shards (optional)
+            error_policy (ErrorPolicy): shared by the shards (optional)
+        """
+        if shards < 1:
+            raise ValueError(f"shards must be positive, not {shards}")
+        self._name = name
+        self._shards = list()
+        for i in range(shards):
+            shard = NotificationManager(
+                f"{name}-{i}" if name else None,
+                executor=executor,
+                error_policy=error_policy,
+            )
+            # registration ids of shard i are congruent to i (mod shards)
+            shard._ids = count(shards+i,shards)
+            self._shards.append(shard)
+
+        # ids of the copies of pattern registrations: {cb_id: [cb_id, ...]}
+        self._pattern_lock = threading.Lock()
+        self._pattern_ids = dict()
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def shards(self):
+        """Returns the list of shards (NotificationManagers)"""
+        return list(self._shards)
+
+    @property
+    def keys(self):
+        """Returns a set of all the currently registered notification keys
+        (including wildcard key patterns)"""
+        keys = set()
+        for shard in self._shards:
+            keys.update(shard.keys)
+        return keys
+
+    def shard(self,key):
+        """Returns the shard to which the notification key is assigned"""
+        return self._shards[hash(key) % len(self._shards)]
+
+    def register(self,key,callback,*args,**kwargs):
+        """Registers a new notification callback
+
+        See NotificationManager.register.  Callbacks registered for wildcard
+        key patterns cannot be limited with once, max_calls or max_rate, as
+        they are registered in every shard.
+
+        Returns:
+            registration_id (int): unique id for each registered callback
+        """
+        if not is_pattern(key):
+            return self.shard(key).register(key,callback,*args,**kwargs)
+
+        if (
+            kwargs.get("once")
+            or kwargs.get("max_calls") is not None
+            or kwargs.get("max_rate") is not None
+        ):
+            raise RegistrationError(
+                "Cannot limit the calls of a sharded pattern registration"
+            )
+        cb_ids = list()
+        try:
+            for shard in self._shards:
+                cb_ids.append(shard.register(key,callback,*args,**kwargs))
+        except RegistrationError:
+            for cb_id in cb_ids:
+                self._shard_of(cb_id).forget(cb_id=cb_id)
+            raise
+        with self._pattern_lock:
+            self._pattern_ids[cb_ids[0]] = cb_ids
+        return cb_ids[0]
+
+    def register_entry_points(self,group,key=None,priority=0):
+        """Registers the plugins advertised as entry points of installed
+        distributions (see NotificationManager.register_entry_points)
+
+        Returns:
+            cb_ids (list): registration ids of the callbacks registered
+        """
+        return [
+            self.register(
+                ep.name if key is None else key,
+                f"{ep.module}:{ep.attr}",
+                priority=priority,
+            )
+            for ep in importlib.metadata.entry_points(group=group)
+        ]
+
+    def notify(self,key,*args,**kwargs):
+        """Invokes the callbacks associated with the specified key
+        (see NotificationManager.notify)"""
+        return self.shard(key).notify(key,*args,**kwargs)
+
+    def notify_nowait(self,key,*args,**kwargs):
+        """See NotificationManager.notify_nowait"""
+        return self.shard(key).notify_nowait(key,*args,**kwargs)
+
+    async def notify_async(self,key,*args,**kwargs):
+        """See NotificationManager.notify_async"""
+        await self.shard(key).notify_async(key,*args,**kwargs)
+
+    def notify_many(self,key,payloads,**kwargs):
+        """See NotificationManager.notify_many"""
+        return self.shard(key).notify_many(key,payloads,**kwargs)
+
+    def expect(self,key,where=None,when=None):
+        """See NotificationManager.expect (key may not be a pattern)"""
+        if is_pattern(key):
+            raise RegistrationError("Cannot expect a sharded pattern")
+        return self.shard(key).expect(key,where=where,when=when)
+
+    def wait_for(self,key,timeout=None,where=None,when=None):
+        """See NotificationManager.wait_for (key may not be a pattern)"""
+        if is_pattern(key):
+            raise RegistrationError("Cannot wait for a sharded pattern")
+        return self.shard(key).wait_for(key,timeout,where=where,when=when)
+
+    async def wait_for_async(self,key,timeout=None,where=None,when=None):
+        """See NotificationManager.wait_for_async (key may not be a pattern)"""
+        if is_pattern(key):
+            raise RegistrationError("Cannot wait for a sharded pattern")
+        return await self.shard(key).wait_for_async(
+            key,timeout,where=where,when=when
+        )
+
+    def set_history(self,key,depth):
+        """See NotificationManager.set_history"""
+        self.shard(key).set_history(key,depth)
+
+    def retained(self,key):
+        """See NotificationManager.retained"""
+        return self.shard(key).retained(key)
+
+    def clear_history(self,key=None):
+        """See NotificationManager.clear_history"""
+        if key is not None:
+            self.shard(key).clear_history(key)
+            return
+        for shard in self._shards:
+            shard.clear_history()
+
+    def history_stats(self):
+        """See NotificationManager.history_stats"""
+        stats = dict()
+        for shard in self._shards:
+            stats.update(shard.history_stats())
+        return stats
+
+    def throttle_stats(self):
+        """See NotificationManager.throttle_stats"""
+        stats = dict()
+        for shard in self._shards:
+            stats.update(shard.throttle_stats())
+        return stats
+
+    def forget(self,key=None,priority=None,cb_id=None,callback=None):
+        """Forgets the specified callbacks that match the specified criteria
+        (see NotificationManager.forget)"""
+        assert cb_id is None or callback is None, (
+            "Cannot specify both cb_id and callback"
+        )
+
+        if cb_id:
+            with self._pattern_lock:
+                cb_ids = self._pattern_ids.pop(cb_id,[cb_id])
+            for i in cb_ids:
+                self._shard_of(i).forget(key,priority,cb_id=i)
+            return
+
+        if key is not None and not is_pattern(key):
+            self.shard(key).forget(key,priority,callback=callback)
+            return
+
+        for shard in self._shards:
+            shard.forget(key,priority,callback=callback)
+        self._prune_patterns()
+
+    def reset(self):
+        """Forgets ALL registered callbacks immediately"""
+        for shard in self._shards:
+            shard.reset()
+        with self._pattern_lock:
+            self._pattern_ids = dict()
+
+    def shutdown(self,wait=True):
+        """Shuts down the process pools of the shards (if any)"""
+        for shard in self._shards:
+            shard.shutdown(wait)
+
+    def _shard_of(self,cb_id):
+        """Internal method: returns the shard holding a registration"""
+        return self._shards[cb_id % len(self._shards)]
+
+    def _prune_patterns(self):
+        """Internal method to support `forget`
+
+        Discards the ids of the pattern registrations no longer registered
+        """
+        with self._pattern_lock:
+            self._pattern_ids = {
+                cb_id:cb_ids for cb_id,cb_ids in self._pattern_ids.items()
+                if cb_id in self._shard_of(cb_id)._index
+            }
@@ -0,0 +1,101 @@
+import threading
+import time
+
+class TokenBucket:
+    """Limits the rate at which a callback registered with max_rate is
+    invoked
+
+    The bucket holds up to burst tokens and is refilled continuously at
+    rate tokens per second.  Each invocation of the callback takes a token.
+    A notification which finds the bucket empty is throttled: it is
+    skipped or, if trailing, its arguments are kept (those of the latest
+    throttled notification replacing any earlier ones) and the callback is
+    invoked with them, by deliver(key,args,kwargs) on a timer thread, as
+    soon as a token is available.
+
+    `delivered` counts the invocations of the callback (including trailing
+    ones) and `throttled` the notifications which were skipped or deferred.
+    """
+    __slots__ = (
+        "rate","burst","trailing","deliver","delivered","throttled",
+        "_clock","_lock","_tokens","_last","_pending","_timer",
+    )
+
+    def __init__(self,rate,burst=1,trailing=False,clock=time.monotonic):
+        """TokenBucket constructor
+        Args:
+            rate (float): tokens added per second
+            burst (float): maximum number of tokens held
+            trailing (bool): deliver the latest throttled notification once
+                a token is available
+            clock (callable): returns the time in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.trailing = trailing
+        self.deliver = None
+        self.delivered = 0
+        self.throttled = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._last = clock()
+        self._pending = None
+        self._timer = None
+
+    def take(self,key,args,kwargs):
+        """Takes a token for a notification
+        Returns:
+            allowed (bool): True if the callback is to be invoked now, False
+                if the notification is throttled (and, if trailing, kept
+                for delivery)
+        """
+        with self._lock:
+            tokens = self._refill()
+            if tokens >= 1 and self._pending is None:
+                self._tokens = tokens - 1
+                self.delivered += 1
+                return True
+            self.throttled += 1
+            if not self.trailing:
+                return False
+            self._pending = (key,args,kwargs)
+            if self._timer is None:
+                delay = max(0.0,(1 - tokens) / self.rate)
+                self._timer = threading.Timer(delay,self._expire)
+                self._timer.daemon = True
+                self._timer.start()
+            return False
+
+    def cancel(self):
+        """Discards the throttled notification awaiting delivery (if any)"""
+        with self._lock:
+            self._pending = None
+            timer,self._timer = self._timer,None
+        if timer is not None:
+            timer.cancel()
+
+    def _refill(self):
+        """Internal method: adds the tokens accrued since the last refill
+        and returns the number held.  Must be called with the lock held."""
+        now = self._clock()
+        tokens = self._tokens + (now - self._last) * self.rate
+        self._last = now
+        if tokens > self.burst:
+            tokens = self.burst
+        self._tokens = tokens
+        return tokens
+
+    def _expire(self):
+        """Internal method: delivers the throttled notification kept by a
+        trailing bucket"""
+        with self._lock:
+            pending,self._pending = self._pending,None
+            self._timer = None
+            if pending is None:
+                return
+            # the timer may fire marginally early: the deficit is repaid
+            # by the next refill
+            self._tokens = self._refill() - 1
+            self.delivered += 1
+        self.deliver(*pending)
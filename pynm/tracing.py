@@ -0,0 +1,149 @@
+from .callback import LazyCallback
+
+from collections import deque
+from itertools import count
+from time import perf_counter_ns
+
+import json
+import os
+import threading
+
+# Default number of spans kept by a Tracer
+CAPACITY = 65536
+
+class Tracer:
+    """Dispatch trace recorded by a NotificationManager with tracing enabled
+
+    Each notification posted with `notify` and each callback it invokes is
+    recorded as a span: the thread on which it ran, its start and end times
+    and the notification key (plus the registration id, priority and
+    function of a callback).  Notifications posted by a callback are nested
+    within the callback's span, so that the trace shows the call tree.
+
+    Spans are kept in a ring buffer of fixed capacity: once it is full, each
+    new span discards the oldest.  Recording a span only takes the time, the
+    thread id and a reference to the callback, so that its cost is bounded
+    regardless of the callback; names are only formatted when the trace is
+    exported, as Chrome trace-event JSON (which can be opened in Perfetto
+    or chrome://tracing).
+    """
+    def __init__(self,capacity=CAPACITY,clock=perf_counter_ns):
+        """Tracer constructor
+        Args:
+            capacity (int): maximum number of spans kept
+            clock (callable): returns the time in nanoseconds
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, not {capacity}")
+        self.clock = clock
+        self._spans = deque(maxlen=capacity)
+        self._seq = count()
+        self._base = 0
+
+    def __len__(self):
+        return len(self._spans)
+
+    @property
+    def capacity(self):
+        return self._spans.maxlen
+
+    @property
+    def dropped(self):
+        """Returns the number of spans discarded since the last `clear`
+        because the buffer was full"""
+        try:
+            return self._spans[0][0] - self._base
+        except IndexError:
+            return 0
+
+    def clear(self):
+        """Discards the spans recorded so far"""
+        self._spans.clear()
+        self._base = next(self._seq) + 1
+
+    def record_notify(self,key,fanout,start,end):
+        """Records the span of a notification (times in nanoseconds)"""
+        self._spans.append(
+            (next(self._seq),threading.get_ident(),start,end,key,fanout)
+        )
+
+    def record_callback(self,key,priority,cb_id,cb,start,end):
+        """Records the span of a callback (times in nanoseconds)"""
+        self._spans.append((
+            next(self._seq),threading.get_ident(),start,end,key,
+            (cb_id,priority,cb),
+        ))
+
+    def events(self):
+        """Returns the spans recorded so far as a list of Chrome trace events
+
+        Each span is a complete ("X") event, with its timestamp and duration
+        in microseconds.  Metadata events name the threads still running.
+        """
+        pid = os.getpid()
+        spans = list(self._spans)
+        threads = {t.ident: t.name for t in threading.enumerate()}
+        events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": threads[tid]},
+            }
+            for tid in sorted({span[1] for span in spans})
+            if tid in threads
+        ]
+        for _,tid,start,end,key,info in spans:
+            if info.__class__ is int:
+                name = str(key)
+                cat = "notify"
+                args = {"key": str(key), "callbacks": info}
+            else:
+                cb_id,priority,cb = info
+                name = function_name(cb)
+                cat = "callback"
+                args = {
+                    "key": str(key),
+                    "cb_id": cb_id,
+                    "priority": priority,
+                    "function": name,
+                }
+            events.append({
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": (end - start) / 1000,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            })
+        return events
+
+    def export(self,path):
+        """Writes the spans recorded so far to a file as Chrome trace-event
+        JSON
+        Args:
+            path (str): file path
+
+        Returns:
+            count (int): number of spans written
+        """
+        events = self.events()
+        with open(path,"w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ns"},file)
+        return sum(1 for event in events if event["ph"] == "X")
+
+
+def function_name(cb):
+    """Returns the name of a callback's function, without importing the
+    function of a LazyCallback"""
+    if isinstance(cb,LazyCallback) and not cb.resolved:
+        return cb.target
+    func = cb.func
+    if func is None:
+        return "<collected>"
+    module = getattr(func,"__module__",None)
+    qualname = getattr(func,"__qualname__",None) or repr(func)
+    return f"{module}.{qualname}" if module else qualname
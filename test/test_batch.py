@@ -0,0 +1,162 @@
+import gc
+import threading
+import unittest
+
+from pynm import NotificationManager
+from pynm import Callback
+from pynm import RegistrationError
+
+history = list()
+def cb_a(key,*args,**kwargs):
+    history.append(("a",args,kwargs))
+
+def cb_b(key,*args,**kwargs):
+    history.append(("b",args,kwargs))
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.nm = NotificationManager("test")
+
+    def test_register_many(self):
+        nm = self.nm
+        cb_ids = nm.register_many([
+            ("<<Test>>",cb_a),
+            ("<<Test>>",cb_b,{"priority":1}),
+            ("<<Other>>",Callback(cb_a,1,x=2),{"once":True}),
+        ])
+        self.assertEqual(len(set(cb_ids)),3)
+        self.assertEqual(nm.keys,{"<<Test>>","<<Other>>"})
+        nm.notify("<<Test>>")
+        nm.notify("<<Other>>")
+        nm.notify("<<Other>>")
+        self.assertEqual([h[0] for h in history],["b","a","a"])
+        self.assertEqual(history[2],("a",(1,),{"x":2}))
+        self.assertEqual(nm.keys,{"<<Test>>"})
+
+    def test_register_many_invalid(self):
+        nm = self.nm
+        nm.register("<<Test>>",cb_a)
+        with self.assertRaises(RegistrationError):
+            nm.register_many([
+                ("<<Test>>",cb_b),
+                ("<<Test>>",cb_b,{"priority":"high"}),
+            ])
+        with self.assertRaises(RegistrationError):
+            nm.register_many([("<<Test>>",cb_b,{"args":(1,)})])
+        nm.notify("<<Test>>")
+        self.assertEqual([h[0] for h in history],["a"])
+
+    def test_forget_many(self):
+        nm = self.nm
+        cb_ids = nm.register_many([("<<Test>>",cb_a)]*3 + [("<<Other>>",cb_b)])
+        nm.forget_many(cb_ids[1:] + [12345])
+        self.assertEqual(nm.keys,{"<<Test>>"})
+        nm.notify("<<Test>>")
+        self.assertEqual(len(history),1)
+
+    def test_batch(self):
+        nm = self.nm
+        old_id = nm.register("<<Test>>",cb_a)
+        with nm.batch():
+            new_id = nm.register("<<Test>>",cb_b)
+            nm.forget(cb_id=old_id)
+            # nothing applied until the batch exits
+            nm.notify("<<Test>>")
+            self.assertEqual([h[0] for h in history],["a"])
+        nm.notify("<<Test>>")
+        self.assertEqual([h[0] for h in history],["a","b"])
+        nm.forget(cb_id=new_id)
+        self.assertEqual(nm.keys,set())
+
+    def test_batch_order(self):
+        nm = self.nm
+        with nm.batch():
+            cb_id = nm.register("<<Test>>",cb_a)
+            nm.forget(cb_id=cb_id)
+            nm.register("<<Test>>",cb_b)
+        nm.notify("<<Test>>")
+        self.assertEqual([h[0] for h in history],["b"])
+
+    def test_batch_rollback(self):
+        nm = self.nm
+        cb_id = nm.register("<<Test>>",cb_a)
+        with self.assertRaises(RuntimeError):
+            with nm.batch():
+                nm.register("<<Other>>",cb_b)
+                nm.forget(cb_id=cb_id)
+                raise RuntimeError("abort")
+        self.assertEqual(nm.keys,{"<<Test>>"})
+
+    def test_batch_weak_collected(self):
+        class Handler:
+            def m(self,key):
+                history.append(key)
+        nm = self.nm
+        a = Handler()
+        with nm.batch():
+            nm.register("<<Test>>",a.m,weak=True,replay=True)
+            del a
+            gc.collect()
+        self.assertEqual(nm.keys,set())
+        self.assertEqual(nm.collected,1)
+        nm.register("<<Other>>",cb_a)
+        self.assertEqual(nm.keys,{"<<Other>>"})
+        self.assertEqual(nm.collected,1)
+
+    def test_nested_batch(self):
+        nm = self.nm
+        with nm.batch():
+            nm.register("<<Test>>",cb_a)
+            with self.assertRaises(RegistrationError):
+                nm.register_many([("<<Test>>",cb_b),("<<Test>>",42)])
+            with nm.batch():
+                nm.register("<<Other>>",cb_b)
+            self.assertEqual(nm.keys,set())
+        self.assertEqual(nm.keys,{"<<Test>>","<<Other>>"})
+        nm.notify("<<Test>>")
+        self.assertEqual([h[0] for h in history],["a"])
+
+    def test_batch_other_threads(self):
+        nm = self.nm
+        entered = threading.Event()
+        release = threading.Event()
+
+        def other():
+            with nm.batch():
+                entered.wait()
+                release.wait()
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        try:
+            entered.set()
+            # registrations on this thread are not part of the other's batch
+            nm.register("<<Test>>",cb_a)
+            self.assertEqual(nm.keys,{"<<Test>>"})
+        finally:
+            release.set()
+            thread.join()
+
+    def test_batch_atomic(self):
+        nm = self.nm
+        sizes = set()
+        stop = threading.Event()
+
+        def count(key,n):
+            pass
+
+        def post():
+            while not stop.is_set():
+                sizes.add(len(nm._plan("<<Test>>")))
+
+        thread = threading.Thread(target=post)
+        thread.start()
+        try:
+            for _ in range(20):
+                cb_ids = nm.register_many([("<<Test>>",count)]*50)
+                nm.forget_many(cb_ids)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertLessEqual(sizes,{0,50})
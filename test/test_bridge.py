@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from pynm import NotificationManager
+from pynm import Bridge
+from pynm import RegistrationError
+
+class Recorder:
+    def __init__(self):
+        self.history = list()
+        self.event = threading.Event()
+    def __call__(self,key,*args,**kwargs):
+        self.history.append((key,args,kwargs))
+        self.event.set()
+
+def wait_for(condition,timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+def remote_worker(path,n):
+    """Posts notifications from another process"""
+    nm = NotificationManager("remote")
+    bridge = Bridge(nm,["jobs.*"])
+    bridge.connect(path)
+    for i in range(n):
+        nm.notify("jobs.done",i,worker=os.getpid())
+    bridge.close(timeout=5)
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name,"bridge.sock")
+        self.bridges = list()
+
+    def tearDown(self):
+        for bridge in self.bridges:
+            bridge.close(timeout=5)
+        self.tmpdir.cleanup()
+
+    def bridge(self,nm,keys,listen=False):
+        bridge = Bridge(nm,keys)
+        self.bridges.append(bridge)
+        if listen:
+            bridge.listen(self.path)
+        else:
+            bridge.connect(self.path)
+        return bridge
+
+    def test_forward(self):
+        hub_nm = NotificationManager("hub")
+        spoke_nm = NotificationManager("spoke")
+        hub = self.bridge(hub_nm,["<<Test>>"],listen=True)
+        spoke = self.bridge(spoke_nm,["<<Test>>"])
+        self.assertTrue(wait_for(lambda: hub.peers == 1))
+
+        hub_rec,spoke_rec = Recorder(),Recorder()
+        hub_nm.register("<<Test>>",hub_rec)
+        spoke_nm.register("<<Test>>",spoke_rec)
+
+        spoke_nm.notify("<<Test>>",1,x=2)
+        self.assertTrue(hub_rec.event.wait(5))
+        self.assertEqual(hub_rec.history,[("<<Test>>",(1,),{"x":2})])
+        self.assertEqual(spoke_rec.history,[("<<Test>>",(1,),{"x":2})])
+
+        # not echoed back to the spoke
+        hub_nm.notify("<<Test>>",3)
+        self.assertTrue(wait_for(lambda: len(spoke_rec.history) == 2))
+        self.assertTrue(hub.flush(5) and spoke.flush(5))
+        time.sleep(0.05)
+        self.assertEqual(len(hub_rec.history),2)
+        self.assertEqual(len(spoke_rec.history),2)
+        self.assertEqual(spoke.sent,1)
+        self.assertEqual(hub.received,1)
+
+    def test_selected_keys(self):
+        hub_nm = NotificationManager("hub")
+        spoke_nm = NotificationManager("spoke")
+        hub = self.bridge(hub_nm,[],listen=True)
+        spoke = self.bridge(spoke_nm,["orders.**"])
+        self.assertTrue(wait_for(lambda: hub.peers == 1))
+        rec = Recorder()
+        hub_nm.register("**",rec)
+
+        spoke_nm.notify("private")
+        spoke_nm.notify("orders.eu.created")
+        self.assertTrue(rec.event.wait(5))
+        spoke.flush(5)
+        time.sleep(0.05)
+        self.assertEqual([k for k,_,_ in rec.history],["orders.eu.created"])
+
+    def test_relay(self):
+        hub_nm = NotificationManager("hub")
+        hub = self.bridge(hub_nm,["<<Test>>"],listen=True)
+        managers = [NotificationManager(f"spoke{i}") for i in range(2)]
+        recorders = [Recorder() for _ in managers]
+        for nm,rec in zip(managers,recorders):
+            self.bridge(nm,["<<Test>>"])
+            nm.register("<<Test>>",rec)
+        self.assertTrue(wait_for(lambda: hub.peers == 2))
+
+        managers[0].notify("<<Test>>","hello")
+        self.assertTrue(recorders[1].event.wait(5))
+        self.assertEqual(recorders[1].history,[("<<Test>>",("hello",),{})])
+        self.assertEqual(len(recorders[0].history),1)
+
+    def test_batches(self):
+        hub_nm = NotificationManager("hub")
+        spoke_nm = NotificationManager("spoke")
+        hub = self.bridge(hub_nm,[],listen=True)
+        spoke = self.bridge(spoke_nm,["<<Test>>"])
+        self.assertTrue(wait_for(lambda: hub.peers == 1))
+        rec = Recorder()
+        hub_nm.register("<<Test>>",rec)
+
+        spoke_nm.notify_many("<<Test>>",range(1000))
+        self.assertTrue(wait_for(lambda: len(rec.history) == 1000))
+        self.assertEqual([args[0] for _,args,_ in rec.history],list(range(1000)))
+        self.assertEqual(spoke.sent,1000)
+        self.assertLessEqual(spoke.batches,1000)
+
+    def test_unpicklable(self):
+        spoke_nm = NotificationManager("spoke")
+        self.bridge(NotificationManager("hub"),[],listen=True)
+        self.bridge(spoke_nm,["<<Test>>"])
+        with self.assertLogs(level="WARNING") as cm:
+            spoke_nm.notify("<<Test>>",lambda: None)
+        self.assertEqual(len(cm.records),1)
+
+    def test_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(1) as executor:
+            nm = NotificationManager(executor=executor)
+            with self.assertRaises(RegistrationError):
+                Bridge(nm,["<<Test>>"])
+
+    def test_close(self):
+        nm = NotificationManager("hub")
+        bridge = Bridge(nm,["<<Test>>"])
+        bridge.listen(self.path)
+        self.assertEqual(nm.keys,{"<<Test>>"})
+        bridge.close(timeout=5)
+        self.assertEqual(nm.keys,set())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_processes(self):
+        nm = NotificationManager("hub")
+        self.bridge(nm,[],listen=True)
+        rec = Recorder()
+        nm.register("jobs.done",rec)
+
+        ctx = multiprocessing.get_context("spawn")
+        workers = [
+            ctx.Process(target=remote_worker,args=(self.path,10))
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+            self.assertEqual(worker.exitcode,0)
+        self.assertTrue(wait_for(lambda: len(rec.history) == 20))
+        pids = {kwargs["worker"] for _,_,kwargs in rec.history}
+        self.assertEqual(pids,{w.pid for w in workers})
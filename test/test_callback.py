@@ -1,6 +1,8 @@
+import gc
 import unittest
 
 from pynm import Callback
+from pynm import WeakCallback
 
 from pynm.exceptions import CallbackFuncError
 from pynm.exceptions import CallbackFailed
@@ -38,6 +40,13 @@ class ClassCB:
         self.result.clear()
 
 
+class SlottedCB:
+    __slots__ = ()
+
+    def __call__(self,key,*args,**kwargs):
+        pass
+
+
 class Tests(unittest.TestCase):
     def setUp(self):
         result.clear()
@@ -114,3 +123,56 @@ class Tests(unittest.TestCase):
 
 
 
+    def test_callback_args_kwargs(self):
+        cb = Callback(func_nokey,1,2,x=5,y=6)
+        cb(3,y=7,z=8)
+        self.assertEqual( result, {
+            'args':(1,2,3),
+            'kwargs':{"x":5,"y":7,"z":8},
+        })
+        self.assertEqual(cb.kwargs,{"x":5,"y":6})
+
+    def test_callback_kwargs_unmodified(self):
+        cb = Callback(func_cb,x=1)
+        cb(key="<<Test>>",x=2)
+        cb(key="<<Test>>")
+        self.assertEqual( result, {
+            'key':"<<Test>>",
+            'args':(),
+            'kwargs':{"x":1},
+        })
+        self.assertEqual(cb.kwargs,{"x":1})
+
+    def test_return_value(self):
+        cb = Callback(lambda *args,**kwargs: (args,kwargs),1,x=2)
+        self.assertEqual(cb(3,key="k",y=4), (("k",1,3),{"x":2,"y":4}))
+
+    def test_slots(self):
+        cb = Callback(func_cb)
+        with self.assertRaises(AttributeError):
+            cb.junk = 1
+    def test_weak_callback(self):
+        a = ClassCB()
+        collected = list()
+        cb = WeakCallback(a.func,1,x=1,on_collect=lambda: collected.append(1))
+        cb(2,key="<<Test>>",y=2)
+        self.assertEqual(a.result, {
+            'invoked':'func',
+            'key':"<<Test>>",
+            'args':(1,2),
+            'kwargs':{'x':1,'y':2},
+        })
+        self.assertTrue(cb.alive)
+
+        del a
+        gc.collect()
+        self.assertFalse(cb.alive)
+        self.assertIsNone(cb.func)
+        self.assertEqual(collected,[1])
+        self.assertIsNone(cb(key="<<Test>>"))
+
+    def test_weak_callback_invalid(self):
+        with self.assertRaises(CallbackFuncError):
+            WeakCallback("this")
+        with self.assertRaises(TypeError):
+            WeakCallback(SlottedCB())
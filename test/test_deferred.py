@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+
+from pynm import NotificationManager
+
+history = list()
+def func_cb(key,*args,**kwargs):
+    history.append((key,args,kwargs))
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.nm = NotificationManager()
+        self.nm.register("<<Test>>",func_cb)
+        self.nm.register("<<Other>>",func_cb)
+
+    def test_flush(self):
+        nm = self.nm
+        for i in range(5):
+            nm.notify_deferred("<<Test>>",i,x=i)
+        nm.notify_deferred("<<Other>>")
+        self.assertEqual(history,[])
+        self.assertEqual(nm.pending,2)
+        self.assertEqual(nm._deferred.coalesced,4)
+
+        self.assertEqual(nm.flush("<<Other>>"),1)
+        self.assertEqual(history,[("<<Other>>",(),{})])
+        self.assertEqual(nm.flush(),1)
+        self.assertEqual(nm.flush(),0)
+        self.assertEqual(nm.pending,0)
+        self.assertEqual(history[1:],[("<<Test>>",(4,),{"x":4})])
+
+    def test_policies(self):
+        nm = self.nm
+        nm.notify_deferred("<<Test>>",1,x=1,coalesce="first")
+        nm.notify_deferred("<<Test>>",2,y=2,coalesce="first")
+        nm.flush()
+        nm.notify_deferred("<<Test>>",1,x=1,z=1,coalesce="merge")
+        nm.notify_deferred("<<Test>>",2,y=2,z=2,coalesce="merge")
+        nm.flush()
+        total = lambda args,kwargs,new_args,new_kwargs: (
+            (args[0]+new_args[0],),kwargs
+        )
+        for i in range(1,5):
+            nm.notify_deferred("<<Test>>",i,coalesce=total)
+        nm.flush()
+
+        self.assertEqual(history,[
+            ("<<Test>>",(1,),{"x":1}),
+            ("<<Test>>",(2,),{"x":1,"y":2,"z":2}),
+            ("<<Test>>",(10,),{}),
+        ])
+
+        with self.assertRaises(ValueError):
+            nm.notify_deferred("<<Test>>",coalesce="never")
+        with self.assertRaises(ValueError):
+            nm.notify_deferred("<<Test>>",by="time")
+
+    def test_by_args(self):
+        nm = self.nm
+        for i in (1,2,1,2,1):
+            nm.notify_deferred("<<Test>>",i,by="args",x="a")
+        nm.notify_deferred("<<Test>>",[1],by="args")
+        nm.notify_deferred("<<Test>>",[1],by="args")
+        self.assertEqual(nm.pending,4)
+        nm.flush()
+        self.assertEqual(history,[
+            ("<<Test>>",(1,),{"x":"a"}),
+            ("<<Test>>",(2,),{"x":"a"}),
+            ("<<Test>>",([1],),{}),
+            ("<<Test>>",([1],),{}),
+        ])
+
+    def test_window(self):
+        nm = self.nm
+        delivered = threading.Event()
+        nm.register("<<Test>>",lambda key,*args,**kwargs: delivered.set())
+        for i in range(10):
+            nm.notify_deferred("<<Test>>",i,window=0.05)
+        self.assertTrue(delivered.wait(timeout=5))
+        self.assertEqual(history,[("<<Test>>",(9,),{})])
+        self.assertEqual(nm.pending,0)
+
+    def test_window_restarted(self):
+        nm = self.nm
+        delivered = threading.Event()
+        nm.register("<<Test>>",lambda key,*args,**kwargs: delivered.set())
+        # a burst longer than the window is still delivered once
+        for i in range(6):
+            nm.notify_deferred("<<Test>>",i,window=0.1)
+            time.sleep(0.03)
+        self.assertEqual(history,[])
+        self.assertTrue(delivered.wait(timeout=5))
+        time.sleep(0.15)
+        self.assertEqual(history,[("<<Test>>",(5,),{})])
+
+    def test_window_flushed(self):
+        nm = self.nm
+        nm.notify_deferred("<<Test>>",1,window=60)
+        self.assertEqual(nm.flush(),1)
+        self.assertEqual(history,[("<<Test>>",(1,),{})])
@@ -0,0 +1,130 @@
+import threading
+import time
+import unittest
+
+from pynm import NotificationManager
+from pynm import QueueOverflow
+from pynm.dispatcher import Dispatcher
+
+history = list()
+def func_cb(key,*args,**kwargs):
+    history.append((key,args,kwargs))
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.nm = NotificationManager("test")
+        self.nm.register("<<Test>>",func_cb)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.nm.stop_dispatcher(timeout=5)
+
+    def blocker(self):
+        """Registers a callback which blocks the dispatcher thread until
+        released, and posts a notification to it"""
+        started = threading.Event()
+        def block(key):
+            started.set()
+            self.release.wait(timeout=5)
+        self.nm.register("<<Block>>",block)
+        self.nm.post("<<Block>>")
+        self.assertTrue(started.wait(timeout=5))
+
+    def test_post(self):
+        nm = self.nm
+        for i in range(10):
+            self.assertTrue(nm.post("<<Test>>",i,x=i))
+        self.assertTrue(nm.drain(timeout=5))
+        self.assertEqual(history,[("<<Test>>",(i,),{"x":i}) for i in range(10)])
+        self.assertEqual(nm.dispatcher.posted,10)
+        self.assertEqual(nm.dispatcher.dispatched,10)
+        self.assertEqual(nm.dispatcher.depth,0)
+        self.assertEqual(nm.dispatcher.lag,0)
+        self.assertTrue(nm.dispatcher._threads[0].name.startswith("pynm-test"))
+
+    def test_drop_newest(self):
+        nm = self.nm
+        nm.start_dispatcher(maxsize=2,overflow="drop_newest")
+        self.blocker()
+        results = [nm.post("<<Test>>",i) for i in range(4)]
+        self.assertEqual(results,[True,True,False,False])
+        self.assertEqual(nm.dispatcher.depth,2)
+        self.assertEqual(nm.dispatcher.dropped,2)
+        time.sleep(0.01)
+        self.assertGreater(nm.dispatcher.lag,0)
+        self.release.set()
+        self.assertTrue(nm.drain(timeout=5))
+        self.assertEqual([args for _,args,_ in history],[(0,),(1,)])
+
+    def test_drop_oldest(self):
+        nm = self.nm
+        nm.start_dispatcher(maxsize=2,overflow="drop_oldest")
+        self.blocker()
+        for i in range(4):
+            self.assertTrue(nm.post("<<Test>>",i))
+        self.assertEqual(nm.dispatcher.dropped,2)
+        self.release.set()
+        self.assertTrue(nm.drain(timeout=5))
+        self.assertEqual([args for _,args,_ in history],[(2,),(3,)])
+
+    def test_raise(self):
+        nm = self.nm
+        nm.start_dispatcher(maxsize=1,overflow="raise")
+        self.blocker()
+        nm.post("<<Test>>",1)
+        with self.assertRaises(QueueOverflow):
+            nm.post("<<Test>>",2)
+
+    def test_block(self):
+        nm = self.nm
+        nm.start_dispatcher(maxsize=1,overflow="block")
+        self.blocker()
+        nm.post("<<Test>>",1)
+        posted = threading.Event()
+        def post():
+            nm.post("<<Test>>",2)
+            posted.set()
+        threading.Thread(target=post).start()
+        self.assertFalse(posted.wait(timeout=0.05))
+        self.release.set()
+        self.assertTrue(posted.wait(timeout=5))
+        self.assertTrue(nm.drain(timeout=5))
+        self.assertEqual([args for _,args,_ in history],[(1,),(2,)])
+
+    def test_drain_timeout(self):
+        nm = self.nm
+        self.blocker()
+        self.assertFalse(nm.drain(timeout=0.01))
+        self.release.set()
+        self.assertTrue(nm.drain(timeout=5))
+
+    def test_stop(self):
+        nm = self.nm
+        nm.start_dispatcher(threads=2)
+        with self.assertRaises(RuntimeError):
+            nm.start_dispatcher()
+        for i in range(5):
+            nm.post("<<Test>>",i)
+        self.assertTrue(nm.stop_dispatcher(timeout=5))
+        self.assertEqual(len(history),5)
+        self.assertFalse(nm.dispatcher.running)
+        with self.assertRaises(RuntimeError):
+            nm.dispatcher.post("<<Test>>",(),{})
+
+        # posting again does not restart the dispatcher, start_dispatcher does
+        with self.assertRaises(RuntimeError):
+            nm.post("<<Test>>",5)
+        nm.start_dispatcher()
+        nm.post("<<Test>>",5)
+        self.assertTrue(nm.drain(timeout=5))
+        self.assertEqual(len(history),6)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Dispatcher(func_cb,overflow="spill")
+        with self.assertRaises(ValueError):
+            Dispatcher(func_cb,maxsize=0)
+        with self.assertRaises(ValueError):
+            Dispatcher(func_cb,threads=0)
@@ -0,0 +1,174 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from pynm import NotificationManager
+from pynm import CallbackFailed
+from pynm import TooManyFailures
+from pynm import LogErrors
+from pynm import RateLimitedLog
+from pynm import CollectErrors
+from pynm import RaiseAfter
+from pynm import CircuitBreaker
+
+history = list()
+def ok_cb(key,*args,**kwargs):
+    history.append(key)
+
+def fail_cb(key,*args,**kwargs):
+    raise RuntimeError("failed")
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.nm = NotificationManager("test")
+        self.fail_id = self.nm.register("<<Test>>",fail_cb,priority=1)
+        self.ok_id = self.nm.register("<<Test>>",ok_cb)
+
+    def test_default(self):
+        nm = self.nm
+        self.assertIsInstance(nm.error_policy,LogErrors)
+        with self.assertLogs(level="WARNING") as cm:
+            nm.notify("<<Test>>")
+        self.assertEqual(len(cm.records),1)
+        self.assertIn(f"callback: {self.fail_id}",cm.records[0].getMessage())
+
+    def test_set_policy(self):
+        nm = self.nm
+        policy = CollectErrors()
+        previous = nm.set_error_policy(policy)
+        self.assertIsInstance(previous,LogErrors)
+        self.assertIs(nm.error_policy,policy)
+        self.assertIs(nm.set_error_policy(None),policy)
+        self.assertIsInstance(nm.error_policy,LogErrors)
+
+    def test_rate_limited(self):
+        nm = self.nm
+        policy = RateLimitedLog(limit=2,interval=60)
+        nm.set_error_policy(policy)
+        with self.assertLogs(level="WARNING") as cm:
+            for _ in range(5):
+                nm.notify("<<Test>>")
+        self.assertEqual(len(cm.records),2)
+        self.assertEqual(history,["<<Test>>"]*5)
+        self.assertEqual(policy.counts,{("<<Test>>",self.fail_id):5})
+
+        with self.assertLogs(level="WARNING") as cm:
+            policy.flush()
+        self.assertEqual(len(cm.records),1)
+        message = cm.records[0].getMessage()
+        self.assertTrue(message.startswith("3 further failures"))
+
+    def test_rate_limited_interval(self):
+        nm = self.nm
+        nm.set_error_policy(RateLimitedLog(limit=1,interval=60))
+        with mock.patch("pynm.errors.time.monotonic",return_value=1000.0):
+            with self.assertLogs(level="WARNING") as cm:
+                nm.notify("<<Test>>")
+                nm.notify("<<Test>>")
+        self.assertEqual(len(cm.records),1)
+        with mock.patch("pynm.errors.time.monotonic",return_value=1061.0):
+            with self.assertLogs(level="WARNING") as cm:
+                nm.notify("<<Test>>")
+        # summary of the previous interval, then the new failure
+        self.assertEqual(len(cm.records),2)
+        self.assertIn("1 further failures",cm.records[0].getMessage())
+
+    def test_rate_limited_expiry(self):
+        nm = self.nm
+        nm.set_error_policy(RateLimitedLog(limit=1,interval=0.05))
+        with self.assertLogs(level="WARNING") as cm:
+            for _ in range(4):
+                nm.notify("<<Test>>")
+            # the summary is logged without any further failure
+            deadline = time.monotonic() + 2
+            while len(cm.records) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(len(cm.records),2)
+        self.assertIn("3 further failures",cm.records[1].getMessage())
+
+    def test_lazy_formatting(self):
+        nm = self.nm
+        nm.set_error_policy(RateLimitedLog(limit=1))
+        with mock.patch("pynm.callback.Callback.__repr__") as repr_:
+            repr_.return_value = "cb"
+            with self.assertLogs(level="WARNING"):
+                for _ in range(3):
+                    nm.notify("<<Test>>")
+            # only the record emitted formats the callback
+            self.assertEqual(repr_.call_count,1)
+
+    def test_collect(self):
+        nm = self.nm
+        policy = CollectErrors(limit=2)
+        nm.set_error_policy(policy)
+        with self.assertNoLogs(level="WARNING"):
+            for i in range(3):
+                nm.notify("<<Test>>",i)
+        self.assertEqual(len(policy),2)
+        self.assertEqual(policy.dropped,1)
+        failures = policy.take()
+        self.assertEqual(len(policy),0)
+        self.assertEqual([f.key for f in failures],["<<Test>>"]*2)
+        self.assertEqual([f.cb_id for f in failures],[self.fail_id]*2)
+        self.assertIsInstance(failures[0].error,CallbackFailed)
+        self.assertIsInstance(failures[0].error.reason,RuntimeError)
+
+    def test_raise_after(self):
+        nm = self.nm
+        policy = RaiseAfter(2,policy=CollectErrors())
+        nm.set_error_policy(policy)
+        nm.notify("<<Test>>")
+        self.assertEqual(history,["<<Test>>"])
+        with self.assertRaises(TooManyFailures) as cm:
+            nm.notify("<<Test>>")
+        self.assertEqual(cm.exception.count,2)
+        self.assertIsInstance(cm.exception.error,CallbackFailed)
+        # the failure aborted the notification
+        self.assertEqual(history,["<<Test>>"])
+        policy.reset()
+        self.assertEqual(policy.count,0)
+
+    def test_raise_after_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            nm = NotificationManager(
+                "test",executor=executor,error_policy=RaiseAfter(1)
+            )
+            nm.register("<<Test>>",fail_cb,priority=1)
+            nm.register("<<Test>>",ok_cb,priority=1)
+            nm.register("<<Test>>",lambda key: history.append("tier 0"))
+            for _ in range(3):
+                with self.assertLogs(level="WARNING"):
+                    with self.assertRaises(TooManyFailures):
+                        nm.notify("<<Test>>")
+        # the failure aborted the notification after its tier
+        self.assertEqual(history,["<<Test>>"]*3)
+
+    def test_circuit_breaker(self):
+        nm = self.nm
+        policy = CircuitBreaker(threshold=3,policy=CollectErrors())
+        nm.set_error_policy(policy)
+        with self.assertLogs(level="WARNING") as cm:
+            for _ in range(5):
+                nm.notify("<<Test>>")
+        self.assertEqual(len(cm.records),1)
+        self.assertIn("disabled after 3 failures",cm.records[0].getMessage())
+        self.assertEqual(policy.tripped,[self.fail_id])
+        self.assertEqual(history,["<<Test>>"]*5)
+        self.assertEqual(len(nm.error_policy._policy),3)
+        nm.forget(cb_id=self.ok_id)
+        self.assertEqual(nm.keys,set())
+
+    def test_circuit_breaker_window(self):
+        nm = self.nm
+        policy = CircuitBreaker(threshold=2,window=10,policy=CollectErrors())
+        nm.set_error_policy(policy)
+        for now in (0.0,20.0,40.0):
+            with mock.patch("pynm.errors.time.monotonic",return_value=now):
+                nm.notify("<<Test>>")
+        self.assertEqual(policy.tripped,[])
+        with mock.patch("pynm.errors.time.monotonic",return_value=45.0):
+            with self.assertLogs(level="WARNING"):
+                nm.notify("<<Test>>")
+        self.assertEqual(policy.tripped,[self.fail_id])
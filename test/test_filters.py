@@ -0,0 +1,112 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pynm import NotificationManager
+from pynm import RegistrationError
+from pynm.filters import FilteredPlan
+
+history = list()
+def make_cb(name):
+    def cb(key,*args,**kwargs):
+        history.append(name)
+    return cb
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.nm = NotificationManager("test")
+
+    def test_where(self):
+        nm = self.nm
+        nm.register("<<Test>>",make_cb("all"))
+        for tenant in range(100):
+            nm.register("<<Test>>",make_cb(tenant),where={"tenant_id":tenant})
+        self.assertIs(type(nm._plan("<<Test>>")),FilteredPlan)
+
+        nm.notify("<<Test>>",tenant_id=42)
+        self.assertEqual(history,["all",42])
+        history.clear()
+        nm.notify("<<Test>>",tenant_id=1000)
+        self.assertEqual(history,["all"])
+        history.clear()
+        nm.notify("<<Test>>")
+        self.assertEqual(history,["all"])
+        history.clear()
+        nm.notify("<<Test>>",tenant_id=[42])
+        self.assertEqual(history,["all"])
+
+    def test_where_priority(self):
+        nm = self.nm
+        nm.register("<<Test>>",make_cb("low"),priority=-1)
+        nm.register("<<Test>>",make_cb("high"),priority=10)
+        nm.register("<<Test>>",make_cb("f5"),priority=5,where={"t":1})
+        nm.register("<<Test>>",make_cb("f20"),priority=20,where={"t":1})
+        nm.register("<<Test>>",make_cb("f0"),where={"t":1,"region":"eu"})
+        nm.register("<<Test>>",make_cb("other"),priority=100,where={"t":2})
+        nm.notify("<<Test>>",t=1,region="eu")
+        self.assertEqual(history,["f20","high","f5","f0","low"])
+
+    def test_where_multiple_names(self):
+        nm = self.nm
+        nm.register("<<Test>>",make_cb("eu"),where={"region":"eu","t":1})
+        nm.register("<<Test>>",make_cb("us"),where={"t":1,"region":"us"})
+        nm.notify("<<Test>>",t=1,region="us")
+        nm.notify("<<Test>>",t=1)
+        self.assertEqual(history,["us"])
+
+    def test_where_pattern(self):
+        nm = self.nm
+        nm.register("orders.*",make_cb("eu"),where={"region":"eu"})
+        nm.register("orders.created",make_cb("all"))
+        nm.notify("orders.created",region="eu")
+        nm.notify("orders.created",region="us")
+        self.assertEqual(history,["all","eu","all"])
+
+    def test_where_forget(self):
+        nm = self.nm
+        cb_id = nm.register("<<Test>>",make_cb("f"),where={"t":1})
+        nm.notify("<<Test>>",t=1)
+        nm.forget(cb_id=cb_id)
+        nm.notify("<<Test>>",t=1)
+        self.assertEqual(history,["f"])
+
+    def test_where_invalid(self):
+        nm = self.nm
+        with self.assertRaises(RegistrationError):
+            nm.register("<<Test>>",make_cb("f"),where={"t":[1]})
+        with self.assertRaises(RegistrationError):
+            nm.register("<<Test>>",make_cb("f"),when=5)
+
+    def test_when(self):
+        nm = self.nm
+        nm.register("<<Test>>",make_cb("big"),when=lambda key,n: n > 10)
+        nm.register("<<Test>>",make_cb("all"),priority=-1)
+        nm.notify("<<Test>>",5)
+        nm.notify("<<Test>>",50)
+        self.assertEqual(history,["all","big","all"])
+
+    def test_when_fails(self):
+        nm = self.nm
+        nm.register("<<Test>>",make_cb("f"),when=lambda key: 1/0)
+        with self.assertLogs(level="WARNING") as cm:
+            nm.notify("<<Test>>")
+        self.assertEqual(len(cm.records),1)
+        self.assertEqual(history,[])
+
+    def test_when_notify_many(self):
+        nm = self.nm
+        seen = list()
+        nm.register(
+            "<<Test>>",lambda key,p: seen.append(p),when=lambda key,p: p % 2
+        )
+        nm.notify_many("<<Test>>",range(6))
+        self.assertEqual(seen,[1,3,5])
+
+    def test_nowait(self):
+        with ThreadPoolExecutor(2) as executor:
+            nm = NotificationManager(executor=executor)
+            nm.register("<<Test>>",make_cb("f"),where={"t":1})
+            nm.register("<<Test>>",make_cb("w"),when=lambda key,**kw: False)
+            futures = nm.notify_nowait("<<Test>>",t=1)
+            self.assertEqual([f.result() for f in futures],[None,None])
+        self.assertEqual(history,["f"])
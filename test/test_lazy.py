@@ -0,0 +1,121 @@
+import importlib
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from pynm import NotificationManager
+from pynm import ShardedNotificationManager
+from pynm import CollectErrors
+from pynm import RegistrationError
+
+history = list()
+def eager_cb(key,*args,**kwargs):
+    history.append(("eager",key,args,kwargs))
+
+PLUGIN = textwrap.dedent('''
+    from test.test_lazy import history
+    def on_event(key,*args,**kwargs):
+        history.append(("{name}",key,args,kwargs))
+''')
+
+ENTRY_POINTS = textwrap.dedent('''
+    [pynm_test.listeners]
+    <<Alpha>> = pynm_plugin_a:on_event
+    <<Beta>> = pynm_plugin_b:on_event
+''')
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        root = self.tmpdir.name
+        for name in ("pynm_plugin_a","pynm_plugin_b"):
+            with open(os.path.join(root,f"{name}.py"),"w") as f:
+                f.write(PLUGIN.format(name=name))
+        info = os.path.join(root,"pynm_plugins-1.0.dist-info")
+        os.mkdir(info)
+        with open(os.path.join(info,"METADATA"),"w") as f:
+            f.write("Metadata-Version: 2.1\nName: pynm-plugins\nVersion: 1.0\n")
+        with open(os.path.join(info,"entry_points.txt"),"w") as f:
+            f.write(ENTRY_POINTS)
+        sys.path.insert(0,root)
+        importlib.invalidate_caches()
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir.name)
+        for name in ("pynm_plugin_a","pynm_plugin_b"):
+            sys.modules.pop(name,None)
+        self.tmpdir.cleanup()
+
+    def test_register_import_path(self):
+        nm = NotificationManager()
+        nm.register("<<Alpha>>","pynm_plugin_a:on_event",1,x=2)
+        self.assertNotIn("pynm_plugin_a",sys.modules)
+        nm.notify("<<Beta>>")
+        self.assertNotIn("pynm_plugin_a",sys.modules)
+        nm.notify("<<Alpha>>",3)
+        nm.notify("<<Alpha>>")
+        self.assertIn("pynm_plugin_a",sys.modules)
+        self.assertEqual(history,[
+            ("pynm_plugin_a","<<Alpha>>",(1,3),{"x":2}),
+            ("pynm_plugin_a","<<Alpha>>",(1,),{"x":2}),
+        ])
+        nm.forget(callback="pynm_plugin_a:on_event")
+        self.assertEqual(nm.keys,set())
+
+    def test_invalid_import_path(self):
+        nm = NotificationManager()
+        with self.assertRaises(RegistrationError):
+            nm.register("<<Alpha>>","pynm_plugin_a.on_event")
+        with self.assertRaises(RegistrationError):
+            nm.register("<<Alpha>>","pynm_plugin_a:on_event",weak=True)
+
+    def test_priority_order(self):
+        nm = NotificationManager()
+        nm.register("<<Alpha>>",eager_cb,priority=1)
+        nm.register("<<Alpha>>","pynm_plugin_a:on_event",priority=2)
+        nm.register("<<Alpha>>","pynm_plugin_b:on_event",priority=1)
+        nm.register("<<Alpha>>",eager_cb,priority=0)
+        nm.notify("<<Alpha>>")
+        self.assertEqual([h[0] for h in history],
+            ["pynm_plugin_a","eager","pynm_plugin_b","eager"])
+
+    def test_import_failure(self):
+        nm = NotificationManager(error_policy=CollectErrors())
+        cb_id = nm.register("<<Alpha>>","pynm_plugin_x:on_event")
+        nm.register("<<Alpha>>",eager_cb,priority=-1)
+        with self.assertNoLogs(level="WARNING"):
+            nm.notify("<<Alpha>>")
+            nm.notify("<<Alpha>>")
+        failures = nm.error_policy.take()
+        self.assertEqual([f.cb_id for f in failures],[cb_id]*2)
+        self.assertIsInstance(failures[0].error.reason,ImportError)
+        self.assertEqual(len(history),2)
+
+    def test_entry_points(self):
+        nm = NotificationManager()
+        cb_ids = nm.register_entry_points("pynm_test.listeners")
+        self.assertEqual(len(cb_ids),2)
+        self.assertEqual(nm.keys,{"<<Alpha>>","<<Beta>>"})
+        self.assertNotIn("pynm_plugin_a",sys.modules)
+        nm.notify("<<Beta>>",1)
+        self.assertNotIn("pynm_plugin_a",sys.modules)
+        self.assertEqual(history,[("pynm_plugin_b","<<Beta>>",(1,),{})])
+        self.assertEqual(nm.register_entry_points("pynm_test.missing"),[])
+
+    def test_entry_points_key(self):
+        nm = NotificationManager()
+        nm.register("<<Test>>",eager_cb)
+        nm.register_entry_points("pynm_test.listeners","<<Test>>",priority=1)
+        nm.notify("<<Test>>")
+        self.assertEqual([h[0] for h in history],
+            ["pynm_plugin_a","pynm_plugin_b","eager"])
+
+    def test_sharded_entry_points(self):
+        nm = ShardedNotificationManager(4)
+        cb_ids = nm.register_entry_points("pynm_test.listeners")
+        self.assertEqual(len(cb_ids),2)
+        nm.notify("<<Alpha>>")
+        self.assertEqual(history,[("pynm_plugin_a","<<Alpha>>",(),{})])
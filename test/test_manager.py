@@ -1,7 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncio
+import gc
+import threading
 import unittest
+import weakref
 
 from pynm import NotificationManager
 from pynm import Callback
+from pynm import CallbackFailed
+from pynm import RegistrationError
+from pynm.callback import callable_id
 
 def null_cb():
     pass
@@ -23,6 +32,12 @@ class Accumulator:
     def __call__(self,key,*,x="",y=""):
         cb_hist.append(f"{key}:{self.name}|{x}|{y}")
 
+class SlottedCB:
+    __slots__ = ()
+
+    def __call__(self,key,*args,**kwargs):
+        pass
+
 class Tests(unittest.TestCase):
     def setUp(self):
         reset_hist()
@@ -355,3 +370,433 @@ class Tests(unittest.TestCase):
             {"<<Test2>>:1|2","<<Test2>>:a|1|2","<<Test2>>:cb|2"},
         )
 
+    def test_plan_invalidation(self):
+        nm = NotificationManager()
+        nm.register("<<Test>>",func_cb,x=1,priority=1)
+        nm.notify("<<Test>>",y=1)
+
+        cb_id = nm.register("<<Test>>",func_cb,x=2,priority=2)
+        nm.notify("<<Test>>",y=2)
+
+        nm.forget(cb_id=cb_id)
+        nm.notify("<<Test>>",y=3)
+
+        nm.reset()
+        nm.notify("<<Test>>",y=4)
+
+        nm.register("<<Test>>",func_cb,x=5)
+        nm.notify("<<Test>>",y=5)
+
+        self.assertHistory([
+            "<<Test>>:1|1",
+            "<<Test>>:2|2",
+            "<<Test>>:1|2",
+            "<<Test>>:1|3",
+            "<<Test>>:5|5",
+        ])
+
+    def test_register_during_notify(self):
+        nm = NotificationManager()
+
+        def registrar(key):
+            cb_hist.append(f"{key}:registrar")
+            nm.register(key,func_cb,x="late",priority=-1)
+
+        nm.register("<<Test>>",registrar)
+        nm.notify("<<Test>>")
+        nm.forget(callback=registrar)
+        nm.notify("<<Test>>")
+
+        self.assertHistory([
+            "<<Test>>:registrar",
+            "<<Test>>:late|",
+        ])
+
+    def test_notify_many(self):
+        nm = NotificationManager()
+
+        def payload_cb(key,payload,*,y=""):
+            cb_hist.append(f"{key}:{payload}|{y}")
+
+        nm.register("<<Test>>",payload_cb,priority=1,y="lo")
+        nm.register("<<Test>>",payload_cb,priority=2,y="hi")
+        nm.notify_many("<<Test>>",(p for p in "ab"))
+        nm.notify_many("<<Unknown>>",[1,2,3])
+
+        self.assertHistory([
+            "<<Test>>:a|hi",
+            "<<Test>>:b|hi",
+            "<<Test>>:a|lo",
+            "<<Test>>:b|lo",
+        ])
+
+    def test_notify_many_batch(self):
+        nm = NotificationManager()
+
+        def batch_cb(key,batch,*,y=""):
+            cb_hist.append(f"{key}:{list(batch)}|{y}")
+
+        def payload_cb(key,payload,*,y=""):
+            cb_hist.append(f"{key}:{payload}|{y}")
+
+        nm.register("<<Test>>",batch_cb,priority=2,batch=True)
+        nm.register("<<Test>>",payload_cb,priority=1)
+        nm.register("<<Test>>",batch_cb,priority=0,batch=True,y="lo")
+
+        nm.notify_many("<<Test>>",range(3),y="many")
+        nm.notify("<<Test>>",7)
+
+        self.assertHistory([
+            "<<Test>>:[0, 1, 2]|many",
+            "<<Test>>:0|many",
+            "<<Test>>:1|many",
+            "<<Test>>:2|many",
+            "<<Test>>:[0, 1, 2]|many",
+            "<<Test>>:[7]|",
+            "<<Test>>:7|",
+            "<<Test>>:[7]|lo",
+        ])
+
+    def test_notify_many_invalid(self):
+        nm = NotificationManager()
+        nm.register("<<Test>>",func_cb)
+
+        with self.assertLogs(level="WARNING") as cm:
+            nm.notify_many("<<Test>>",[1,2,3])
+        self.assertEqual(len(cm.records),3)
+
+    def test_notify_async(self):
+        nm = NotificationManager()
+        started = asyncio.Event()
+
+        async def waiter(key,**kwargs):
+            await asyncio.wait_for(started.wait(),timeout=1)
+            cb_hist.append(f"{key}:waiter")
+
+        async def starter(key,**kwargs):
+            cb_hist.append(f"{key}:starter")
+            started.set()
+
+        async def low(key,**kwargs):
+            cb_hist.append(f"{key}:low")
+
+        nm.register("<<Test>>",waiter,priority=1)
+        nm.register("<<Test>>",starter,priority=1)
+        nm.register("<<Test>>",func_cb,priority=1,x="sync")
+        nm.register("<<Test>>",low,priority=0)
+        nm.register("<<Test>>",func_cb,priority=0,x="last")
+
+        asyncio.run(nm.notify_async("<<Test>>",y=1))
+
+        self.assertHistory(
+            ["<<Test>>:sync|1"],
+            ["<<Test>>:starter","<<Test>>:waiter"],
+            {"<<Test>>:low","<<Test>>:last|1"},
+        )
+
+    def test_notify_async_invalid(self):
+        nm = NotificationManager()
+
+        async def bad_cb(key):
+            raise ValueError("Just die already")
+
+        nm.register("<<Test>>",bad_cb)
+        nm.register("<<Test>>",func_cb)
+        with self.assertLogs(level="WARNING") as cm:
+            asyncio.run(nm.notify_async("<<Test>>",z=1))
+        self.assertEqual(len(cm.records),2)
+        for rec in cm.records:
+            self.assertTrue(
+                rec.message.startswith(
+                    "Exception raised while invoking notification callback"
+                )
+            )
+
+    def test_executor(self):
+        barrier = threading.Barrier(3,timeout=1)
+
+        def meet(key,*,x="",y=""):
+            barrier.wait()
+            func_cb(key,x=x,y=y)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            nm = NotificationManager(executor=executor)
+            self.assertIs(nm.executor,executor)
+            for x in ("a","b","c"):
+                nm.register("<<Test>>",meet,priority=1,x=x)
+            nm.register("<<Test>>",func_cb,priority=0,x="low")
+            nm.register("<<Test>>",Accumulator.__call__,priority=0)
+
+            with self.assertLogs(level="WARNING") as cm:
+                nm.notify("<<Test>>",y=1)
+            self.assertEqual(len(cm.records),1)
+
+        self.assertHistory(
+            {"<<Test>>:a|1","<<Test>>:b|1","<<Test>>:c|1"},
+            ["<<Test>>:low|1"],
+        )
+
+    def test_notify_nowait(self):
+        release = threading.Event()
+
+        def slow(key,*,x="",y=""):
+            release.wait(timeout=1)
+            func_cb(key,x=x,y=y)
+            return x
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            nm = NotificationManager(executor=executor)
+            nm.register("<<Test>>",slow,priority=2,x="slow")
+            nm.register("<<Test>>",func_cb,priority=1,x="low")
+            nm.register("<<Test>>",func_cb,priority=0,z="bad")
+
+            with self.assertLogs(level="WARNING") as cm:
+                futures = nm.notify_nowait("<<Test>>",y=1)
+                self.assertEqual(len(futures),3)
+                self.assertFalse(any(f.done() for f in futures))
+                release.set()
+                self.assertEqual(futures[0].result(timeout=1),"slow")
+                self.assertIsNone(futures[1].result(timeout=1))
+                with self.assertRaises(CallbackFailed):
+                    futures[2].result(timeout=1)
+            self.assertEqual(len(cm.records),1)
+
+        self.assertHistory(["<<Test>>:slow|1","<<Test>>:low|1"])
+
+    def test_notify_nowait_inline(self):
+        nm = NotificationManager()
+        nm.register("<<Test>>",func_cb,priority=1,x="hi")
+        nm.register("<<Test>>",func_cb,priority=0,x="lo")
+        futures = nm.notify_nowait("<<Test>>")
+        self.assertTrue(all(f.done() for f in futures))
+        self.assertHistory(["<<Test>>:hi|","<<Test>>:lo|"])
+        self.assertEqual(nm.notify_nowait("<<Unknown>>"),[])
+
+    def test_thread_safety(self):
+        nm = NotificationManager()
+        keys = [f"<<Test{i}>>" for i in range(4)]
+        errors = list()
+        stop = threading.Event()
+        calls = [0]
+
+        def counter(key,*args,**kwargs):
+            calls[0] += 1
+
+        def guarded(func):
+            def run():
+                try:
+                    while not stop.is_set():
+                        func()
+                except Exception as e:
+                    errors.append(e)
+            return threading.Thread(target=run)
+
+        def post():
+            for key in keys:
+                nm.notify(key,1,x=2)
+
+        def churn():
+            ids = [
+                nm.register(key,counter,priority=p)
+                for key in keys
+                for p in range(3)
+            ]
+            for cb_id in ids[::2]:
+                nm.forget(cb_id=cb_id)
+            nm.forget(callback=counter,priority=1)
+            nm.forget(key=keys[0])
+
+        def clear():
+            nm.keys
+            nm.reset()
+
+        threads = [guarded(post) for _ in range(4)]
+        threads += [guarded(churn) for _ in range(2)]
+        threads += [guarded(clear)]
+        for thread in threads:
+            thread.start()
+        stop.wait(0.5)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors,[])
+        self.assertGreater(calls[0],0)
+
+    def test_wildcard_keys(self):
+        nm = NotificationManager()
+        nm.register("orders.eu.created",func_cb,x="exact",priority=1)
+        nm.register("orders.*.created",func_cb,x="star",priority=2)
+        nm.register("orders.**",func_cb,x="globstar",priority=0)
+        nm.register("refunds.**",func_cb,x="refunds",priority=5)
+        self.assertIn("orders.**",nm.keys)
+
+        nm.notify("orders.eu.created",y=1)
+        nm.notify("orders.us.created",y=2)
+        nm.notify("orders",y=3)
+        nm.notify("inventory.eu.created",y=4)
+
+        self.assertHistory([
+            "orders.eu.created:star|1",
+            "orders.eu.created:exact|1",
+            "orders.eu.created:globstar|1",
+            "orders.us.created:star|2",
+            "orders.us.created:globstar|2",
+            "orders:globstar|3",
+        ])
+
+    def test_wildcard_invalidation(self):
+        nm = NotificationManager()
+        nm.register("orders.eu.created",func_cb,x="exact")
+        nm.notify("orders.eu.created",y=1)
+
+        cb_id = nm.register("orders.*.created",func_cb,x="star",priority=1)
+        nm.notify("orders.eu.created",y=2)
+
+        nm.forget(cb_id=cb_id)
+        nm.notify("orders.eu.created",y=3)
+
+        nm.register("orders.**",func_cb,x="globstar",priority=1)
+        nm.notify("orders.eu.created",y=4)
+        nm.forget(key="orders.**")
+        nm.notify("orders.eu.created",y=5)
+
+        self.assertHistory([
+            "orders.eu.created:exact|1",
+            "orders.eu.created:star|2",
+            "orders.eu.created:exact|2",
+            "orders.eu.created:exact|3",
+            "orders.eu.created:globstar|4",
+            "orders.eu.created:exact|4",
+            "orders.eu.created:exact|5",
+        ])
+        self.assertEqual(nm.keys,{"orders.eu.created"})
+        self.assertEqual(len(nm._patterns),0)
+
+    def test_weak_callbacks(self):
+        nm = NotificationManager()
+        a = Accumulator("a")
+        b = Accumulator("b")
+        nm.register("<<Test>>",a,weak=True,x=1)
+        nm.register("<<Test>>",b.__call__,weak=True,priority=1)
+        nm.register("<<Test2>>",b.__call__,weak=True)
+        nm.register("<<Test>>",func_cb,weak=True,x="func")
+        nm.notify("<<Test>>",y=1)
+
+        del a, b
+        gc.collect()
+        self.assertEqual(nm.collected,3)
+        self.assertEqual(nm.keys,{"<<Test>>"})
+        nm.notify("<<Test>>",y=2)
+
+        self.assertHistory(
+            ["<<Test>>:b||1"],
+            ["<<Test>>:a|1|1","<<Test>>:func|1"],
+            ["<<Test>>:func|2"],
+        )
+
+    def test_weak_method_forget(self):
+        nm = NotificationManager()
+        a = Accumulator("a")
+        b = Accumulator("b")
+        nm.register("<<Test>>",a.__call__,weak=True)
+        # other bound methods must not be mistaken for it
+        for _ in range(100):
+            nm.forget(callback=b.__call__)
+            nm.forget(callback=Accumulator().__call__)
+        self.assertEqual(nm.keys,{"<<Test>>"})
+        self.assertIndexed(nm)
+        nm.forget(callback=a.__call__)
+        self.assertEqual(nm.keys,set())
+
+    def test_weak_callbacks_deferred(self):
+        nm = NotificationManager()
+        a = Accumulator("a")
+        nm.register("<<Test>>",a,weak=True)
+        nm.notify("<<Test>>")
+
+        # collected while the manager is busy: forgotten by the next write
+        with nm._lock:
+            del a
+            gc.collect()
+            self.assertEqual(nm.collected,0)
+        nm.notify("<<Test>>")
+        nm.register("<<Test2>>",func_cb)
+        self.assertEqual(nm.collected,1)
+        self.assertEqual(nm.keys,{"<<Test2>>"})
+        self.assertHistory(["<<Test>>:a||"])
+
+    def test_weak_callbacks_invalid(self):
+        nm = NotificationManager()
+        with self.assertRaises(RegistrationError):
+            nm.register("<<Test>>",SlottedCB(),weak=True)
+        with self.assertRaises(RegistrationError):
+            nm.register("<<Test>>",func_cb,weak=True,offload="process")
+        self.assertEqual(nm.keys,set())
+
+    def test_strong_callbacks(self):
+        nm = NotificationManager()
+        a = Accumulator("a")
+        ref = weakref.ref(a)
+        nm.register("<<Test>>",a)
+        del a
+        gc.collect()
+        self.assertIsNotNone(ref())
+        self.assertEqual(nm.collected,0)
+
+    def assertIndexed(self,nm):
+        """Asserts that the registration indexes are consistent with _queues"""
+        registered = {
+            cb_id:(key,priority,callable_id(cb.func))
+            for key,queue in nm._queues.items()
+            for priority,pri_queue in queue.items()
+            for cb_id,cb in pri_queue.items()
+        }
+        self.assertEqual(nm._index,registered)
+        func_ids = dict()
+        for cb_id,(_,_,func_id) in registered.items():
+            func_ids.setdefault(func_id,set()).add(cb_id)
+        self.assertEqual(nm._func_ids,func_ids)
+        self.assertTrue(all(queue for queue in nm._queues.values()))
+        self.assertTrue(set(nm._options) <= set(registered))
+
+    def test_forget_indexes(self):
+        nm = NotificationManager()
+        a = Accumulator("a")
+        ids = list()
+        for key in ("<<Test1>>","<<Test2>>","orders.*"):
+            for pri in (1,2):
+                ids.append(nm.register(key,func_cb,priority=pri))
+                ids.append(nm.register(key,a,priority=pri,batch=True))
+        self.assertIndexed(nm)
+
+        nm.forget(cb_id=ids[0])
+        nm.forget(cb_id=ids[0])
+        nm.forget(cb_id=-1)
+        self.assertIndexed(nm)
+
+        nm.forget(callback=func_cb,key="<<Test2>>")
+        self.assertIndexed(nm)
+        nm.forget(callback=a,priority=2)
+        self.assertIndexed(nm)
+        nm.forget(priority=5)
+        nm.forget(key="<<Unknown>>")
+        self.assertIndexed(nm)
+        nm.forget(key="orders.*",priority=1)
+        self.assertIndexed(nm)
+
+        nm.notify("<<Test1>>",y=1)
+        nm.notify("<<Test2>>",y=2)
+        nm.notify("orders.eu",y=3)
+        self.assertHistory([
+            "<<Test1>>:|1",
+            "orders.eu:|3",
+        ])
+
+        nm.forget(callback=func_cb)
+        nm.forget(key="<<Test2>>")
+        self.assertIndexed(nm)
+        self.assertEqual(nm.keys,{"<<Test1>>"})
+        nm.forget()
+        self.assertIndexed(nm)
+        self.assertEqual(nm.keys,set())
@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pynm import NotificationManager
+from pynm.metrics import Histogram
+
+def null_cb(key,*args,**kwargs):
+    pass
+
+def fail_cb(key,*args,**kwargs):
+    raise RuntimeError("failed")
+
+class HistogramTests(unittest.TestCase):
+    def test_empty(self):
+        h = Histogram()
+        snapshot = h.snapshot()
+        self.assertEqual(snapshot["count"],0)
+        self.assertEqual(snapshot["mean_ns"],0)
+        self.assertEqual(snapshot["p99_ns"],0)
+        self.assertEqual(snapshot["buckets"],{})
+
+    def test_record(self):
+        h = Histogram()
+        for ns in [100]*90 + [5000]*9 + [1<<60]:
+            h.record(ns)
+        snapshot = h.snapshot()
+        self.assertEqual(snapshot["count"],100)
+        self.assertEqual(snapshot["max_ns"],1<<60)
+        self.assertEqual(snapshot["p50_ns"],128)
+        self.assertEqual(snapshot["p90_ns"],128)
+        self.assertEqual(snapshot["p99_ns"],8192)
+        self.assertEqual(sum(snapshot["buckets"].values()),100)
+        # durations beyond the last bucket do not grow the histogram
+        self.assertEqual(len(h.counts),len(Histogram().counts))
+
+    def test_percentile_bounded_by_max(self):
+        h = Histogram()
+        h.record(100)
+        self.assertEqual(h.percentile(50),100)
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.nm = NotificationManager("test")
+        self.id1 = self.nm.register("<<Test>>",null_cb)
+        self.id2 = self.nm.register("<<Test>>",fail_cb,priority=1)
+        self.id3 = self.nm.register("<<Other>>",null_cb)
+
+    def test_disabled(self):
+        nm = self.nm
+        self.assertFalse(nm.metrics_enabled)
+        with self.assertLogs(level="WARNING"):
+            nm.notify("<<Test>>")
+        self.assertEqual(nm.stats(),{})
+        nm.reset_stats()
+
+    def test_notify(self):
+        nm = self.nm
+        nm.enable_metrics()
+        self.assertTrue(nm.metrics_enabled)
+        with self.assertLogs(level="WARNING"):
+            for _ in range(3):
+                nm.notify("<<Test>>")
+        nm.notify("<<None>>")
+
+        stats = nm.stats()
+        self.assertEqual(set(stats),{"<<Test>>","<<None>>"})
+        self.assertEqual(stats["<<None>>"]["posts"],1)
+        self.assertEqual(stats["<<None>>"]["fanout"],0)
+        test = stats["<<Test>>"]
+        self.assertEqual(test["posts"],3)
+        self.assertEqual(test["fanout"],6)
+        self.assertEqual(test["mean_fanout"],2)
+        self.assertEqual(set(test["callbacks"]),{self.id1,self.id2})
+        self.assertEqual(test["callbacks"][self.id1]["calls"],3)
+        self.assertEqual(test["callbacks"][self.id1]["failures"],0)
+        self.assertEqual(test["callbacks"][self.id2]["calls"],3)
+        self.assertEqual(test["callbacks"][self.id2]["failures"],3)
+        latency = test["callbacks"][self.id1]["latency"]
+        self.assertEqual(latency["count"],3)
+        self.assertGreater(latency["max_ns"],0)
+
+    def test_pattern(self):
+        nm = self.nm
+        cb_id = nm.register("metrics.*",null_cb)
+        nm.enable_metrics()
+        nm.notify("metrics.a")
+        nm.notify("metrics.b")
+        stats = nm.stats()
+        self.assertEqual(stats["metrics.a"]["callbacks"][cb_id]["calls"],1)
+        self.assertEqual(stats["metrics.b"]["callbacks"][cb_id]["calls"],1)
+
+    def test_reset_and_disable(self):
+        nm = self.nm
+        nm.enable_metrics()
+        nm.notify("<<Other>>")
+        nm.enable_metrics()
+        self.assertEqual(nm.stats()["<<Other>>"]["posts"],1)
+        nm.reset_stats()
+        self.assertEqual(nm.stats(),{})
+        nm.notify("<<Other>>")
+        self.assertEqual(nm.stats()["<<Other>>"]["posts"],1)
+        nm.disable_metrics()
+        self.assertFalse(nm.metrics_enabled)
+        self.assertEqual(nm.stats(),{})
+
+    def test_notify_many(self):
+        nm = self.nm
+        nm.enable_metrics()
+        nm.notify_many("<<Other>>",range(4))
+        nm.notify_many("<<None>>",(i for i in range(2)))
+        stats = nm.stats()
+        self.assertEqual(stats["<<Other>>"]["posts"],4)
+        self.assertEqual(stats["<<Other>>"]["fanout"],4)
+        self.assertEqual(stats["<<None>>"]["posts"],2)
+
+    def test_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            nm = NotificationManager(executor=executor)
+            cb_ids = [nm.register("<<Test>>",null_cb) for _ in range(3)]
+            nm.enable_metrics()
+            nm.notify("<<Test>>")
+            for future in nm.notify_nowait("<<Test>>"):
+                future.result()
+        stats = nm.stats()["<<Test>>"]
+        self.assertEqual(stats["posts"],2)
+        self.assertEqual(stats["fanout"],6)
+        for cb_id in cb_ids:
+            self.assertEqual(stats["callbacks"][cb_id]["calls"],2)
+
+    def test_async(self):
+        nm = self.nm
+        nm.enable_metrics()
+        asyncio.run(nm.notify_async("<<Other>>"))
+        self.assertEqual(nm.stats()["<<Other>>"]["posts"],1)
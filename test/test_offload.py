@@ -0,0 +1,104 @@
+import os
+import threading
+import unittest
+
+from pynm import NotificationManager
+from pynm import CallbackFailed
+from pynm import RegistrationError
+from pynm import offload
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def worker_pid(key,*args,**kwargs):
+    return os.getpid()
+
+def echo(key,*args,**kwargs):
+    return (key,args,kwargs)
+
+def describe(key,payload):
+    return (type(payload).__name__,len(payload),payload[:4],payload[-4:])
+
+def bad_cb(key,*args,**kwargs):
+    raise ValueError("Just die already")
+
+def settled(future):
+    """Waits until the future's done callbacks (including failure reporting)
+    have been run"""
+    event = threading.Event()
+    future.add_done_callback(lambda f: event.set())
+    event.wait(timeout=10)
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.nm = NotificationManager()
+
+    def tearDown(self):
+        self.nm.shutdown()
+
+    def test_register_unpicklable(self):
+        with self.assertRaises(RegistrationError):
+            self.nm.register("<<Test>>",lambda key: None,offload="process")
+        with self.assertRaises(RegistrationError):
+            self.nm.register("<<Test>>",echo,threading.Lock(),offload="process")
+        self.assertEqual(len(self.nm.keys),0)
+
+    def test_register_invalid_mode(self):
+        with self.assertRaises(RegistrationError):
+            self.nm.register("<<Test>>",echo,offload="thread")
+
+    def test_offload(self):
+        self.nm.register("<<Test>>",worker_pid,offload="process",priority=1)
+        self.nm.register("<<Test>>",echo,1,offload="process",x=1)
+        futures = self.nm.notify("<<Test>>",2,y=2)
+        self.assertEqual(len(futures),2)
+        self.assertNotEqual(futures[0].result(timeout=10),os.getpid())
+        self.assertEqual(
+            futures[1].result(timeout=10),
+            ("<<Test>>",(1,2),{"x":1,"y":2}),
+        )
+
+    def test_offload_batch(self):
+        self.nm.register("<<Test>>",echo,offload="process",batch=True)
+        futures = self.nm.notify_many("<<Test>>",[0,1,2])
+        self.assertEqual(len(futures),1)
+        self.assertEqual(futures[0].result(timeout=10),("<<Test>>",([0,1,2],),{}))
+
+        futures = self.nm.notify("<<Test>>",5)
+        self.assertEqual(futures[0].result(timeout=10),("<<Test>>",([5],),{}))
+
+    def test_offload_failure(self):
+        self.nm.register("<<Test>>",bad_cb,offload="process")
+        with self.assertLogs(level="WARNING") as cm:
+            futures = self.nm.notify("<<Test>>")
+            settled(futures[0])
+        self.assertIsInstance(futures[0].exception(),CallbackFailed)
+        self.assertEqual(len(cm.records),1)
+
+    def test_shared_bytes(self):
+        payload = bytes(range(256)) * (offload.SHARED_MEMORY_THRESHOLD // 128)
+        args,kwargs,segments = offload.share_payloads((payload,b"small"),{})
+        self.assertIsInstance(args[0],offload.SharedPayload)
+        self.assertEqual(args[1],b"small")
+        self.assertEqual(len(segments),1)
+        offload.release(segments)
+
+        self.nm.register("<<Test>>",describe,offload="process")
+        futures = self.nm.notify("<<Test>>",payload)
+        self.assertEqual(
+            futures[0].result(timeout=10),
+            ("bytes",len(payload),payload[:4],payload[-4:]),
+        )
+
+    @unittest.skipIf(numpy is None,"NumPy is not installed")
+    def test_shared_numpy(self):
+        payload = numpy.arange(offload.SHARED_MEMORY_THRESHOLD,dtype=float)
+        self.nm.register("<<Test>>",describe,offload="process")
+        futures = self.nm.notify("<<Test>>",payload)
+        name,size,head,tail = futures[0].result(timeout=10)
+        self.assertEqual((name,size),("ndarray",len(payload)))
+        self.assertTrue((head == payload[:4]).all())
+        self.assertTrue((tail == payload[-4:]).all())
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import unittest
+
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from pynm import NotificationManager
+from pynm import RegistrationError
+
+history = list()
+def func_cb(key,*args,**kwargs):
+    history.append((key,args))
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.nm = NotificationManager("test")
+
+    def test_once(self):
+        nm = self.nm
+        nm.register("<<Test>>",func_cb,once=True)
+        nm.notify("<<Test>>",1)
+        nm.notify("<<Test>>",2)
+        self.assertEqual(history,[("<<Test>>",(1,))])
+        self.assertEqual(nm.keys,set())
+
+    def test_max_calls(self):
+        nm = self.nm
+        nm.register("<<Test>>",func_cb,max_calls=3)
+        nm.register("<<Test>>",func_cb,priority=-1)
+        for i in range(5):
+            nm.notify("<<Test>>",i)
+        self.assertEqual([a[0] for _,a in history],[0,0,1,1,2,2,3,4])
+
+    def test_invalid(self):
+        nm = self.nm
+        for max_calls in (0,-1,1.5,"2"):
+            with self.assertRaises(RegistrationError):
+                nm.register("<<Test>>",func_cb,max_calls=max_calls)
+        with self.assertRaises(RegistrationError):
+            nm.register("<<Test>>",func_cb,once=True,max_calls=2)
+
+    def test_retired_during_dispatch(self):
+        nm = self.nm
+        # posting again from within the callback must not invoke it again
+        def reentrant(key,n):
+            history.append((key,(n,)))
+            nm.notify("<<Test>>",n+1)
+        nm.register("<<Test>>",reentrant,once=True)
+        nm.register("<<Test>>",func_cb,priority=-1)
+        nm.notify("<<Test>>",0)
+        self.assertEqual(
+            history,[("<<Test>>",(0,)),("<<Test>>",(1,)),("<<Test>>",(0,))]
+        )
+
+    def test_concurrent(self):
+        nm = self.nm
+        nm.register("<<Test>>",func_cb,max_calls=50)
+        def poster():
+            for i in range(100):
+                nm.notify("<<Test>>",i)
+        threads = [threading.Thread(target=poster) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(history),50)
+
+    def test_once_with_filters(self):
+        nm = self.nm
+        nm.register("<<Test>>",func_cb,once=True,where={"t":1})
+        nm.notify("<<Test>>",0,t=2)
+        nm.notify("<<Test>>",1,t=1)
+        nm.notify("<<Test>>",2,t=1)
+        self.assertEqual(history,[("<<Test>>",(1,))])
+
+    def test_notify_many(self):
+        nm = self.nm
+        nm.register("<<Test>>",func_cb,max_calls=2)
+        nm.notify_many("<<Test>>",range(5))
+        self.assertEqual([a[0] for _,a in history],[0,1])
+
+    def test_expect(self):
+        nm = self.nm
+        future = nm.expect("reply.*",where={"request_id":7})
+        nm.notify("reply.ok",request_id=6)
+        self.assertFalse(future.done())
+        nm.notify("reply.ok",1,request_id=7)
+        self.assertEqual(future.result(0),("reply.ok",(1,),{"request_id":7}))
+        self.assertEqual(nm.keys,set())
+
+    def test_expect_cancel(self):
+        nm = self.nm
+        future = nm.expect("<<Test>>")
+        self.assertEqual(nm.keys,{"<<Test>>"})
+        future.cancel()
+        self.assertEqual(nm.keys,set())
+
+    def test_wait_for(self):
+        nm = self.nm
+        timer = threading.Timer(0.05,nm.notify,("<<Test>>",5))
+        timer.start()
+        notification = nm.wait_for("<<Test>>",timeout=5)
+        self.assertEqual(notification.args,(5,))
+        self.assertEqual(notification.key,"<<Test>>")
+
+    def test_wait_for_timeout(self):
+        nm = self.nm
+        with self.assertRaises(FutureTimeout):
+            nm.wait_for("<<Test>>",timeout=0.01)
+        self.assertEqual(nm.keys,set())
+
+    def test_wait_for_async(self):
+        nm = self.nm
+        async def main():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.01,nm.notify,"<<Test>>",1)
+            first = await nm.wait_for_async("<<Test>>",timeout=5)
+            task = asyncio.ensure_future(nm.wait_for_async("<<Other>>",timeout=5))
+            await asyncio.sleep(0)
+            threading.Thread(target=nm.notify,args=("<<Other>>",2)).start()
+            second = await task
+            with self.assertRaises(asyncio.TimeoutError):
+                await nm.wait_for_async("<<Never>>",timeout=0.01)
+            self.assertEqual(nm.keys,set())
+            return first,second
+        first,second = asyncio.run(main())
+        self.assertEqual(first.args,(1,))
+        self.assertEqual(second.args,(2,))
+        self.assertEqual(nm.keys,set())
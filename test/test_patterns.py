@@ -0,0 +1,72 @@
+import unittest
+
+from pynm.patterns import PatternTrie
+from pynm.patterns import is_pattern
+from pynm.patterns import matches
+
+CASES = (
+    ("orders.*", "orders.eu", True),
+    ("orders.*", "orders", False),
+    ("orders.*", "orders.eu.created", False),
+    ("orders.**", "orders", True),
+    ("orders.**", "orders.eu", True),
+    ("orders.**", "orders.eu.created", True),
+    ("orders.**", "refunds.eu", False),
+    ("*.eu.*", "orders.eu.created", True),
+    ("*.eu.*", "orders.us.created", False),
+    ("**.created", "created", True),
+    ("**.created", "orders.eu.created", True),
+    ("**.created", "orders.eu.deleted", False),
+    ("orders.**.created", "orders.created", True),
+    ("orders.**.created", "orders.eu.fr.created", True),
+    ("**", "anything.at.all", True),
+    ("a.**.**.b", "a.b", True),
+    ("a.**.**.b", "a.x.y.z.b", True),
+)
+
+class Tests(unittest.TestCase):
+    def test_is_pattern(self):
+        self.assertTrue(is_pattern("orders.*"))
+        self.assertTrue(is_pattern("**"))
+        self.assertTrue(is_pattern("a.**.b"))
+        self.assertFalse(is_pattern("orders.eu"))
+        self.assertFalse(is_pattern("orders*.eu"))
+        self.assertFalse(is_pattern("<<Test>>"))
+        self.assertFalse(is_pattern(42))
+
+    def test_matches(self):
+        for pattern,key,expected in CASES:
+            self.assertEqual(matches(pattern,key),expected,(pattern,key))
+        self.assertFalse(matches("*",42))
+
+    def test_trie_match(self):
+        trie = PatternTrie()
+        patterns = {pattern for pattern,_,_ in CASES}
+        for pattern in patterns:
+            trie.add(pattern)
+        self.assertEqual(len(trie),len(patterns))
+
+        keys = {key for _,key,_ in CASES}
+        for key in keys:
+            expected = {p for p in patterns if matches(p,key)}
+            found = trie.match(key)
+            self.assertEqual(len(found),len(set(found)),key)
+            self.assertEqual(set(found),expected,key)
+        self.assertEqual(trie.match(42),[])
+
+    def test_trie_remove(self):
+        trie = PatternTrie()
+        trie.add("orders.*")
+        trie.add("orders.*.created")
+        trie.add("orders.*")
+        self.assertEqual(len(trie),2)
+
+        trie.remove("orders.*")
+        trie.remove("orders.nothing")
+        self.assertEqual(len(trie),1)
+        self.assertEqual(trie.match("orders.eu"),[])
+        self.assertEqual(trie.match("orders.eu.created"),["orders.*.created"])
+
+        trie.remove("orders.*.created")
+        self.assertEqual(len(trie),0)
+        self.assertEqual(trie._root.children,{})
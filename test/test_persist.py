@@ -0,0 +1,156 @@
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from pynm import NotificationManager
+from pynm import Callback
+from pynm.callback import LazyCallback
+from pynm.callback import import_path
+
+history = list()
+def func_cb(key,*args,**kwargs):
+    history.append((key,args,kwargs))
+
+def big(key,n,**kwargs):
+    return n > 10
+
+class Handlers:
+    @staticmethod
+    def static_cb(key,*args,**kwargs):
+        history.append(("static",key))
+
+    @classmethod
+    def class_cb(cls,key,*args,**kwargs):
+        history.append(("class",key))
+
+PLUGIN = textwrap.dedent('''
+    calls = []
+    def on_event(key,*args,**kwargs):
+        calls.append((key,args,kwargs))
+''')
+
+WORKER = textwrap.dedent('''
+    def square(key,n,offset=0):
+        return n*n + offset
+''')
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name,"registry.pickle")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_import_path(self):
+        self.assertEqual(import_path(func_cb),f"{__name__}:func_cb")
+        self.assertEqual(
+            import_path(Handlers.class_cb),f"{__name__}:Handlers.class_cb"
+        )
+        with self.assertRaises(ValueError):
+            import_path(lambda key: None)
+        with self.assertRaises(ValueError):
+            import_path(Callback(func_cb).__call__)
+
+    def test_dump_load(self):
+        nm = NotificationManager()
+        nm.register("<<Test>>",func_cb,1,priority=5,x=2)
+        nm.register("<<Test>>",Handlers.static_cb,priority=10)
+        nm.register("orders.*",Handlers.class_cb)
+        nm.register("<<Test>>",func_cb,where={"t":1},when=big)
+        nm.register("<<Test>>",func_cb,max_calls=3,batch=True)
+        self.assertEqual(nm.dump(self.path),[])
+
+        loaded = NotificationManager()
+        cb_ids = loaded.load(self.path)
+        self.assertEqual(len(cb_ids),5)
+        self.assertEqual(loaded.keys,{"<<Test>>","orders.*"})
+
+        for manager in (nm,loaded):
+            manager.notify("<<Test>>",20,t=1)
+            manager.notify("<<Test>>",5,t=1)
+            manager.notify("orders.new")
+        expected,restored = history[:len(history)//2],history[len(history)//2:]
+        self.assertEqual(restored,expected)
+        self.assertEqual(expected[:2],[
+            ("static","<<Test>>"),
+            ("<<Test>>",(1,20),{"x":2,"t":1}),
+        ])
+        self.assertEqual(len(expected),8)
+
+    def test_skipped(self):
+        nm = NotificationManager()
+        keep = nm.register("<<Test>>",func_cb)
+        lam = nm.register("<<Test>>",lambda key: None)
+        weak = nm.register("<<Test>>",Handlers.static_cb,weak=True)
+        unpicklable = nm.register("<<Test>>",func_cb,lambda: None)
+        skipped = nm.dump(self.path)
+        self.assertEqual([s[0] for s in skipped],[lam,weak,unpicklable])
+        self.assertTrue(all(s[1] == "<<Test>>" for s in skipped))
+
+        loaded = NotificationManager()
+        self.assertEqual(len(loaded.load(self.path)),1)
+
+    def test_deferred_import(self):
+        with open(os.path.join(self.tmpdir.name,"pynm_plugin.py"),"w") as file:
+            file.write(PLUGIN)
+        sys.path.insert(0,self.tmpdir.name)
+        try:
+            nm = NotificationManager()
+            nm.register("<<Test>>",LazyCallback("pynm_plugin:on_event",1))
+            nm.dump(self.path)
+            self.assertNotIn("pynm_plugin",sys.modules)
+
+            loaded = NotificationManager()
+            loaded.load(self.path)
+            self.assertNotIn("pynm_plugin",sys.modules)
+            loaded.notify("<<Other>>")
+            self.assertNotIn("pynm_plugin",sys.modules)
+            loaded.notify("<<Test>>",2)
+            self.assertEqual(
+                sys.modules["pynm_plugin"].calls,[("<<Test>>",(1,2),{})]
+            )
+        finally:
+            sys.path.remove(self.tmpdir.name)
+            sys.modules.pop("pynm_plugin",None)
+
+    def test_offload(self):
+        with open(os.path.join(self.tmpdir.name,"pynm_worker.py"),"w") as file:
+            file.write(WORKER)
+        sys.path.insert(0,self.tmpdir.name)
+        nm = NotificationManager()
+        loaded = NotificationManager()
+        try:
+            nm.register(
+                "<<Test>>","pynm_worker:square",offset=1,offload="process"
+            )
+            self.assertEqual(nm.dump(self.path),[])
+            loaded.load(self.path)
+            self.assertNotIn("pynm_worker",sys.modules)
+
+            (future,) = loaded.notify("<<Test>>",7)
+            self.assertEqual(future.result(timeout=30),50)
+            # imported by the worker process only
+            self.assertNotIn("pynm_worker",sys.modules)
+        finally:
+            nm.shutdown()
+            loaded.shutdown()
+            sys.path.remove(self.tmpdir.name)
+            sys.modules.pop("pynm_worker",None)
+
+    def test_forget_by_import_path(self):
+        nm = NotificationManager()
+        nm.register("<<Test>>",LazyCallback(f"{__name__}:func_cb"))
+        nm.register("<<Test>>",func_cb)
+        nm.forget(callback=f"{__name__}:func_cb")
+        nm.notify("<<Test>>")
+        self.assertEqual(len(history),1)
+
+    def test_not_a_registry(self):
+        with open(self.path,"wb") as file:
+            file.write(b"\x80\x04N.")
+        with self.assertRaises(ValueError):
+            NotificationManager().load(self.path)
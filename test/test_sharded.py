@@ -0,0 +1,118 @@
+import threading
+import unittest
+
+from pynm import ShardedNotificationManager
+from pynm import RegistrationError
+
+history = list()
+def func_cb(key,*args,**kwargs):
+    history.append((key,args))
+
+def other_cb(key,*args,**kwargs):
+    history.append(("other",key))
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.nm = ShardedNotificationManager(shards=4,name="test")
+
+    def test_shards(self):
+        nm = self.nm
+        self.assertEqual(len(nm.shards),4)
+        self.assertEqual(nm.shards[1].name,"test-1")
+        keys = [f"<<Key{i}>>" for i in range(100)]
+        for key in keys:
+            cb_id = nm.register(key,func_cb)
+            self.assertIs(nm._shard_of(cb_id),nm.shard(key))
+        self.assertEqual(nm.keys,set(keys))
+        # keys are spread across the shards
+        self.assertTrue(all(shard.keys for shard in nm.shards))
+
+    def test_notify(self):
+        nm = self.nm
+        nm.register("<<A>>",func_cb)
+        nm.register("<<B>>",other_cb)
+        nm.notify("<<A>>",1)
+        nm.notify("<<B>>")
+        nm.notify("<<C>>")
+        self.assertEqual(history,[("<<A>>",(1,)),("other","<<B>>")])
+
+    def test_pattern(self):
+        nm = self.nm
+        cb_id = nm.register("orders.*",other_cb,priority=10)
+        for i in range(20):
+            nm.register(f"orders.{i}",func_cb)
+        for i in range(20):
+            nm.notify(f"orders.{i}")
+        self.assertEqual(len(history),40)
+        self.assertEqual(history[:2],[("other","orders.0"),("orders.0",())])
+        self.assertEqual(
+            nm.keys,{"orders.*"} | {f"orders.{i}" for i in range(20)}
+        )
+
+        nm.forget(cb_id=cb_id)
+        history.clear()
+        for i in range(20):
+            nm.notify(f"orders.{i}")
+        self.assertEqual(len(history),20)
+        self.assertEqual(nm._pattern_ids,{})
+
+    def test_pattern_limits(self):
+        nm = self.nm
+        with self.assertRaises(RegistrationError):
+            nm.register("orders.*",func_cb,once=True)
+        with self.assertRaises(RegistrationError):
+            nm.wait_for("orders.*",timeout=0)
+        self.assertEqual(nm.keys,set())
+
+    def test_forget_callback(self):
+        nm = self.nm
+        for i in range(20):
+            nm.register(f"<<Key{i}>>",func_cb)
+            nm.register(f"<<Key{i}>>",other_cb)
+        nm.register("**",func_cb)
+        nm.forget(callback=func_cb)
+        self.assertEqual(nm._pattern_ids,{})
+        for i in range(20):
+            nm.notify(f"<<Key{i}>>")
+        self.assertEqual(history,[("other",f"<<Key{i}>>") for i in range(20)])
+
+    def test_forget_key(self):
+        nm = self.nm
+        nm.register("<<A>>",func_cb)
+        nm.register("<<A>>",other_cb,priority=1)
+        nm.register("<<B>>",func_cb)
+        nm.forget("<<A>>",priority=1)
+        self.assertEqual(nm.keys,{"<<A>>","<<B>>"})
+        nm.forget("<<A>>")
+        self.assertEqual(nm.keys,{"<<B>>"})
+        nm.reset()
+        self.assertEqual(nm.keys,set())
+
+    def test_once(self):
+        nm = self.nm
+        nm.register("<<A>>",func_cb,once=True)
+        nm.notify("<<A>>")
+        nm.notify("<<A>>")
+        self.assertEqual(len(history),1)
+
+    def test_concurrent(self):
+        nm = self.nm
+        errors = list()
+        def worker(i):
+            try:
+                for j in range(200):
+                    key = f"<<Request{i}.{j}>>"
+                    cb_id = nm.register(key,func_cb)
+                    nm.notify(key,j)
+                    nm.forget(cb_id=cb_id)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker,args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors,[])
+        self.assertEqual(len(history),1600)
+        self.assertEqual(nm.keys,set())
@@ -0,0 +1,133 @@
+import asyncio
+import unittest
+
+from pynm import NotificationManager
+from pynm import Notification
+from pynm import ShardedNotificationManager
+
+history = list()
+def cb(key,*args,**kwargs):
+    history.append((key,args,kwargs))
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.nm = NotificationManager("test")
+
+    def test_sticky(self):
+        nm = self.nm
+        nm.notify("<<Ready>>",1)
+        self.assertEqual(nm.retained("<<Ready>>"),[])
+        nm.notify("<<Ready>>",2,sticky=True)
+        nm.notify("<<Ready>>",3,sticky=True,x=4)
+        self.assertEqual(nm.retained("<<Ready>>"),
+            [Notification("<<Ready>>",(3,),{"x":4})])
+
+        nm.register("<<Ready>>",cb)
+        self.assertEqual(history,[])
+        nm.register("<<Ready>>",cb,"a",replay=True)
+        self.assertEqual(history,[("<<Ready>>",("a",3),{"x":4})])
+        nm.notify("<<Ready>>",5,sticky=True)
+        self.assertEqual(len(history),3)
+
+    def test_sticky_variants(self):
+        nm = self.nm
+        nm.register("<<Test>>",cb)
+        nm.set_history("<<Test>>",10)
+        nm.notify_nowait("<<Test>>",1,sticky=True)
+        asyncio.run(nm.notify_async("<<Test>>",2,sticky=True))
+        nm.notify_many("<<Test>>",iter([3,4]),sticky=True,x=5)
+        # sticky is never passed to the callbacks
+        self.assertEqual(history,[
+            ("<<Test>>",(1,),{}),
+            ("<<Test>>",(2,),{}),
+            ("<<Test>>",(3,),{"x":5}),
+            ("<<Test>>",(4,),{"x":5}),
+        ])
+        self.assertEqual(
+            [(n.args,n.kwargs) for n in nm.retained("<<Test>>")],
+            [((1,),{}),((2,),{}),((3,),{"x":5}),((4,),{"x":5})],
+        )
+
+    def test_history(self):
+        nm = self.nm
+        nm.notify("<<Config>>",0,sticky=True)
+        nm.set_history("<<Config>>",3)
+        for i in range(1,6):
+            nm.notify("<<Config>>",i,sticky=True)
+        nm.register("<<Config>>",cb,replay=True)
+        self.assertEqual([h[1] for h in history],[(3,),(4,),(5,)])
+        nm.set_history("<<Config>>",2)
+        self.assertEqual([n.args for n in nm.retained("<<Config>>")],[(4,),(5,)])
+        with self.assertRaises(ValueError):
+            nm.set_history("<<Config>>",0)
+
+        nm.clear_history("<<Config>>")
+        self.assertEqual(nm.retained("<<Config>>"),[])
+        nm.notify("<<Other>>",sticky=True)
+        nm.clear_history()
+        self.assertEqual(nm.history_stats(),{})
+
+    def test_replay_options(self):
+        nm = self.nm
+        nm.set_history("<<Order>>",10)
+        for tenant in (1,2,1,1):
+            nm.notify("<<Order>>",tenant=tenant,sticky=True)
+        nm.register("<<Order>>",cb,where={"tenant":2},replay=True)
+        self.assertEqual(len(history),1)
+        cb_id = nm.register("<<Order>>",cb,max_calls=2,replay=True)
+        self.assertEqual(len(history),3)
+        self.assertNotIn(cb_id,nm._index)
+        nm.register(
+            "<<Order>>",cb,when=lambda key,**kw: kw["tenant"] == 1,replay=True
+        )
+        self.assertEqual(len(history),6)
+
+    def test_replay_pattern(self):
+        nm = self.nm
+        nm.set_history("orders.created",2)
+        nm.notify("orders.created",1,sticky=True)
+        nm.notify("orders.shipped",2,sticky=True)
+        nm.notify("users.created",3,sticky=True)
+        nm.notify("orders.created",4,sticky=True)
+        nm.register("orders.*",cb,replay=True)
+        self.assertEqual(history,[
+            ("orders.created",(1,),{}),
+            ("orders.shipped",(2,),{}),
+            ("orders.created",(4,),{}),
+        ])
+
+    def test_replay_batch(self):
+        nm = self.nm
+        nm.notify("<<Ready>>",sticky=True)
+        with nm.batch():
+            nm.register("<<Ready>>",cb,replay=True)
+            self.assertEqual(history,[])
+        self.assertEqual(len(history),1)
+        nm.register_many([("<<Ready>>",cb,{"replay":True})])
+        self.assertEqual(len(history),2)
+
+    def test_history_stats(self):
+        nm = self.nm
+        nm.set_history("<<Data>>",4)
+        nm.notify("<<Data>>",b"x"*1000,sticky=True)
+        stats = nm.history_stats()["<<Data>>"]
+        self.assertEqual((stats["retained"],stats["depth"]),(1,4))
+        self.assertGreater(stats["bytes"],1000)
+        for _ in range(10):
+            nm.notify("<<Data>>",b"x"*1000,sticky=True)
+        stats = nm.history_stats()["<<Data>>"]
+        self.assertEqual(stats["retained"],4)
+        self.assertLess(stats["bytes"],5*1200)
+
+    def test_sharded(self):
+        nm = ShardedNotificationManager(4)
+        nm.set_history("<<Ready>>",2)
+        for i in range(3):
+            nm.notify("<<Ready>>",i,sticky=True)
+        nm.notify("<<Other>>",sticky=True)
+        nm.register("<<Ready>>",cb,replay=True)
+        self.assertEqual([h[1] for h in history],[(1,),(2,)])
+        self.assertEqual(set(nm.history_stats()),{"<<Ready>>","<<Other>>"})
+        nm.clear_history()
+        self.assertEqual(nm.retained("<<Ready>>"),[])
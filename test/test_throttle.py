@@ -0,0 +1,168 @@
+import os
+import tempfile
+import time
+import unittest
+
+from pynm import NotificationManager
+from pynm import ShardedNotificationManager
+from pynm import CollectErrors
+from pynm import RegistrationError
+
+history = list()
+def cb(key,*args,**kwargs):
+    history.append(args)
+
+def fail_cb(key,*args,**kwargs):
+    raise RuntimeError("failed")
+
+def wait_until(predicate,timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        history.clear()
+        self.nm = NotificationManager("test")
+
+    def test_invalid(self):
+        nm = self.nm
+        for options in (
+            {"max_rate":0},
+            {"max_rate":-1},
+            {"max_rate":"fast"},
+            {"max_rate":1,"burst":0.5},
+            {"trailing":True},
+        ):
+            with self.assertRaises(RegistrationError):
+                nm.register("<<Test>>",cb,**options)
+        self.assertEqual(nm.keys,set())
+
+    def test_burst(self):
+        nm = self.nm
+        cb_id = nm.register("<<Test>>",cb,max_rate=0.01,burst=2)
+        other_id = nm.register("<<Test>>",cb,priority=-1)
+        for i in range(5):
+            nm.notify("<<Test>>",i)
+        # the unthrottled callback receives every notification
+        self.assertEqual(history,[(0,),(0,),(1,),(1,),(2,),(3,),(4,)])
+        self.assertEqual(
+            nm.throttle_stats(),{cb_id:{"delivered":2,"throttled":3}}
+        )
+        self.assertNotIn(other_id,nm.throttle_stats())
+
+    def test_refill(self):
+        nm = self.nm
+        nm.register("<<Test>>",cb,max_rate=50)
+        nm.notify("<<Test>>",1)
+        nm.notify("<<Test>>",2)
+        time.sleep(0.05)
+        nm.notify("<<Test>>",3)
+        self.assertEqual(history,[(1,),(3,)])
+
+    def test_skipped_before_call(self):
+        nm = self.nm
+        nm.set_error_policy(CollectErrors())
+        nm.register("<<Test>>",fail_cb,max_rate=0.01)
+        for _ in range(3):
+            nm.notify("<<Test>>")
+        self.assertEqual(len(nm.error_policy.take()),1)
+
+    def test_options(self):
+        nm = self.nm
+        nm.register(
+            "<<Test>>",cb,max_rate=0.01,burst=3,max_calls=2,
+            when=lambda key,n: n % 2 == 0,
+        )
+        for i in range(6):
+            nm.notify("<<Test>>",i)
+        # odd posts do not take a token, the third even post is the last call
+        self.assertEqual(history,[(0,),(2,)])
+        self.assertEqual(nm.keys,set())
+
+    def test_notify_many(self):
+        nm = self.nm
+        cb_id = nm.register("<<Test>>",cb,max_rate=0.01,burst=2)
+        nm.notify_many("<<Test>>",[1,2,3,4])
+        self.assertEqual(history,[(1,),(2,)])
+        self.assertEqual(nm.throttle_stats()[cb_id]["throttled"],2)
+
+    def test_trailing(self):
+        nm = self.nm
+        cb_id = nm.register("<<Test>>",cb,max_rate=20,trailing=True)
+        for i in range(4):
+            nm.notify("<<Test>>",i)
+        self.assertEqual(history,[(0,)])
+        self.assertTrue(wait_until(lambda: len(history) == 2))
+        self.assertEqual(history,[(0,),(3,)])
+        self.assertEqual(
+            nm.throttle_stats(),{cb_id:{"delivered":2,"throttled":3}}
+        )
+
+    def test_trailing_batch(self):
+        nm = self.nm
+        nm.register("<<Test>>",cb,max_rate=20,trailing=True,batch=True)
+        nm.notify_many("<<Test>>",[1,2])
+        nm.notify_many("<<Test>>",[3,4])
+        nm.notify("<<Test>>",5)
+        self.assertEqual(history,[([1,2],)])
+        self.assertTrue(wait_until(lambda: len(history) == 2))
+        self.assertEqual(history,[([1,2],),([5],)])
+        nm.notify_many("<<Test>>",[6,7])
+        self.assertTrue(wait_until(lambda: len(history) == 3))
+        self.assertEqual(history[2],([6,7],))
+
+    def test_trailing_forgotten(self):
+        nm = self.nm
+        cb_id = nm.register("<<Test>>",cb,max_rate=20,trailing=True)
+        nm.notify("<<Test>>",1)
+        nm.notify("<<Test>>",2)
+        nm.forget(cb_id=cb_id)
+        time.sleep(0.1)
+        self.assertEqual(history,[(1,)])
+
+    def test_trailing_reset(self):
+        nm = self.nm
+        cb_id = nm.register("<<Test>>",cb,max_rate=20,trailing=True)
+        throttle = nm._options[cb_id].throttle
+        nm.notify("<<Test>>",1)
+        nm.notify("<<Test>>",2)
+        nm.reset()
+        self.assertIsNone(throttle._timer)
+        time.sleep(0.1)
+        self.assertEqual(history,[(1,)])
+
+    def test_trailing_failure(self):
+        nm = self.nm
+        nm.set_error_policy(CollectErrors())
+        nm.register("<<Test>>",fail_cb,max_rate=20,trailing=True)
+        nm.notify("<<Test>>")
+        nm.notify("<<Test>>")
+        self.assertTrue(wait_until(lambda: len(nm.error_policy) == 2))
+
+    def test_dump_load(self):
+        nm = self.nm
+        nm.register("<<Test>>",cb,max_rate=0.01,burst=2,trailing=True)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir,"registry.pickle")
+            self.assertEqual(nm.dump(path),[])
+            loaded = NotificationManager()
+            (cb_id,) = loaded.load(path)
+        throttle = loaded._options[cb_id].throttle
+        self.assertEqual(
+            (throttle.rate,throttle.burst,throttle.trailing),(0.01,2.0,True)
+        )
+
+    def test_sharded(self):
+        nm = ShardedNotificationManager(4)
+        with self.assertRaises(RegistrationError):
+            nm.register("orders.*",cb,max_rate=1)
+        cb_id = nm.register("<<Test>>",cb,max_rate=0.01)
+        nm.notify("<<Test>>")
+        nm.notify("<<Test>>")
+        self.assertEqual(
+            nm.throttle_stats(),{cb_id:{"delivered":1,"throttled":1}}
+        )
@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pynm import NotificationManager
+from pynm import CollectErrors
+from pynm import Tracer
+
+class Handlers:
+    def __init__(self,nm):
+        self.nm = nm
+
+    def outer(self,key,*args,**kwargs):
+        self.nm.notify("<<Inner>>")
+
+    def inner(self,key,*args,**kwargs):
+        pass
+
+def fail_cb(key,*args,**kwargs):
+    raise RuntimeError("failed")
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.nm = NotificationManager("test")
+        self.handlers = Handlers(self.nm)
+        self.outer_id = self.nm.register(
+            "<<Outer>>",self.handlers.outer,priority=2
+        )
+        self.inner_id = self.nm.register("<<Inner>>",self.handlers.inner)
+
+    def test_disabled(self):
+        nm = self.nm
+        self.assertIsNone(nm.tracer)
+        self.assertIsNone(nm._clock)
+        self.assertIsNone(nm.disable_tracing())
+
+    def test_nested_spans(self):
+        nm = self.nm
+        tracer = nm.enable_tracing()
+        self.assertIs(nm.enable_tracing(),tracer)
+        nm.notify("<<Outer>>")
+        self.assertEqual(len(tracer),4)
+
+        spans = {
+            (e["cat"],e["args"]["key"]):e
+            for e in tracer.events() if e["ph"] == "X"
+        }
+        outer = spans[("notify","<<Outer>>")]
+        outer_cb = spans[("callback","<<Outer>>")]
+        inner = spans[("notify","<<Inner>>")]
+        inner_cb = spans[("callback","<<Inner>>")]
+        for parent,child in ((outer,outer_cb),(outer_cb,inner),(inner,inner_cb)):
+            self.assertLessEqual(parent["ts"],child["ts"])
+            self.assertGreaterEqual(
+                parent["ts"] + parent["dur"],child["ts"] + child["dur"]
+            )
+        self.assertEqual(outer["args"]["callbacks"],1)
+        self.assertEqual(outer_cb["args"]["cb_id"],self.outer_id)
+        self.assertEqual(outer_cb["args"]["priority"],2.0)
+        self.assertEqual(outer_cb["name"],f"{__name__}.Handlers.outer")
+        self.assertEqual(inner_cb["tid"],threading.get_ident())
+
+        self.assertIs(nm.disable_tracing(),tracer)
+        nm.notify("<<Outer>>")
+        self.assertEqual(len(tracer),4)
+
+    def test_ring_buffer(self):
+        nm = self.nm
+        tracer = nm.enable_tracing(capacity=5)
+        for _ in range(3):
+            nm.notify("<<Outer>>")
+        self.assertEqual(len(tracer),5)
+        self.assertEqual(tracer.capacity,5)
+        self.assertEqual(tracer.dropped,7)
+        tracer.clear()
+        self.assertEqual((len(tracer),tracer.dropped),(0,0))
+        nm.notify("<<Inner>>")
+        self.assertEqual((len(tracer),tracer.dropped),(2,0))
+        with self.assertRaises(ValueError):
+            Tracer(0)
+
+    def test_failure(self):
+        nm = self.nm
+        nm.set_error_policy(CollectErrors())
+        nm.register("<<Inner>>",fail_cb,priority=1)
+        tracer = nm.enable_tracing()
+        nm.notify("<<Inner>>")
+        names = [e["name"] for e in tracer.events() if e.get("cat") == "callback"]
+        self.assertEqual(
+            names,[f"{__name__}.fail_cb",f"{__name__}.Handlers.inner"]
+        )
+
+    def test_lazy_name(self):
+        nm = self.nm
+        nm.register("<<Lazy>>","pynm_no_such_module:handler")
+        nm.set_error_policy(CollectErrors())
+        tracer = nm.enable_tracing()
+        nm.notify("<<Lazy>>")
+        names = [e["name"] for e in tracer.events() if e.get("cat") == "callback"]
+        self.assertEqual(names,["pynm_no_such_module:handler"])
+
+    def test_with_metrics(self):
+        nm = self.nm
+        nm.enable_metrics()
+        tracer = nm.enable_tracing()
+        nm.notify("<<Outer>>")
+        self.assertEqual(len(tracer),4)
+        self.assertEqual(nm.stats()["<<Inner>>"]["posts"],1)
+        nm.disable_tracing()
+        self.assertIsNotNone(nm._clock)
+        nm.disable_metrics()
+        self.assertIsNone(nm._clock)
+
+    def test_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            nm = NotificationManager("test",executor=executor)
+            nm.register("<<Test>>",self.handlers.inner)
+            nm.register("<<Test>>",self.handlers.inner)
+            tracer = nm.enable_tracing()
+            nm.notify("<<Test>>")
+            for future in nm.notify_nowait("<<Test>>"):
+                future.result()
+        cats = [e["cat"] for e in tracer.events() if e["ph"] == "X"]
+        self.assertEqual(sorted(cats),["callback"]*4 + ["notify"])
+
+    def test_export(self):
+        nm = self.nm
+        tracer = nm.enable_tracing()
+        nm.notify("<<Outer>>")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir,"trace.json")
+            self.assertEqual(tracer.export(path),4)
+            with open(path) as file:
+                trace = json.load(file)
+        events = trace["traceEvents"]
+        self.assertEqual(events[0]["ph"],"M")
+        self.assertEqual(
+            events[0]["args"]["name"],threading.current_thread().name
+        )
+        self.assertEqual({e["ph"] for e in events[1:]},{"X"})
+        self.assertEqual({e["pid"] for e in events},{os.getpid()})